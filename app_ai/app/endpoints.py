@@ -1,29 +1,20 @@
 
-from datetime import datetime
 from pydantic import BaseModel
 from typing import List, Optional, Any
 from fastapi import HTTPException, APIRouter
-import app.ai as ai
+import normalizer.ai as ai
+from normalizer.schemas import QueryRequest
 
 
 router = APIRouter()
 
-class WorkoutSet(BaseModel):
-    weight: float = None
-    reps: int = None
-    note: str = None
-
-class WorkoutExercise(BaseModel):
-    name: str
-    sets: List[WorkoutSet]
-
-class QueryRequest(BaseModel):
-    query: List[WorkoutExercise]
-    date: datetime
-
 class QueryResponse(BaseModel):
     result: Any
 
+class RetrieveRequest(BaseModel):
+    queries: List[str]
+    top_k: int = 5
+
 class ExerciseSet(BaseModel):
     reps: Optional[int]
     weight: Optional[float]
@@ -34,24 +25,56 @@ class ExerciseInput(BaseModel):
 
 @router.get("/embed")
 def embed(text: str):
-    embedding = ai.embed_text(text)
-    return {"embedding": embedding.tolist()}
+    """Sparse embedding of text: non-zero indices and values out of dimensions."""
+    return {"embedding": ai.embed_text(text)}
 
 @router.get("/retrieve")
 def retrieve(query: str, top_k: int = 5):
     results = ai.embedding_retriever(query, top_k)
     return {"results": results}
 
+@router.post("/retrieve")
+def retrieve_batch(request: RetrieveRequest):
+    results = ai.retrieve_many(request.queries, request.top_k)
+    return {"results": [[{"name": name, "score": score} for name, score in hits] for hits in results]}
+
 @router.post("/normalize")
 def normalize(raw_input: str):
     result = ai.hybrid_normalize_exercise(raw_input)
     return result
 
 @router.post("/query", response_model=QueryResponse)
-def query_endpoint(request: QueryRequest):
+async def query_endpoint(request: QueryRequest):
     try:
         location = "Unknown"  # Replace with actual location if available in request
-        result = ai.process_query(request.query, request.date, location=location)
+        result = await ai.process_query_async(request.query, request.date, location=location)
         return QueryResponse(result=result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/normalize/stats")
+def normalize_stats():
+    return {
+        "stages": dict(ai.NORMALIZATION_STATS),
+        "index": ai.EXERCISE_LOOKUP.stats(),
+        "retrieval_index": ai.index_stats(),
+        "llm": ai.LLM_CLIENT.stats(),
+        "learned_aliases": len(ai.LEARNED_ALIASES),
+    }
+
+@router.get("/admin/normalize-cache")
+def normalize_cache_stats():
+    return ai.NORMALIZATION_CACHE.stats()
+
+@router.delete("/admin/normalize-cache")
+def invalidate_normalization(raw_input: str):
+    """
+    Forget the cached mapping for a name, and the aliases learned from it, so the next
+    request resolves it again through retrieval and the LLM.
+    """
+    key = ai.clean_exercise_name(raw_input)
+    cached = ai.NORMALIZATION_CACHE.invalidate(key)
+    forgotten = ai.forget_alias(raw_input)
+    if not cached and not forgotten:
+        raise HTTPException(status_code=404, detail=f"No cached mapping for '{key}'")
+    return {"invalidated": key, "forgotten_aliases": forgotten}
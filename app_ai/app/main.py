@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 
 from app import endpoints
+from normalizer import metrics
 from fastapi.middleware.cors import CORSMiddleware
 
 
@@ -24,6 +25,9 @@ app.add_middleware(
 
 app.include_router(endpoints.router)
 
+# Route latency, normalization stage spans and GET /metrics
+metrics.install(app)
+
 @app.get("/")
 def read_root():
     return {"message": "Lifting Analytics API is running."}
\ No newline at end of file
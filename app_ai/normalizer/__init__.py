@@ -0,0 +1,10 @@
+"""
+Exercise normalization, importable outside the AI service.
+
+normalizer.ai maps raw exercise names onto the canonical exercise dictionary (lookup,
+cached embedding retrieval + LLM selection) and computes per-exercise workout stats
+(process_query). The AI service serves it over HTTP; the backend embeds it in-process
+for single-hop ingestion (POST /workouts/ingest) and log imports, loading this package
+alone from NORMALIZER_PATH without putting app_ai/ on sys.path (app/services/normalization.py).
+Importing normalizer.ai loads the normalization store and learned aliases.
+"""
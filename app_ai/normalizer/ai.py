@@ -1,10 +1,24 @@
+import asyncio
+import contextvars
 import datetime
+import json
+import logging
 import re
 import os
-import numpy as np
-import faiss
-from sklearn.feature_extraction.text import TfidfVectorizer
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
+from normalizer.artifacts import current_version, load_or_build_index, load_published
+from normalizer.cache import NORMALIZE_CACHE_URL, NormalizationCache, open_store
+from normalizer.learned import EXERCISE_SEED_URL, read_backend_exercises
+from normalizer.llm import LLM_DEADLINE, LLMClient, LLMUnavailable
+from normalizer.lookup import ExerciseLookup, clean_exercise_name
+from normalizer.instrumentation import span
+from normalizer.retrieval import SparseIndex
+
+logger = logging.getLogger(__name__)
 
 EXERCISE_DICT = {
     # Chest
@@ -141,37 +155,259 @@ for canonical, (primary, secondary, equipment, aliases) in EXERCISE_DICT.items()
         ALL_EXERCISE_STRINGS.append(alias)
         ALIAS_TO_CANONICAL[alias] = canonical
 
-# Use TF-IDF for embedding all names and aliases
-_vectorizer = TfidfVectorizer().fit(ALL_EXERCISE_STRINGS)
-EXERCISE_EMBEDDINGS = _vectorizer.transform(ALL_EXERCISE_STRINGS).toarray().astype('float32')
-FAISS_INDEX = faiss.IndexFlatL2(EXERCISE_EMBEDDINGS.shape[1])
-FAISS_INDEX.add(EXERCISE_EMBEDDINGS)
+# Canonical names take precedence over aliases, then the first exercise listing an alias wins
+EXERCISE_LOOKUP = ExerciseLookup(
+    [(canonical, canonical) for canonical in EXERCISE_DICT]
+    + [(alias, canonical) for canonical, entry in EXERCISE_DICT.items() for alias in entry[3]]
+)
+
+# Hits per normalization stage: exact, cleaned, fuzzy, llm (embedding retrieval + LLM selection)
+# and fallback (top retrieval candidate, when the LLM is unavailable)
+NORMALIZATION_STATS = Counter({"exact": 0, "cleaned": 0, "fuzzy": 0, "llm": 0, "fallback": 0})
+
+# Unknown names sent through the embedding + LLM fallback at once per query
+NORMALIZE_CONCURRENCY = int(os.getenv("NORMALIZE_CONCURRENCY", "8"))
+
+# Threads running those fallbacks across all queries. They mostly wait on the LLM, so this is
+# sized apart from asyncio's default executor (CPU count + 4 threads, 5 on a single-CPU dyno).
+NORMALIZE_THREADS = int(os.getenv("NORMALIZE_THREADS", "32"))
+_normalize_executor = ThreadPoolExecutor(max_workers=NORMALIZE_THREADS, thread_name_prefix="normalize")
+
+LLM_CLIENT = LLMClient()
+
+# Results of the embedding + LLM fallback, keyed by the cleaned input
+NORMALIZATION_STORE = open_store(NORMALIZE_CACHE_URL)
+NORMALIZATION_CACHE = NormalizationCache(NORMALIZATION_STORE)
+
+# Exercises and aliases learned at runtime (LLM selections and backend exercises), on top of EXERCISE_DICT
+LEARNED_EXERCISES: Dict[str, tuple] = {}
+LEARNED_ALIASES: list = []
+_learned_lock = threading.Lock()
+
+# Seconds between checks for aliases other workers forgot (see forget_alias)
+LEARNED_SYNC_SECONDS = float(os.getenv("LEARNED_SYNC_SECONDS", "30"))
+_forgotten_since = 0.0
+_forgotten_checked_at = 0.0
+
+# Character n-gram TF-IDF over all names and aliases, searched by sparse cosine similarity.
+# Loaded from the prebuilt artifacts (python -m normalizer.artifacts build) on first use, and
+# swapped for newer published ones (python -m normalizer.artifacts publish) while running.
+_exercise_index = None
+_exercise_index_lock = threading.Lock()
+_index_version = None
+_index_checked_at = 0.0
+INDEX_SWAPS = 0
 
-def embed_text(text: str) -> np.ndarray:
+# Seconds between checks for a newly published index; 0 disables hot-swapping
+ARTIFACT_RELOAD_SECONDS = float(os.getenv("ARTIFACT_RELOAD_SECONDS", "10"))
+
+def _install_index(index: SparseIndex) -> None:
     """
-    Convert text to embedding using the same vectorizer as for EXERCISE_EMBEDDINGS.
+    Make index the live one, first adding aliases this worker learned that it lacks and
+    masking learned aliases it has forgotten since the index was built.
     """
+    global _exercise_index
+    with _learned_lock:
+        known = set(index.labels)
+        for alias in LEARNED_ALIASES:
+            if alias not in known:
+                index.add(alias)
+        for alias in known.difference(ALIAS_TO_CANONICAL):
+            index.remove(alias)
+        # Searches hold their own reference, so in-flight requests finish on the old index
+        _exercise_index = index
+
+def get_exercise_index() -> SparseIndex:
+    global _index_version, _index_checked_at
+    if _exercise_index is None:
+        with _exercise_index_lock:
+            if _exercise_index is None:
+                # Read before loading, so a publish racing the load is picked up at the next check
+                _index_version = current_version()
+                _index_checked_at = time.monotonic()
+                _install_index(load_or_build_index(ALL_EXERCISE_STRINGS))
+    elif ARTIFACT_RELOAD_SECONDS and time.monotonic() - _index_checked_at >= ARTIFACT_RELOAD_SECONDS:
+        _swap_published_index()
+    return _exercise_index
+
+def _swap_published_index() -> None:
+    """Swap to the published index if CURRENT moved since the last check (one thread checks, the others keep searching)."""
+    global _index_version, _index_checked_at, INDEX_SWAPS
+    if not _exercise_index_lock.acquire(blocking=False):
+        return
+    try:
+        _index_checked_at = time.monotonic()
+        version = current_version()
+        if version is None or version == _index_version:
+            return
+        _index_version = version
+        index = load_published(ALL_EXERCISE_STRINGS, version=version)
+        if index is None:
+            return
+        # The new index contains aliases other workers learned; map them to their exercises too
+        reload_learned()
+        _install_index(index)
+        INDEX_SWAPS += 1
+    finally:
+        _exercise_index_lock.release()
+
+def index_stats() -> Dict[str, Any]:
+    index = _exercise_index
+    return {
+        "loaded": index is not None,
+        "published_version": _index_version,
+        "labels": len(index.labels) if index is not None else 0,
+        "swaps": INDEX_SWAPS,
+    }
+
+def _exercise_details(canonical: str):
+    """(primary, secondary, equipment, aliases) of a dictionary or learned exercise, or None."""
+    return EXERCISE_DICT.get(canonical) or LEARNED_EXERCISES.get(canonical)
+
+def learn_alias(alias: str, canonical: str, primary_muscle=None, secondary_muscle=None, equipment=None, persist=True):
+    """
+    Make alias resolve to canonical in the dictionary lookup and the retrieval index,
+    creating canonical as a learned exercise if it is new. Costs the same regardless of
+    how many aliases are indexed; nothing is refitted or rebuilt.
+    persist: also append it to the learned_aliases table of the normalization store
+    """
+    alias = _clean_query(alias)
+    canonical = _clean_query(canonical)
+    if not alias or not canonical:
+        return
+    with _learned_lock:
+        details = _exercise_details(canonical)
+        if details is None:
+            details = LEARNED_EXERCISES[canonical] = (primary_muscle, secondary_muscle, equipment, [])
+        else:
+            primary_muscle, secondary_muscle, equipment = details[:3]
+        for name in dict.fromkeys((canonical, alias)):
+            if name in ALIAS_TO_CANONICAL:
+                continue
+            ALIAS_TO_CANONICAL[name] = canonical
+            EXERCISE_LOOKUP.add(name, canonical)
+            LEARNED_ALIASES.append(name)
+            if name != canonical and canonical in LEARNED_EXERCISES:
+                details[3].append(name)
+            if _exercise_index is not None:
+                _exercise_index.add(name)
+    if persist and NORMALIZATION_STORE is not None:
+        NORMALIZATION_STORE.add_learned(alias, canonical, primary_muscle, secondary_muscle, equipment)
+
+def _forget_learned_alias(alias: str) -> None:
+    """Undo learn_alias for alias in this process. Its exercise stays, other aliases may still use it. Hold _learned_lock."""
+    canonical = ALIAS_TO_CANONICAL.pop(alias)
+    LEARNED_ALIASES.remove(alias)
+    EXERCISE_LOOKUP.remove(alias)
+    details = LEARNED_EXERCISES.get(canonical)
+    if details is not None and alias in details[3]:
+        details[3].remove(alias)
+    if _exercise_index is not None:
+        _exercise_index.remove(alias)
+
+def forget_alias(raw_input: str) -> list:
+    """
+    Undo learn_alias for every learned alias that cleans to the same name as raw_input (the
+    key of the normalization cache), so the name goes back through retrieval and the LLM.
+    Dictionary entries are never forgotten. The store keeps a tombstone, so other workers
+    drop the aliases within LEARNED_SYNC_SECONDS and restarts do not replay them.
+    Returns the forgotten aliases.
+    """
+    key = clean_exercise_name(raw_input)
+    with _learned_lock:
+        aliases = [alias for alias in LEARNED_ALIASES if clean_exercise_name(alias) == key]
+        for alias in aliases:
+            _forget_learned_alias(alias)
+    if NORMALIZATION_STORE is not None:
+        # Also the ones only other workers have learned so far
+        aliases += [row[0] for row in NORMALIZATION_STORE.learned() if clean_exercise_name(row[0]) == key]
+        aliases = list(dict.fromkeys(aliases))
+        for alias in aliases:
+            NORMALIZATION_STORE.forget_learned(alias)
+    return aliases
+
+def sync_forgotten(force: bool = False) -> None:
+    """Apply aliases forgotten through the store (by any worker) since the last sync, at most every LEARNED_SYNC_SECONDS."""
+    global _forgotten_since, _forgotten_checked_at
+    if NORMALIZATION_STORE is None:
+        return
+    if not force and time.monotonic() - _forgotten_checked_at < LEARNED_SYNC_SECONDS:
+        return
+    _forgotten_checked_at = time.monotonic()
+    for alias, forgotten_at in NORMALIZATION_STORE.forgotten(_forgotten_since):
+        with _learned_lock:
+            if alias in LEARNED_ALIASES:
+                _forget_learned_alias(alias)
+        _forgotten_since = max(_forgotten_since, forgotten_at)
+
+def reload_learned():
+    """
+    Replay the aliases persisted in the normalization store, including ones other workers
+    learned, and drop the ones forgotten since.
+    """
+    if NORMALIZATION_STORE is not None:
+        for alias, canonical, primary, secondary, equipment in NORMALIZATION_STORE.learned():
+            learn_alias(alias, canonical, primary, secondary, equipment, persist=False)
+        sync_forgotten(force=True)
+
+def _load_learned():
+    """Replay persisted learned aliases, then seed exercises the backend already knows."""
+    reload_learned()
+    if EXERCISE_SEED_URL:
+        try:
+            exercises = read_backend_exercises(EXERCISE_SEED_URL)
+        except Exception:
+            logger.warning("Could not seed learned exercises from the backend", exc_info=True)
+            return
+        for name, primary, secondary, equipment in exercises:
+            learn_alias(name, name, primary, secondary, equipment, persist=False)
+
+# Aliases fetched per requested canonical name, since several aliases usually share one
+ALIAS_FANOUT = 4
+
+def _clean_query(text: str) -> str:
     # Clean input: lowercase, strip, collapse spaces
-    clean_text = re.sub(r'\s+', ' ', text.strip().lower())
-    embedding = _vectorizer.transform([clean_text]).toarray()[0]
-    return np.array(embedding, dtype='float32')
+    return re.sub(r'\s+', ' ', text.strip().lower())
+
+def embed_text(text: str) -> Dict[str, Any]:
+    """
+    Convert text to embedding using the same vectorizer as the exercise index.
+    The hashed vector has n_features dimensions but only a few dozen non-zeros, so it is
+    returned sparse: {"dimensions", "indices", "values"}.
+    """
+    index = get_exercise_index()
+    embedding = index.embed([_clean_query(text)])
+    return {
+        "dimensions": index.vectorizer.n_features,
+        "indices": embedding.indices.tolist(),
+        "values": embedding.data.astype("float32").tolist(),
+    }
+
+def retrieve_many(queries: list, top_k: int = 5) -> list:
+    """
+    Retrieve the top_k most similar canonical exercises for each query in one batched search.
+    Returns a list per query of (canonical name, cosine similarity), best first.
+    """
+    index = get_exercise_index()
+    with span("retrieve"):
+        hits = index.search([_clean_query(q) for q in queries], top_k * ALIAS_FANOUT)
+    results = []
+    for row in hits:
+        # Map aliases back to canonical names, remove duplicates, preserve order
+        best = {}
+        for position, score in row:
+            alias = index.labels[position]
+            best.setdefault(ALIAS_TO_CANONICAL.get(alias, alias), score)
+            if len(best) >= top_k:
+                break
+        results.append(list(best.items()))
+    return results
 
 def embedding_retriever(query: str, top_k: int = 5) -> list:
     """
-    Retrieve top_k similar exercise canonical names using embeddings and FAISS.
+    Retrieve top_k similar exercise canonical names using the sparse embedding index.
     """
-    query_vec = embed_text(query)
-    D, I = FAISS_INDEX.search(np.array([query_vec]), top_k)
-    # Map aliases back to canonical names, remove duplicates, preserve order
-    canonical_results = []
-    for idx in I[0]:
-        alias = ALL_EXERCISE_STRINGS[idx]
-        canonical = ALIAS_TO_CANONICAL.get(alias, alias)
-        if canonical not in canonical_results:
-            canonical_results.append(canonical)
-        if len(canonical_results) >= top_k:
-            break
-    return canonical_results
+    return [name for name, _ in retrieve_many([query], top_k)[0]]
 
 def llm_selector(candidates: list, original_exercise: str) -> Dict[str, Any]:
     """
@@ -180,11 +416,8 @@ def llm_selector(candidates: list, original_exercise: str) -> Dict[str, Any]:
     original_exercise: The raw input exercise name
     Returns a dict with keys: canonical_exercise, primary_muscle, secondary_muscle, equipment
     """
+    deadline = time.monotonic() + LLM_DEADLINE
     try:
-        import openai
-        openai.api_key = os.getenv("OPENAI_API_KEY")
-        import json
-
         # Step 1: Filter by equipment if present in original_exercise
         equipment_in_original = None
         for eq in EQUIPMENT_TYPES:
@@ -203,13 +436,8 @@ def llm_selector(candidates: list, original_exercise: str) -> Dict[str, Any]:
             f"Given the original exercise '{original_exercise}', rank the following candidate names by relevance: {json.dumps(candidate_names)}. "
             "Return only the indices of the candidates sorted by relevance, as a JSON list. For example: [2, 0, 1] if candidate_names[2] is most relevant. "
         )
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": ranking_prompt}],
-            max_tokens=50,
-            temperature=0.2
-        )
-        content = response.choices[0].message.content
+        with span("llm_rank"):
+            content = LLM_CLIENT.complete(ranking_prompt, max_tokens=50, deadline=deadline)
         result = json.loads(content)
 
         # Rearrange filtered_candidates in the order given by result (indices)
@@ -228,13 +456,8 @@ def llm_selector(candidates: list, original_exercise: str) -> Dict[str, Any]:
             json.dumps(MUSCLE_GROUPS), json.dumps(MUSCLE_GROUPS), json.dumps(EQUIPMENT_TYPES)
             )
         )
-        response2 = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": relevance_prompt}],
-            max_tokens=50,
-            temperature=0.2
-        )
-        final_content = response2.choices[0].message.content
+        with span("llm_relevance"):
+            final_content = LLM_CLIENT.complete(relevance_prompt, max_tokens=50, deadline=deadline)
         if final_content.strip().startswith("{"):
             final_content = final_content.replace("'", '"')
         final_result = json.loads(final_content)
@@ -244,42 +467,55 @@ def llm_selector(candidates: list, original_exercise: str) -> Dict[str, Any]:
             "secondary_muscle": final_result.get("secondary_muscle"),
             "equipment": final_result.get("equipment")
         }
+    except LLMUnavailable:
+        raise
     except Exception as e:
         raise RuntimeError(f"LLM selection failed: {e}")
 
+def _dictionary_result(canonical: str) -> Dict[str, Any]:
+    primary, secondary, equipment, _ = _exercise_details(canonical)
+    return {
+        "canonical_exercise": canonical,
+        "primary_muscle": primary,
+        "secondary_muscle": secondary,
+        "equipment": equipment
+    }
+
 def hybrid_normalize_exercise(raw_input: str) -> Dict[str, Any]:
     """
     Hybrid exercise normalization using dictionary lookup, embedding retrieval, and LLM selection.
     raw_input: The raw input exercise name
     Returns a dict with keys: canonical_exercise, primary_muscle, secondary_muscle, equipment
     """
-    # Step 1: Dictionary lookup
-    # Ensure exercise_normalizer is defined before use
-    if 'exercise_normalizer' not in globals():
-        def exercise_normalizer(name: str):
-            for canonical, (primary, secondary, equipment, aliases) in EXERCISE_DICT.items():
-                if name.lower() == canonical:
-                    return canonical, primary, secondary, equipment
-                if name.lower() in [a.lower() for a in aliases]:
-                    return canonical, primary, secondary, equipment
-            return None, None, None, None
-    canonical, primary, secondary, equipment = exercise_normalizer(raw_input)
+    sync_forgotten()
+    # Step 1: Exact, cleaned and typo-tolerant lookup in the precomputed index
+    with span("lookup"):
+        canonical, stage = EXERCISE_LOOKUP.lookup(raw_input)
 
     # Step 2: If found in dictionary, return immediately.
     if canonical:
-        return {
-            "canonical_exercise": canonical,
-            "primary_muscle": primary,
-            "secondary_muscle": secondary,
-            "equipment": equipment
-        }
-    
-    # Step 3: If not found in dictionary, use embedding + LLM fallback
+        NORMALIZATION_STATS[stage] += 1
+        return _dictionary_result(canonical)
+    # Step 3: If not found in dictionary, use the cached embedding + LLM fallback
+    try:
+        # Includes retrieve and llm_* when the name is not cached
+        with span("cache"):
+            return NORMALIZATION_CACHE.get_or_compute(
+                clean_exercise_name(raw_input), lambda: _retrieve_and_select(raw_input)
+            )
+    except LLMUnavailable:
+        # Not cached, so the name is resolved properly once the LLM is back
+        NORMALIZATION_STATS["fallback"] += 1
+        candidates = _candidate_details(raw_input)
+        top = candidates[0] if candidates else {"name": None, "primary_muscle": None, "secondary_muscle": None, "equipment": None}
+        return _lowercase_result({**top, "canonical_exercise": top["name"]})
+
+def _candidate_details(raw_input: str) -> list:
     candidates = embedding_retriever(raw_input)
     candidate_details = []
     for c in candidates:
         c_lower = c.lower()
-        details = EXERCISE_DICT.get(c_lower)
+        details = _exercise_details(c_lower)
         if details:
             candidate_details.append({
                 "name": c_lower,
@@ -294,8 +530,9 @@ def hybrid_normalize_exercise(raw_input: str) -> Dict[str, Any]:
                 "secondary_muscle": None,
                 "equipment": None
             })
-    llm_result = llm_selector(candidate_details, raw_input)
+    return candidate_details
 
+def _lowercase_result(llm_result: Dict[str, Any]) -> Dict[str, Any]:
     canonical_exercise = llm_result["canonical_exercise"].lower() if llm_result["canonical_exercise"] else None
     primary_muscle = llm_result["primary_muscle"].lower() if llm_result["primary_muscle"] else None
     secondary_muscle = llm_result["secondary_muscle"].lower() if llm_result["secondary_muscle"] else None
@@ -307,40 +544,88 @@ def hybrid_normalize_exercise(raw_input: str) -> Dict[str, Any]:
         "equipment": equipment
     }
 
+def _retrieve_and_select(raw_input: str) -> Dict[str, Any]:
+    """Embedding retrieval followed by LLM selection, for names the dictionary does not know."""
+    NORMALIZATION_STATS["llm"] += 1
+    result = _lowercase_result(llm_selector(_candidate_details(raw_input), raw_input))
+    if result["canonical_exercise"]:
+        # Next time this name (or the new exercise) resolves without the LLM
+        learn_alias(raw_input, result["canonical_exercise"], result["primary_muscle"], result["secondary_muscle"], result["equipment"])
+    return result
+
+_load_learned()
+
 def summarize_stats(stats):
     """Stub for AI-powered natural language recap."""
     # TODO: Integrate with LLM
     return "Summary goes here."
 
-def process_query(query: list, session_date: datetime, location=None):
+async def normalize_exercises_async(names: list, concurrency: int = NORMALIZE_CONCURRENCY) -> Dict[str, Dict[str, Any]]:
+    """
+    Normalize many exercise names at once.
+    Duplicates are resolved once, dictionary hits immediately, and the remaining names
+    go through the embedding + LLM fallback concurrently, at most concurrency at a time.
+    Returns a dict of raw name -> normalization result.
+    """
+    sync_forgotten()
+    results = {}
+    unknown = []
+    for name in dict.fromkeys(names):
+        with span("lookup"):
+            canonical, stage = EXERCISE_LOOKUP.lookup(name)
+        if canonical:
+            NORMALIZATION_STATS[stage] += 1
+            results[name] = _dictionary_result(canonical)
+        else:
+            unknown.append(name)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    loop = asyncio.get_running_loop()
+
+    async def resolve(name):
+        async with semaphore:
+            # With the caller's context, as asyncio.to_thread does, so spans reach the request's timings
+            context = contextvars.copy_context()
+            results[name] = await loop.run_in_executor(_normalize_executor, context.run, hybrid_normalize_exercise, name)
+
+    await asyncio.gather(*(resolve(name) for name in unknown))
+    return results
+
+def _exercise_stats(exercise) -> Dict[str, Any]:
+    return {
+        "total_sets": len(exercise.sets),
+        "total_reps": sum(s.reps or 0 for s in exercise.sets if s.reps is not None),
+        "max_weight": max((s.weight or 0) for s in exercise.sets if s.weight is not None),
+        "total_volume": sum((s.weight or 0) * (s.reps or 0) for s in exercise.sets if s.weight is not None and s.reps is not None),
+    }
+
+async def process_query_async(query: list, session_date: datetime, location=None):
     """
     Process a user query containing exercises with sets, normalize exercises, and compute analytics.
+    Exercise names are normalized concurrently (see normalize_exercises_async).
     """
     if session_date.timestamp() > datetime.datetime.now().timestamp():
         raise ValueError("Session date cannot be in the future.")
 
+    normalized = await normalize_exercises_async([exercise.name for exercise in query])
+    stats = [_exercise_stats(exercise) for exercise in query]
+
     processed_exercises = []
-    for exercise in query:
-        norm_result = hybrid_normalize_exercise(exercise.name)
-        norm_name = norm_result.get("canonical_exercise")
-        primary_muscle = norm_result.get("primary_muscle")
-        secondary_muscle = norm_result.get("secondary_muscle")
-        equipment = norm_result.get("equipment")
-        total_sets = len(exercise.sets)
-        total_reps = sum(s.reps or 0 for s in exercise.sets if s.reps is not None)
-        max_weight = max((s.weight or 0) for s in exercise.sets if s.weight is not None)
-        total_volume = sum((s.weight or 0) * (s.reps or 0) for s in exercise.sets if s.weight is not None and s.reps is not None)
+    for exercise, exercise_stats in zip(query, stats):
+        norm_result = normalized[exercise.name]
         processed_exercises.append({
-            "name": norm_name,
+            "name": norm_result.get("canonical_exercise"),
             "date": session_date,
             "location": location,
-            "primary_muscle": primary_muscle,
-            "secondary_muscle": secondary_muscle,
-            "equipment": equipment,
-            "total_sets": total_sets,
-            "total_reps": total_reps,
-            "max_weight": max_weight,
-            "total_volume": total_volume,
+            "primary_muscle": norm_result.get("primary_muscle"),
+            "secondary_muscle": norm_result.get("secondary_muscle"),
+            "equipment": norm_result.get("equipment"),
+            **exercise_stats,
             "sets": exercise.sets
         })
-    return processed_exercises
\ No newline at end of file
+    return processed_exercises
+
+def process_query(query: list, session_date: datetime, location=None):
+    """Synchronous wrapper around process_query_async, for callers outside an event loop."""
+    return asyncio.run(process_query_async(query, session_date, location=location))
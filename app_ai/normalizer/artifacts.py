@@ -0,0 +1,233 @@
+"""
+Prebuilt retrieval artifacts.
+
+    python -m normalizer.artifacts build [--dir artifacts] [--force]
+
+writes the hashed n-gram IDF weights, indexed aliases and the CSR index arrays to
+<dir>/<version>/, where version hashes the exercise dictionary and the index format,
+and does nothing if that build already exists. Deploys run it once at build time
+(bin/post_compile), so the artifact ships with the slug and dynos only load it.
+At startup the service loads the directory matching its dictionary with the arrays
+memory-mapped read-only, so every worker on a host shares the same page cache instead
+of fitting and holding its own copy. A missing or stale artifact falls back to
+building the index in-process.
+
+    python -m normalizer.artifacts publish [--dir artifacts] [--watch SECONDS]
+
+builds the dictionary plus every learned alias in the normalization store, then points
+<dir>/CURRENT at it with an atomic rename. Running workers notice the new pointer
+(within ARTIFACT_RELOAD_SECONDS) and swap to the new mapping without a restart, so
+aliases learned by one worker reach the others through the shared mapping instead of
+each worker growing its own copy. With --watch the publisher keeps running and
+republishes whenever the learned aliases change (learned or forgotten).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+from normalizer.retrieval import N_FEATURES, NGRAM_RANGE, HashingNgramVectorizer, SparseIndex
+
+# Bump when the layout or the embedding changes, so old artifacts are never loaded
+ARTIFACT_FORMAT = 2
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join(os.path.dirname(__file__), "..", "artifacts"))
+
+# Name of the pointer file holding the published version
+CURRENT = "CURRENT"
+# Published versions kept on disk besides the current one, for workers still mapping them
+KEEP_PUBLISHED = 2
+
+MATRIX_ARRAYS = ("data", "indices", "indptr")
+
+
+def artifact_version(labels: Sequence[str]) -> str:
+    payload = json.dumps({"format": ARTIFACT_FORMAT, "ngram_range": NGRAM_RANGE, "features": N_FEATURES, "labels": list(labels)})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def build_artifacts(
+    labels: Sequence[str], base_dir: str = ARTIFACT_DIR, base_labels: Optional[Sequence[str]] = None, replace: bool = False
+) -> str:
+    """
+    Fit the index over labels and write it to base_dir/<version>/. Returns the directory.
+    base_labels: the dictionary labels that labels extend (defaults to labels), recorded so
+    workers only load a published build made from their own dictionary
+    replace: swap the new build in for an existing one; otherwise an existing build is kept
+    """
+    version = artifact_version(labels)
+    index = SparseIndex(labels)
+    out_dir = os.path.join(base_dir, version)
+    tmp_dir = out_dir + f".tmp{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    with open(os.path.join(tmp_dir, "labels.json"), "w", encoding="utf-8") as f:
+        json.dump(list(labels), f)
+    np.save(os.path.join(tmp_dir, "idf.npy"), index.vectorizer.idf)
+    for name in MATRIX_ARRAYS:
+        np.save(os.path.join(tmp_dir, f"matrix_t_{name}.npy"), getattr(index.matrix_t, name))
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": version,
+            "format": ARTIFACT_FORMAT,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "labels": len(labels),
+            "features": N_FEATURES,
+            "shape": list(index.matrix_t.shape),
+            "base_version": artifact_version(labels if base_labels is None else base_labels),
+        }, f, indent=2)
+    # Publish the finished directory in one step so readers never see a partial build
+    import shutil
+    if not os.path.isdir(out_dir):
+        os.rename(tmp_dir, out_dir)
+    elif replace:
+        # Move the old build aside first: a directory cannot be renamed over a non-empty one
+        old_dir = out_dir + f".old{os.getpid()}"
+        os.rename(out_dir, old_dir)
+        os.rename(tmp_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    else:
+        shutil.rmtree(tmp_dir)
+    return out_dir
+
+
+def _open_index(directory: str, labels: Sequence[str], manifest: dict) -> SparseIndex:
+    import scipy.sparse as sp
+    vectorizer = HashingNgramVectorizer(manifest["features"], np.load(os.path.join(directory, "idf.npy"), mmap_mode="r"))
+    arrays = [np.load(os.path.join(directory, f"matrix_t_{name}.npy"), mmap_mode="r") for name in MATRIX_ARRAYS]
+    matrix_t = sp.csr_matrix(tuple(arrays), shape=tuple(manifest["shape"]), copy=False)
+    return SparseIndex(labels, vectorizer=vectorizer, matrix_t=matrix_t)
+
+
+def _read_manifest(directory: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_artifacts(labels: Sequence[str], base_dir: str = ARTIFACT_DIR) -> Optional[SparseIndex]:
+    """The prebuilt index for labels with its arrays memory-mapped, or None if there is no matching build."""
+    directory = os.path.join(base_dir, artifact_version(labels))
+    manifest = _read_manifest(directory)
+    if manifest is None:
+        return None
+    return _open_index(directory, labels, manifest)
+
+
+def current_version(base_dir: str = ARTIFACT_DIR) -> Optional[str]:
+    """The version CURRENT points at, or None before anything was published."""
+    try:
+        with open(os.path.join(base_dir, CURRENT), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_published(base_labels: Sequence[str], base_dir: str = ARTIFACT_DIR, version: Optional[str] = None) -> Optional[SparseIndex]:
+    """
+    The published index (CURRENT, or version) memory-mapped, if it was built from the
+    base_labels dictionary. Its labels extend base_labels with the learned aliases.
+    """
+    version = version or current_version(base_dir)
+    if version is None:
+        return None
+    directory = os.path.join(base_dir, version)
+    manifest = _read_manifest(directory)
+    if manifest is None or manifest.get("base_version") != artifact_version(base_labels):
+        return None
+    with open(os.path.join(directory, "labels.json"), encoding="utf-8") as f:
+        labels = json.load(f)
+    return _open_index(directory, labels, manifest)
+
+
+def publish_artifacts(labels: Sequence[str], base_labels: Sequence[str], base_dir: str = ARTIFACT_DIR) -> str:
+    """Build labels (base_labels plus learned aliases) and atomically point CURRENT at it. Returns the version."""
+    version = os.path.basename(build_artifacts(labels, base_dir, base_labels=base_labels))
+    pointer = os.path.join(base_dir, CURRENT)
+    tmp = f"{pointer}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    # Readers see either the old or the new pointer, never a partial one
+    os.replace(tmp, pointer)
+    _prune_published(base_dir, version)
+    return version
+
+
+def _prune_published(base_dir: str, current: str) -> None:
+    """Delete older published builds beyond KEEP_PUBLISHED. Workers still mapping them keep their pages until they swap."""
+    import shutil
+    published = []
+    for name in os.listdir(base_dir):
+        directory = os.path.join(base_dir, name)
+        manifest = _read_manifest(directory) if name != current and os.path.isdir(directory) else None
+        # Plain builds (no learned aliases) are kept: they are the startup fallback
+        if manifest is not None and manifest.get("base_version") not in (None, manifest["version"]):
+            published.append((os.path.getmtime(directory), directory))
+    for _, directory in sorted(published, reverse=True)[KEEP_PUBLISHED:]:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def load_or_build_index(labels: Sequence[str], base_dir: str = ARTIFACT_DIR) -> SparseIndex:
+    index = load_published(labels, base_dir) or load_artifacts(labels, base_dir)
+    if index is None:
+        print(f"No retrieval artifact for this dictionary in {base_dir}, building the index in-process", file=sys.stderr)
+        index = SparseIndex(labels)
+    return index
+
+
+def _publish_learned(base_dir: str) -> Optional[str]:
+    """
+    Publish the dictionary plus the store's learned aliases unless CURRENT already holds
+    exactly those labels. The version hashes the labels, so an alias forgotten and another
+    learned between two runs still publish. Returns the new version, or None.
+    """
+    from normalizer import ai
+    ai.reload_learned()
+    learned = list(ai.LEARNED_ALIASES)
+    labels = ai.ALL_EXERCISE_STRINGS + learned
+    if artifact_version(labels) == current_version(base_dir):
+        return None
+    started = time.perf_counter()
+    version = publish_artifacts(labels, ai.ALL_EXERCISE_STRINGS, base_dir)
+    print(f"Published {version} ({len(learned)} learned aliases) in {time.perf_counter() - started:.2f}s")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the prebuilt retrieval artifacts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--dir", default=ARTIFACT_DIR)
+    build.add_argument("--force", action="store_true", help="Rebuild even if this dictionary's build exists")
+    publish = sub.add_parser("publish", help="Publish the dictionary plus learned aliases for running workers")
+    publish.add_argument("--dir", default=ARTIFACT_DIR)
+    publish.add_argument("--watch", type=float, default=None, metavar="SECONDS", help="Keep republishing as aliases are learned")
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        _publish_learned(args.dir)
+        while args.watch:
+            time.sleep(args.watch)
+            _publish_learned(args.dir)
+        return
+
+    from normalizer.ai import ALL_EXERCISE_STRINGS
+    existing = os.path.join(args.dir, artifact_version(ALL_EXERCISE_STRINGS))
+    if not args.force and _read_manifest(existing) is not None:
+        print(f"{existing} is up to date")
+        return
+    started = time.perf_counter()
+    out_dir = build_artifacts(ALL_EXERCISE_STRINGS, args.dir, replace=args.force)
+    print(f"Wrote {out_dir} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
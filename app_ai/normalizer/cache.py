@@ -0,0 +1,287 @@
+"""
+Normalization cache for results of the embedding + LLM fallback.
+
+An in-process LRU with a TTL sits in front of a persistent store (SQLite by default,
+Postgres when NORMALIZE_CACHE_URL is a postgresql:// URL and psycopg2 is installed), so
+results survive restarts and are shared between workers. The TTL bounds how long a
+worker keeps serving a mapping that was invalidated through another worker.
+Persisted entries do not expire, so only resolved results (a canonical_exercise) are
+persisted; unresolved ones live in memory for the TTL and are retried after it.
+Concurrent lookups of the same key are coalesced so only one of them computes.
+The same store holds the learned_aliases table (see ai.learn_alias) and tombstones for
+learned aliases an operator invalidated (forgotten_aliases, see ai.forget_alias).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+NORMALIZE_CACHE_URL = os.getenv("NORMALIZE_CACHE_URL", "sqlite:///normalization_cache.db")
+NORMALIZE_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "10000"))
+NORMALIZE_CACHE_TTL = float(os.getenv("NORMALIZE_CACHE_TTL", "3600"))
+
+CREATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS normalization_cache ("
+    "key TEXT PRIMARY KEY, result TEXT NOT NULL, created_at DOUBLE PRECISION NOT NULL)"
+)
+
+# Aliases learned from LLM selections, replayed into the dictionary at startup
+CREATE_LEARNED_TABLE = (
+    "CREATE TABLE IF NOT EXISTS learned_aliases ("
+    "alias TEXT PRIMARY KEY, canonical TEXT NOT NULL, primary_muscle TEXT, secondary_muscle TEXT, "
+    "equipment TEXT, created_at DOUBLE PRECISION NOT NULL)"
+)
+
+# Learned aliases removed through invalidation, so every worker drops them from memory too.
+# An alias is in at most one of learned_aliases and forgotten_aliases.
+CREATE_FORGOTTEN_TABLE = (
+    "CREATE TABLE IF NOT EXISTS forgotten_aliases (alias TEXT PRIMARY KEY, forgotten_at DOUBLE PRECISION NOT NULL)"
+)
+
+LEARNED_COLUMNS = "alias, canonical, primary_muscle, secondary_muscle, equipment"
+
+
+class SQLiteStore:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(CREATE_TABLE)
+        self._conn.execute(CREATE_LEARNED_TABLE)
+        self._conn.execute(CREATE_FORGOTTEN_TABLE)
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM normalization_cache WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO normalization_cache (key, result, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM normalization_cache WHERE key = ?", (key,)).rowcount
+            self._conn.commit()
+        return deleted > 0
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM normalization_cache").fetchone()[0]
+
+    def add_learned(self, alias, canonical, primary_muscle, secondary_muscle, equipment) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR IGNORE INTO learned_aliases ({LEARNED_COLUMNS}, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (alias, canonical, primary_muscle, secondary_muscle, equipment, time.time()),
+            )
+            self._conn.execute("DELETE FROM forgotten_aliases WHERE alias = ?", (alias,))
+            self._conn.commit()
+
+    def learned(self) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(f"SELECT {LEARNED_COLUMNS} FROM learned_aliases ORDER BY created_at").fetchall()
+
+    def forget_learned(self, alias: str) -> bool:
+        """Delete a learned alias and leave a tombstone. Returns whether it was learned."""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM learned_aliases WHERE alias = ?", (alias,)).rowcount
+            self._conn.execute(
+                "INSERT OR REPLACE INTO forgotten_aliases (alias, forgotten_at) VALUES (?, ?)", (alias, time.time())
+            )
+            self._conn.commit()
+        return deleted > 0
+
+    def forgotten(self, since: float = 0.0) -> List[tuple]:
+        """(alias, forgotten_at) of tombstones newer than since."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT alias, forgotten_at FROM forgotten_aliases WHERE forgotten_at > ? ORDER BY forgotten_at", (since,)
+            ).fetchall()
+
+
+class PostgresStore:
+    def __init__(self, url: str):
+        from psycopg2.pool import ThreadedConnectionPool
+        self._pool = ThreadedConnectionPool(1, int(os.getenv("NORMALIZE_CACHE_POOL_SIZE", "4")), url)
+        self._execute(CREATE_TABLE)
+        self._execute(CREATE_LEARNED_TABLE)
+        self._execute(CREATE_FORGOTTEN_TABLE)
+
+    def _execute(self, sql, params=(), fetch=False):
+        conn = self._pool.getconn()
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute(sql, params)
+                if fetch == "all":
+                    return cur.fetchall()
+                if fetch:
+                    return cur.fetchone()
+                return cur.rowcount
+        finally:
+            self._pool.putconn(conn)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._execute("SELECT result FROM normalization_cache WHERE key = %s", (key,), fetch=True)
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        self._execute(
+            "INSERT INTO normalization_cache (key, result, created_at) VALUES (%s, %s, %s) "
+            "ON CONFLICT (key) DO UPDATE SET result = EXCLUDED.result, created_at = EXCLUDED.created_at",
+            (key, json.dumps(value), time.time()),
+        )
+
+    def delete(self, key: str) -> bool:
+        return self._execute("DELETE FROM normalization_cache WHERE key = %s", (key,)) > 0
+
+    def count(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM normalization_cache", fetch=True)[0]
+
+    def add_learned(self, alias, canonical, primary_muscle, secondary_muscle, equipment) -> None:
+        self._execute(
+            f"INSERT INTO learned_aliases ({LEARNED_COLUMNS}, created_at) VALUES (%s, %s, %s, %s, %s, %s) "
+            "ON CONFLICT (alias) DO NOTHING",
+            (alias, canonical, primary_muscle, secondary_muscle, equipment, time.time()),
+        )
+        self._execute("DELETE FROM forgotten_aliases WHERE alias = %s", (alias,))
+
+    def learned(self) -> List[tuple]:
+        return self._execute(f"SELECT {LEARNED_COLUMNS} FROM learned_aliases ORDER BY created_at", fetch="all")
+
+    def forget_learned(self, alias: str) -> bool:
+        deleted = self._execute("DELETE FROM learned_aliases WHERE alias = %s", (alias,))
+        self._execute(
+            "INSERT INTO forgotten_aliases (alias, forgotten_at) VALUES (%s, %s) "
+            "ON CONFLICT (alias) DO UPDATE SET forgotten_at = EXCLUDED.forgotten_at",
+            (alias, time.time()),
+        )
+        return deleted > 0
+
+    def forgotten(self, since: float = 0.0) -> List[tuple]:
+        return self._execute(
+            "SELECT alias, forgotten_at FROM forgotten_aliases WHERE forgotten_at > %s ORDER BY forgotten_at", (since,), fetch="all"
+        )
+
+
+def open_store(url: str):
+    """Persistent store for a cache URL; "memory" keeps the cache in-process only."""
+    if url == "memory":
+        return None
+    if url.startswith(("postgresql://", "postgres://")):
+        return PostgresStore(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported NORMALIZE_CACHE_URL: {url}")
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class NormalizationCache:
+    """
+    LRU + TTL in front of a persistent store, with single-flight computation per key.
+    store: object with get/put/delete/count (see SQLiteStore), or None for a memory-only cache
+    """
+
+    def __init__(self, store=None, max_entries: int = NORMALIZE_CACHE_SIZE, ttl: float = NORMALIZE_CACHE_TTL):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "store_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expirations": 0}
+
+    def _get_memory(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._stats["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_memory(self, key: str, value) -> None:
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get_or_compute(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Cached value for key, computing it with compute() on a miss.
+        Concurrent callers for the same key wait for the first one's result (or error).
+        """
+        with self._lock:
+            value = self._get_memory(key)
+            if value is not None:
+                self._stats["hits"] += 1
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            value = self.store.get(key) if self.store is not None else None
+            if value is not None:
+                stat = "store_hits"
+            else:
+                stat = "misses"
+                value = compute()
+                if self.store is not None and value.get("canonical_exercise"):
+                    self.store.put(key, value)
+            with self._lock:
+                self._stats[stat] += 1
+                self._put_memory(key, value)
+            flight.result = value
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def invalidate(self, key: str) -> bool:
+        """Drop key from memory and the persistent store. Returns whether it was cached anywhere."""
+        with self._lock:
+            in_memory = self._entries.pop(key, None) is not None
+        in_store = self.store.delete(key) if self.store is not None else False
+        return in_memory or in_store
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["store_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["ttl"] = self.ttl
+        stats["store_size"] = self.store.count() if self.store is not None else None
+        return stats
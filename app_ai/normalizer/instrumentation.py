@@ -0,0 +1,24 @@
+"""
+Timing hook for the normalization stages.
+
+The normalization stages do not depend on Prometheus: the host process (the AI service or
+the backend) plugs its span context manager in with set_span (normalizer.metrics.install in
+the AI service, get_normalizer in the backend), so stage timings land in that process's
+/metrics and X-Debug-Timing header. Without a hook, spans cost nothing.
+"""
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Optional
+
+_span_factory: Optional[Callable] = None
+
+
+def set_span(factory: Optional[Callable]) -> None:
+    """Use factory(name) as the context manager timing each normalization stage (None disables)."""
+    global _span_factory
+    _span_factory = factory
+
+
+@contextmanager
+def span(name: str):
+    with (_span_factory(name) if _span_factory is not None else nullcontext()):
+        yield
@@ -0,0 +1,34 @@
+"""
+Seed learned exercises from the backend's exercises table, so names the backend already
+stores resolve in the dictionary lookup instead of going to the LLM again.
+"""
+import os
+import sqlite3
+from typing import List, Tuple
+
+# The backend's DATABASE_URL (SQLAlchemy style URLs are accepted)
+EXERCISE_SEED_URL = os.getenv("EXERCISE_SEED_URL")
+
+SEED_QUERY = "SELECT name, primary_muscle, secondary_muscle, equipment FROM exercises ORDER BY id"
+
+
+def read_backend_exercises(url: str) -> List[Tuple[str, str, str, str]]:
+    """(name, primary_muscle, secondary_muscle, equipment) for every exercise in the backend database."""
+    scheme, _, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect == "sqlite":
+        conn = sqlite3.connect(f"file:{rest[1:]}?mode=ro", uri=True)
+        try:
+            return conn.execute(SEED_QUERY).fetchall()
+        finally:
+            conn.close()
+    if dialect in ("postgresql", "postgres"):
+        import psycopg2
+        conn = psycopg2.connect(f"postgresql://{rest}")
+        try:
+            with conn.cursor() as cur:
+                cur.execute(SEED_QUERY)
+                return cur.fetchall()
+        finally:
+            conn.close()
+    raise ValueError(f"Unsupported EXERCISE_SEED_URL: {url}")
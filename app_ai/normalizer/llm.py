@@ -0,0 +1,218 @@
+"""
+Shared LLM client for exercise selection.
+
+Requests run on one background event loop with a long-lived, pooled HTTP client, so
+sync callers (FastAPI threadpool workers, the normalization cache) and async callers
+share connections. Every call has a deadline, retries transient failures with jittered
+exponential backoff and goes through a circuit breaker; callers get LLMUnavailable
+when the LLM is slow or down and can fall back without waiting.
+
+LLM_BACKEND=stub swaps in a local backend with a fixed latency (LLM_STUB_LATENCY) so
+load tests and CI can exercise the full normalization path offline.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "8"))  # seconds per attempt
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "20"))  # seconds per normalization, across attempts and prompts
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0.05"))
+
+
+class LLMUnavailable(RuntimeError):
+    """The LLM could not answer before the deadline, or the circuit breaker is open."""
+
+
+class OpenAIBackend:
+    def __init__(self, model: str = LLM_MODEL, pool_size: int = LLM_POOL_SIZE):
+        self.model = model
+        self.pool_size = pool_size
+        self._client = None
+
+    def _get_client(self):
+        # Created on first use, from the client's event loop
+        if self._client is None:
+            import httpx
+            import openai
+            self._client = openai.AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                ),
+            )
+        return self._client
+
+    async def chat(self, prompt: str, max_tokens: int) -> str:
+        response = await self._get_client().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=0.2,
+        )
+        return response.choices[0].message.content
+
+
+class StubBackend:
+    """
+    Offline backend answering the prompts of ai.llm_selector after a fixed delay:
+    candidates keep their retrieval order and the top candidate is accepted.
+    """
+
+    def __init__(self, latency: float = LLM_STUB_LATENCY):
+        self.latency = latency
+
+    async def chat(self, prompt: str, max_tokens: int) -> str:
+        await asyncio.sleep(self.latency)
+        ranking = re.search(r"rank the following candidate names by relevance: (\[.*?\])\. ", prompt)
+        if ranking:
+            return json.dumps(list(range(len(json.loads(ranking.group(1))))))
+        selected = re.search(r"the selected candidate (\{.*?\}), ", prompt)
+        candidate = json.loads(selected.group(1)) if selected else None
+        if not candidate:
+            return json.dumps({"canonical_exercise": None, "primary_muscle": None, "secondary_muscle": None, "equipment": None})
+        return json.dumps({
+            "canonical_exercise": candidate.get("name"),
+            "primary_muscle": candidate.get("primary_muscle"),
+            "secondary_muscle": candidate.get("secondary_muscle"),
+            "equipment": candidate.get("equipment"),
+        })
+
+
+class CircuitBreaker:
+    """Opens after threshold consecutive failures; after cooldown lets one trial call through."""
+
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            self._trial_running = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+def _retryable(exc: Exception) -> bool:
+    """Timeouts, connection errors, rate limits and 5xx are retried; other 4xx are not."""
+    status = getattr(exc, "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+class LLMClient:
+    def __init__(self, backend=None, timeout: float = LLM_TIMEOUT, max_retries: int = LLM_MAX_RETRIES,
+                 backoff: float = LLM_RETRY_BACKOFF, breaker: Optional[CircuitBreaker] = None):
+        self.backend = backend if backend is not None else make_backend(LLM_BACKEND)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self._stats = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-client", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    async def _complete(self, prompt: str, max_tokens: int, deadline: float) -> str:
+        self._stats["calls"] += 1
+        if not self.breaker.allow():
+            self._stats["rejected"] += 1
+            raise LLMUnavailable("LLM circuit breaker is open")
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if attempt:
+                self._stats["retries"] += 1
+            self._stats["attempts"] += 1
+            try:
+                content = await asyncio.wait_for(self.backend.chat(prompt, max_tokens), min(self.timeout, remaining))
+                self.breaker.record(True)
+                return content
+            except Exception as e:
+                last_error = e
+                if not _retryable(e):
+                    break
+            # Full jitter: sleep a random fraction of the exponential backoff, within the deadline
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+        self._stats["failures"] += 1
+        self.breaker.record(False)
+        raise LLMUnavailable(f"LLM call failed: {last_error!r}" if last_error else "LLM deadline exceeded")
+
+    def complete(self, prompt: str, max_tokens: int = 50, deadline: Optional[float] = None) -> str:
+        """
+        Blocking completion for sync callers. Must not be called from the client's own loop.
+        deadline: absolute time.monotonic() by which to give up, default LLM_DEADLINE from now
+        """
+        deadline = deadline if deadline is not None else time.monotonic() + LLM_DEADLINE
+        future = asyncio.run_coroutine_threadsafe(self._complete(prompt, max_tokens, deadline), self._get_loop())
+        return future.result()
+
+    async def acomplete(self, prompt: str, max_tokens: int = 50, deadline: Optional[float] = None) -> str:
+        """Completion for async callers on any other event loop."""
+        deadline = deadline if deadline is not None else time.monotonic() + LLM_DEADLINE
+        future = asyncio.run_coroutine_threadsafe(self._complete(prompt, max_tokens, deadline), self._get_loop())
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "backend": type(self.backend).__name__,
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        }
+
+
+def make_backend(name: str):
+    if name == "stub":
+        return StubBackend()
+    if name == "openai":
+        return OpenAIBackend()
+    raise ValueError(f"Unknown LLM_BACKEND: {name}")
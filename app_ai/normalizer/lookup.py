@@ -0,0 +1,180 @@
+"""
+Precomputed exercise name lookup: exact aliases, cleaned aliases and typo-tolerant
+matches through a SymSpell-style deletion index. Everything is built once so a lookup
+is a handful of dict probes instead of a scan over the exercise dictionary.
+"""
+import re
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+ABBREVIATIONS = {
+    "db": "dumbbell",
+    "dbs": "dumbbell",
+    "bb": "barbell",
+    "kb": "kettlebell",
+}
+
+# Words that end in "s" but are not plurals
+SINGULAR_WORDS = {"press", "biceps", "triceps", "abs", "glutes", "lats", "quads", "delts", "traps", "calves"}
+
+MAX_EDIT_DISTANCE = 2
+
+
+def _singular(token: str) -> str:
+    if token in SINGULAR_WORDS or len(token) <= 3 or not token.endswith("s"):
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("sses", "ches", "shes", "xes")):
+        return token[:-2]
+    if token.endswith(("ss", "us", "is")):
+        return token
+    return token[:-1]
+
+
+def clean_exercise_name(name: str) -> str:
+    """
+    Canonical form used for lookups: lowercase, punctuation to spaces, collapsed
+    whitespace, expanded equipment abbreviations and singular words.
+    """
+    tokens = re.sub(r"[^a-z0-9]+", " ", name.lower()).split()
+    return " ".join(_singular(ABBREVIATIONS.get(t, t)) for t in tokens)
+
+
+def max_distance_for(text: str) -> int:
+    """Allowed typo distance grows with length so short names do not match everything."""
+    if len(text) < 4:
+        return 0
+    if len(text) < 8:
+        return 1
+    return MAX_EDIT_DISTANCE
+
+
+def _deletes(text: str, distance: int) -> Set[str]:
+    """All strings reachable from text by deleting up to distance characters."""
+    results = {text}
+    frontier = {text}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (Levenshtein plus transpositions), capped at limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def token_local(a: str, b: str) -> bool:
+    """
+    Whether b is a at most one edit per word away, each in a word long enough to allow one.
+    Two edits inside one short word ("rack" -> "face") or a change in the number of words
+    replace the word rather than fix a typo.
+    """
+    tokens_a, tokens_b = a.split(), b.split()
+    if len(tokens_a) != len(tokens_b):
+        return False
+    for x, y in zip(tokens_a, tokens_b):
+        if x == y:
+            continue
+        # Cleaning may have dropped an "s" that belonged to the typo ("bench pres" -> "bench pre")
+        if not any(max_distance_for(word) and edit_distance(word, y, 1) <= 1 for word in (x, x + "s")):
+            return False
+    return True
+
+
+class ExerciseLookup:
+    """
+    Exact, cleaned and fuzzy alias lookup.
+    entries: (alias, canonical) pairs in priority order; the first canonical registered
+    for an alias wins, so canonical names should come before their aliases.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        self.exact: Dict[str, str] = {}
+        self.cleaned: Dict[str, str] = {}
+        self.deletes: Dict[str, Set[str]] = {}
+        for alias, canonical in entries:
+            self.add(alias, canonical)
+
+    def add(self, alias: str, canonical: str) -> None:
+        self.exact.setdefault(alias.strip().lower(), canonical)
+        key = clean_exercise_name(alias)
+        if not key or key in self.cleaned:
+            return
+        self.cleaned[key] = canonical
+        for variant in _deletes(key, max_distance_for(key)):
+            self.deletes.setdefault(variant, set()).add(key)
+
+    def remove(self, alias: str) -> None:
+        """
+        Undo add(alias). Its cleaned form is kept while another exact alias still cleans
+        to it, so removing a learned spelling never drops a dictionary entry.
+        """
+        self.exact.pop(alias.strip().lower(), None)
+        key = clean_exercise_name(alias)
+        if key not in self.cleaned or any(clean_exercise_name(a) == key for a in self.exact):
+            return
+        del self.cleaned[key]
+        for variant in _deletes(key, max_distance_for(key)):
+            keys = self.deletes.get(variant)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.deletes[variant]
+
+    def fuzzy(self, key: str) -> Optional[str]:
+        """
+        Closest cleaned alias within the allowed edit distance, None if absent or ambiguous.
+        Matches at distance 2 must be token-local (see token_local); the others go on to
+        retrieval, which ranks them with every other candidate.
+        """
+        limit = max_distance_for(key)
+        if limit == 0:
+            return None
+        candidates = set()
+        for variant in _deletes(key, limit):
+            candidates |= self.deletes.get(variant, set())
+        best_distance = limit + 1
+        best = set()
+        for candidate in candidates:
+            distance = edit_distance(key, candidate, limit)
+            if distance > 1 and not token_local(key, candidate):
+                continue
+            if distance < best_distance:
+                best_distance, best = distance, {self.cleaned[candidate]}
+            elif distance == best_distance:
+                best.add(self.cleaned[candidate])
+        if best_distance <= limit and len(best) == 1:
+            return best.pop()
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {"exact": len(self.exact), "cleaned": len(self.cleaned), "deletes": len(self.deletes)}
+
+    def lookup(self, raw: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return (canonical, stage) where stage is "exact", "cleaned" or "fuzzy", or (None, None)."""
+        canonical = self.exact.get(raw.strip().lower())
+        if canonical:
+            return canonical, "exact"
+        key = clean_exercise_name(raw)
+        canonical = self.cleaned.get(key)
+        if canonical:
+            return canonical, "cleaned"
+        canonical = self.fuzzy(key)
+        if canonical:
+            return canonical, "fuzzy"
+        return None, None
@@ -0,0 +1,141 @@
+"""
+Request instrumentation for the AI service, exported at GET /metrics.
+
+Route latency histograms plus span timers (normalization stages, cache, serialization),
+so a slow request can be attributed to one of them. With DEBUG_TIMING set, every response
+also carries an X-Debug-Timing header with the request's totals. Extra counters plug in
+through install(): a RequestStats subclass and an on_finish hook. The backend keeps its
+own middleware (app/metrics.py), since it has to start without app_ai/ on disk.
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from normalizer import instrumentation
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Add an X-Debug-Timing header (total and span timings, plus the service's own counters) to every response
+DEBUG_TIMING = os.getenv("DEBUG_TIMING", "").lower() in ("1", "true", "yes")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ["method", "route", "status"]
+)
+SPAN_SECONDS = Histogram(
+    "span_duration_seconds", "Duration of instrumented code spans", ["span"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+class RequestStats:
+    """Span totals for the request being served, shared with its worker threads through a context variable."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def timing_parts(self) -> list:
+        """name=value items of the X-Debug-Timing header after the total; extended by subclasses."""
+        return [f"{name}={s * 1000:.1f}ms" for name, s in self.spans.items()]
+
+    def timing_header(self) -> str:
+        total = time.perf_counter() - self.started
+        return "; ".join([f"total={total * 1000:.1f}ms"] + self.timing_parts())
+
+
+_request_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    """The RequestStats of the request being served, or None outside a request."""
+    return _request_stats.get()
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time a block into span_duration_seconds and, inside a request, its X-Debug-Timing
+    header. Spans of concurrent work (e.g. normalizing several names) add up, so their
+    total can exceed the request time.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_SECONDS.labels(name).observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.add_span(name, elapsed)
+
+
+def route_label(scope) -> str:
+    # The route template, not the raw path, so path parameters do not explode the label set
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording route latency and the optional X-Debug-Timing header.
+    stats_factory: RequestStats (sub)class created per request
+    on_finish: optional on_finish(scope, route, stats) called after each request
+    """
+
+    def __init__(self, app, stats_factory: Callable[[], RequestStats] = RequestStats, on_finish: Optional[Callable] = None):
+        self.app = app
+        self.stats_factory = stats_factory
+        self.on_finish = on_finish
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+        stats = self.stats_factory()
+        token = _request_stats.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if DEBUG_TIMING:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-debug-timing", stats.timing_header().encode("latin-1"))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            route = route_label(scope)
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(time.perf_counter() - stats.started)
+            if self.on_finish is not None:
+                self.on_finish(scope, route, stats)
+
+
+def metrics_endpoint(request: Request) -> Response:
+    """Prometheus text exposition. With PROMETHEUS_MULTIPROC_DIR set, aggregates all worker processes."""
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def install(app, stats_factory: Callable[[], RequestStats] = RequestStats, on_finish: Optional[Callable] = None) -> None:
+    """Add the metrics middleware and GET /metrics to app, and time the normalizer's stages with span."""
+    instrumentation.set_span(span)
+    app.add_middleware(MetricsMiddleware, stats_factory=stats_factory, on_finish=on_finish)
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,185 @@
+"""
+Sparse cosine retrieval over exercise names and aliases.
+
+Names are embedded as L2-normalized, hashed character n-gram TF-IDF vectors, kept as
+a CSR matrix, and scored with one sparse matrix product per batch of queries. Only the
+n-grams a query shares with an alias contribute, so memory grows with the number of
+stored n-grams rather than aliases x vocabulary, and typos still overlap heavily.
+Aliases learned at runtime are appended to a small growable segment next to the
+(possibly memory-mapped) base matrix, without refitting or rebuilding it, and removed
+ones are masked out of search results.
+"""
+import threading
+import zlib
+from collections import Counter
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NGRAM_RANGE = (2, 4)
+N_FEATURES = 2 ** 18
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> Iterator[str]:
+    """
+    Character n-grams of each space-padded word, as scikit-learn's char_wb analyzer
+    produces them (words shorter than n contribute themselves once).
+    """
+    low, high = ngram_range
+    for word in text.lower().split():
+        padded = f" {word} "
+        for n in range(low, high + 1):
+            for i in range(max(len(padded) - n + 1, 1)):
+                yield padded[i:i + n]
+            if len(padded) <= n:
+                break
+
+
+def _column(gram: str, n_features: int) -> int:
+    # crc32 rather than hash(), which is salted per process
+    return zlib.crc32(gram.encode("utf-8")) % n_features
+
+
+class HashingNgramVectorizer:
+    """
+    L2-normalized char_wb n-gram TF-IDF over a fixed number of hashed columns.
+    Any string can be embedded without a vocabulary, so new aliases join an existing
+    index as-is. IDF weights are fitted once over the base aliases and then frozen;
+    n-grams never seen at fit time get the highest weight.
+    """
+
+    def __init__(self, n_features: int = N_FEATURES, idf: Optional[np.ndarray] = None):
+        self.n_features = n_features
+        self.idf = idf
+
+    def fit(self, texts: Sequence[str]) -> "HashingNgramVectorizer":
+        df = np.zeros(self.n_features, dtype=np.float64)
+        for text in texts:
+            df[list({_column(g, self.n_features) for g in char_ngrams(text)})] += 1
+        n = len(texts)
+        self.idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    def transform(self, texts: Sequence[str]):
+        import scipy.sparse as sp
+        indptr = [0]
+        indices = []
+        data = []
+        for text in texts:
+            counts = Counter(_column(g, self.n_features) for g in char_ngrams(text))
+            columns = sorted(counts)
+            weights = np.array([counts[c] for c in columns], dtype=np.float32) * self.idf[columns]
+            norm = np.linalg.norm(weights)
+            indices.extend(columns)
+            data.extend((weights / norm) if norm else weights)
+            indptr.append(len(indices))
+        return sp.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int32)),
+            shape=(len(texts), self.n_features),
+        )
+
+
+class _GrowableRows:
+    """Append-only CSR rows with amortized O(1) appends; snapshots stay valid while appending."""
+
+    def __init__(self, n_features: int, capacity: int = 1024):
+        self.n_features = n_features
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.indices = np.zeros(capacity, dtype=np.int32)
+        self.indptr = [0]
+
+    def append(self, row) -> None:
+        start = self.indptr[-1]
+        end = start + row.nnz
+        if end > len(self.data):
+            capacity = max(end, 2 * len(self.data))
+            self.data = np.concatenate([self.data, np.zeros(capacity - len(self.data), dtype=np.float32)])
+            self.indices = np.concatenate([self.indices, np.zeros(capacity - len(self.indices), dtype=np.int32)])
+        self.data[start:end] = row.data
+        self.indices[start:end] = row.indices
+        self.indptr.append(end)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def snapshot(self):
+        import scipy.sparse as sp
+        indptr = np.array(self.indptr, dtype=np.int32)
+        end = indptr[-1]
+        return sp.csr_matrix((self.data[:end], self.indices[:end], indptr), shape=(len(indptr) - 1, self.n_features))
+
+
+def top_k_rows(scores, k: int) -> List[List[Tuple[int, float]]]:
+    """(column, score) pairs of the k highest nonzero scores in each row of a CSR matrix, best first."""
+    results = []
+    for i in range(scores.shape[0]):
+        start, end = scores.indptr[i], scores.indptr[i + 1]
+        data = scores.data[start:end]
+        columns = scores.indices[start:end]
+        if len(data) > k:
+            keep = np.argpartition(-data, k - 1)[:k]
+            data, columns = data[keep], columns[keep]
+        # Highest score first, lower column (earlier alias) first among ties
+        order = np.lexsort((columns, -data))
+        results.append([(int(columns[j]), float(data[j])) for j in order])
+    return results
+
+
+class SparseIndex:
+    """
+    Cosine similarity index over a list of strings.
+    labels: the indexed strings; search results refer to them by position
+    vectorizer, matrix_t: a fitted vectorizer and the matching transposed label matrix,
+    as loaded from prebuilt artifacts; fitted over labels when omitted
+    """
+
+    def __init__(self, labels: Sequence[str], vectorizer=None, matrix_t=None):
+        self.labels = list(labels)
+        self.vectorizer = vectorizer if vectorizer is not None else HashingNgramVectorizer().fit(self.labels)
+        if matrix_t is None:
+            # Stored transposed (features x labels) so a batch of queries is one CSR x CSR product
+            matrix_t = self.vectorizer.transform(self.labels).T.tocsr()
+        self.matrix_t = matrix_t
+        self.base_size = len(self.labels)
+        self._added = _GrowableRows(self.vectorizer.n_features)
+        self._removed = set()
+        self._lock = threading.Lock()
+
+    def add(self, label: str) -> int:
+        """Index one more string, in time independent of the index size. Returns its position."""
+        row = self.vectorizer.transform([label])
+        with self._lock:
+            self._added.append(row)
+            self.labels.append(label)
+            return len(self.labels) - 1
+
+    def remove(self, label: str) -> int:
+        """Stop returning label from searches (its rows stay, masked). Returns the number of rows masked."""
+        with self._lock:
+            positions = {i for i, existing in enumerate(self.labels) if existing == label} - self._removed
+            self._removed |= positions
+        return len(positions)
+
+    def embed(self, texts: Sequence[str]):
+        return self.vectorizer.transform(list(texts))
+
+    def search(self, queries: Sequence[str], top_k: int = 5) -> List[List[Tuple[int, float]]]:
+        """Top_k (label position, cosine similarity) pairs per query, best first."""
+        if not queries:
+            return []
+        vectors = self.embed(queries)
+        scores = vectors @ self.matrix_t
+        if len(self._added):
+            import scipy.sparse as sp
+            with self._lock:
+                added = self._added.snapshot()
+            scores = sp.hstack([scores, vectors @ added.T], format="csr")
+        removed = self._removed
+        if not removed:
+            return top_k_rows(scores, top_k)
+        rows = top_k_rows(scores, top_k + len(removed))
+        return [[hit for hit in row if hit[0] not in removed][:top_k] for row in rows]
+
+    def nbytes(self) -> int:
+        m = self.matrix_t
+        return m.data.nbytes + m.indices.nbytes + m.indptr.nbytes + self._added.data.nbytes + self._added.indices.nbytes
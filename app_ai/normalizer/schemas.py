@@ -0,0 +1,21 @@
+"""Request models shared by the AI service's /query and the backend's /workouts/ingest."""
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel
+
+
+class WorkoutSet(BaseModel):
+    weight: float = None
+    reps: int = None
+    note: str = None
+
+
+class WorkoutExercise(BaseModel):
+    name: str
+    sets: List[WorkoutSet]
+
+
+class QueryRequest(BaseModel):
+    query: List[WorkoutExercise]
+    date: datetime
@@ -0,0 +1,83 @@
+"""
+Measure worker memory with and without the shared, memory-mapped retrieval index.
+
+    python scripts/bench_memory.py [--workers 1 4 16]
+
+Starts each number of workers the way `uvicorn --workers N` does (fresh interpreters each
+importing the app), warms them with a /normalize that needs retrieval, then reads
+/proc/<pid>/smaps_rollup. RSS counts shared pages in every worker that maps them; PSS
+splits them between the workers, so the PSS sum is the memory the workers really use
+together. Linux only. Uses the stub LLM backend and an in-memory normalization cache.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = """
+import sys
+from app.main import app
+from fastapi.testclient import TestClient
+client = TestClient(app)
+response = client.post("/normalize", params={"raw_input": "zottman curl"})
+assert response.status_code == 200, response.text
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def smaps_rollup(pid):
+    """Rss, Pss, Shared_* and Private_* of a process in MiB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return values
+
+
+def measure(workers, artifact_dir):
+    env = dict(os.environ, ARTIFACT_DIR=artifact_dir, LLM_BACKEND="stub", LLM_STUB_LATENCY="0", NORMALIZE_CACHE_URL="memory")
+    procs = [
+        subprocess.Popen([sys.executable, "-c", CHILD], cwd=APP_DIR, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    try:
+        for proc in procs:
+            if proc.stdout.readline().strip() != "ready":
+                raise RuntimeError("worker failed to start")
+        stats = [smaps_rollup(proc.pid) for proc in procs]
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+    return {
+        "rss": statistics.median(s["Rss"] for s in stats),
+        "private": statistics.median(s["Private_Clean"] + s["Private_Dirty"] for s in stats),
+        "rss_total": sum(s["Rss"] for s in stats),
+        "pss_total": sum(s["Pss"] for s in stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as prebuilt, tempfile.TemporaryDirectory() as empty:
+        subprocess.run([sys.executable, "-m", "normalizer.artifacts", "publish", "--dir", prebuilt], cwd=APP_DIR, check=True,
+                       env=dict(os.environ, NORMALIZE_CACHE_URL="memory"), stdout=subprocess.DEVNULL)
+        print(f"{'mode':<12} {'workers':>7} {'RSS/worker':>11} {'private/worker':>15} {'RSS total':>10} {'PSS total':>10}  (MiB)")
+        for workers in args.workers:
+            for mode, directory in (("in-process", empty), ("published", prebuilt)):
+                r = measure(workers, directory)
+                print(f"{mode:<12} {workers:>7} {r['rss']:>11.1f} {r['private']:>15.1f} {r['rss_total']:>10.1f} {r['pss_total']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compare the sparse char n-gram index (app/retrieval.py) with the previous dense word
+TF-IDF + FAISS IndexFlatL2 retrieval as the alias list grows.
+
+    python scripts/bench_retrieval.py [--sizes 1000,10000,100000] [--queries 1000] [--top-k 20]
+
+Aliases beyond the built-in dictionary are synthesized by prefixing real aliases with
+modifiers; queries are aliases with one random typo. Reports index memory, build time,
+per-query p50/p99 latency and batched throughput. The dense baseline needs faiss-cpu
+and scikit-learn, which the service itself no longer depends on.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("NORMALIZE_CACHE_URL", "memory")
+from normalizer.ai import ALL_EXERCISE_STRINGS  # noqa: E402
+from normalizer.retrieval import SparseIndex  # noqa: E402
+
+MODIFIERS = [
+    "incline", "decline", "flat", "seated", "standing", "kneeling", "lying", "single arm", "single leg",
+    "close grip", "wide grip", "neutral grip", "reverse grip", "paused", "tempo", "deficit", "banded",
+    "chained", "smith", "cable", "machine", "dumbbell", "barbell", "kettlebell", "landmine", "trap bar",
+    "safety bar", "cambered bar", "swiss bar", "ez bar", "unilateral", "alternating", "iso", "partial",
+    "heavy", "light", "speed", "pin", "box", "floor",
+]
+
+
+def synthetic_aliases(n, seed=0):
+    rnd = random.Random(seed)
+    base = sorted(set(ALL_EXERCISE_STRINGS))
+    aliases = list(base)
+    seen = set(aliases)
+    while len(aliases) < n:
+        words = rnd.sample(MODIFIERS, rnd.randint(1, 2))
+        alias = " ".join(words + [rnd.choice(base)])
+        if alias not in seen:
+            seen.add(alias)
+            aliases.append(alias)
+    return aliases[:n]
+
+
+def typo(text, rnd):
+    i = rnd.randrange(len(text))
+    op = rnd.choice(("drop", "swap", "replace"))
+    if op == "drop":
+        return text[:i] + text[i + 1:]
+    if op == "swap" and i < len(text) - 1:
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text[:i] + rnd.choice("abcdefghijklmnopqrstuvwxyz") + text[i + 1:]
+
+
+def percentiles(timings_ms):
+    return np.percentile(timings_ms, 50), np.percentile(timings_ms, 99)
+
+
+def bench_sparse(aliases, queries, top_k):
+    started = time.perf_counter()
+    index = SparseIndex(aliases)
+    build = time.perf_counter() - started
+    timings = []
+    for q in queries:
+        started = time.perf_counter()
+        index.search([q], top_k)
+        timings.append((time.perf_counter() - started) * 1000)
+    started = time.perf_counter()
+    index.search(queries, top_k)
+    batched = time.perf_counter() - started
+    return index.nbytes(), build, percentiles(timings), batched
+
+
+def bench_dense(aliases, queries, top_k):
+    import faiss
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    started = time.perf_counter()
+    vectorizer = TfidfVectorizer().fit(aliases)
+    embeddings = vectorizer.transform(aliases).toarray().astype("float32")
+    index = faiss.IndexFlatL2(embeddings.shape[1])
+    index.add(embeddings)
+    build = time.perf_counter() - started
+    timings = []
+    for q in queries:
+        started = time.perf_counter()
+        index.search(vectorizer.transform([q]).toarray().astype("float32"), top_k)
+        timings.append((time.perf_counter() - started) * 1000)
+    started = time.perf_counter()
+    index.search(vectorizer.transform(queries).toarray().astype("float32"), top_k)
+    batched = time.perf_counter() - started
+    # The embeddings array and the flat index each hold a full copy
+    return embeddings.nbytes + index.ntotal * index.d * 4, build, percentiles(timings), batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--skip-dense", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'aliases':>8} {'index':<7} {'memory MB':>10} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} {'batch q/s':>10}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        aliases = synthetic_aliases(n)
+        rnd = random.Random(1)
+        queries = [typo(rnd.choice(aliases), rnd) for _ in range(args.queries)]
+        runs = [("sparse", bench_sparse)]
+        if not args.skip_dense:
+            try:
+                import faiss  # noqa: F401
+                runs.append(("dense", bench_dense))
+            except ImportError:
+                print("faiss-cpu not installed, skipping the dense baseline")
+        for name, bench in runs:
+            nbytes, build, (p50, p99), batched = bench(aliases, queries, args.top_k)
+            print(f"{n:>8} {name:<7} {nbytes / 1e6:>10.1f} {build:>8.2f} {p50:>8.3f} {p99:>8.3f} {len(queries) / batched:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
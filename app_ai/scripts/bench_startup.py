@@ -0,0 +1,54 @@
+"""
+Measure cold start: importing the service and serving the first /normalize that needs
+retrieval, with and without prebuilt artifacts.
+
+    python scripts/bench_startup.py [--runs 5]
+
+Each run is a fresh interpreter using the stub LLM backend and an in-memory
+normalization cache, so only startup and index loading are measured.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+from app.main import app
+from fastapi.testclient import TestClient
+imported = time.perf_counter()
+response = TestClient(app).post("/normalize", params={"raw_input": "zottman curl"})
+assert response.status_code == 200, response.text
+done = time.perf_counter()
+print(json.dumps({"import": imported - started, "first_normalize": done - imported, "total": done - started}))
+"""
+
+
+def run_child(artifact_dir):
+    env = dict(os.environ, ARTIFACT_DIR=artifact_dir, LLM_BACKEND="stub", LLM_STUB_LATENCY="0", NORMALIZE_CACHE_URL="memory")
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=APP_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as prebuilt, tempfile.TemporaryDirectory() as empty:
+        subprocess.run([sys.executable, "-m", "normalizer.artifacts", "build", "--dir", prebuilt], cwd=APP_DIR, check=True)
+        print(f"{'mode':<12} {'import s':>9} {'first /normalize s':>19} {'total s':>8}  (median of {args.runs})")
+        for mode, directory in (("in-process", empty), ("artifacts", prebuilt)):
+            runs = [run_child(directory) for _ in range(args.runs)]
+            medians = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+            print(f"{mode:<12} {medians['import']:>9.3f} {medians['first_normalize']:>19.3f} {medians['total']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+# Test setup: the normalizer reads its settings at import, so point it at throwaway state first
+import os
+import sys
+import tempfile
+
+_state = tempfile.mkdtemp(prefix="normalizer-tests-")
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("LLM_STUB_LATENCY", "0")
+os.environ.setdefault("NORMALIZE_CACHE_URL", "sqlite:///" + os.path.join(_state, "normalization_cache.db"))
+os.environ.setdefault("ARTIFACT_DIR", os.path.join(_state, "artifacts"))
+os.environ.setdefault("ARTIFACT_RELOAD_SECONDS", "0")
+os.environ.pop("EXERCISE_SEED_URL", None)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+
+import normalizer.ai as ai
+from normalizer import artifacts
+from normalizer.ai import ALL_EXERCISE_STRINGS
+
+
+def build(monkeypatch, directory, *flags):
+    monkeypatch.setattr(sys, "argv", ["artifacts", "build", "--dir", str(directory), *flags])
+    artifacts.main()
+
+
+def test_build_skips_an_existing_build(tmp_path, monkeypatch, capsys):
+    build(monkeypatch, tmp_path)
+    assert "Wrote" in capsys.readouterr().out
+    assert artifacts.load_artifacts(ALL_EXERCISE_STRINGS, str(tmp_path)) is not None
+
+    build(monkeypatch, tmp_path)
+    assert "up to date" in capsys.readouterr().out
+
+
+def test_forced_build_replaces_the_existing_files(tmp_path, monkeypatch, capsys):
+    build(monkeypatch, tmp_path)
+    directory = tmp_path / artifacts.artifact_version(ALL_EXERCISE_STRINGS)
+    # A stale build under the same version, e.g. from before a feature change
+    (directory / "stale.npy").write_bytes(b"")
+    (directory / "idf.npy").write_bytes(b"corrupt")
+
+    build(monkeypatch, tmp_path, "--force")
+    assert "Wrote" in capsys.readouterr().out
+    assert not (directory / "stale.npy").exists()
+    assert artifacts.load_artifacts(ALL_EXERCISE_STRINGS, str(tmp_path)) is not None
+    assert sorted(p.name for p in tmp_path.iterdir()) == [directory.name]
+
+
+@pytest.fixture
+def published():
+    """Publish into the workers' ARTIFACT_DIR; afterwards go back to the unpublished index."""
+    yield artifacts.ARTIFACT_DIR
+    os.remove(os.path.join(artifacts.ARTIFACT_DIR, artifacts.CURRENT))
+    ai._exercise_index = None
+    ai._index_version = None
+
+
+def swap(monkeypatch):
+    """Let this worker check for a new published index now."""
+    monkeypatch.setattr(ai, "ARTIFACT_RELOAD_SECONDS", 1e-9)
+    monkeypatch.setattr(ai, "_index_checked_at", 0.0)
+    return ai.get_exercise_index()
+
+
+def test_publish_reaches_running_workers(published, monkeypatch):
+    ai.get_exercise_index()
+    swaps = ai.INDEX_SWAPS
+    # Learned by another worker, so far only in the shared store
+    ai.NORMALIZATION_STORE.add_learned("spoto press", "bench press", "Chest", None, "Barbell")
+    first = artifacts._publish_learned(published)
+    assert first is not None
+    assert "spoto press" in swap(monkeypatch).labels
+    assert ai.index_stats()["published_version"] == first
+    assert ai.INDEX_SWAPS == swaps + 1
+
+    # One alias forgotten and another learned: the same count, but different labels
+    ai.forget_alias("spoto press")
+    ai.NORMALIZATION_STORE.add_learned("larsen press", "bench press", "Chest", None, "Barbell")
+    second = artifacts._publish_learned(published)
+    assert second not in (None, first)
+    index = swap(monkeypatch)
+    assert "larsen press" in index.labels and "spoto press" not in index.labels
+    assert ai.EXERCISE_LOOKUP.lookup("larsen press") == ("bench press", "exact")
+    assert ai.INDEX_SWAPS == swaps + 2
+
+    # Nothing changed since
+    assert artifacts._publish_learned(published) is None
+    ai.forget_alias("larsen press")
@@ -0,0 +1,149 @@
+import threading
+
+import pytest
+
+from normalizer import cache as cache_module
+from normalizer.cache import NormalizationCache, SQLiteStore
+
+RESOLVED = {"canonical_exercise": "bench press", "primary_muscle": "chest", "secondary_muscle": None, "equipment": "barbell"}
+UNRESOLVED = {"canonical_exercise": None, "primary_muscle": None, "secondary_muscle": None, "equipment": None}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteStore(str(tmp_path / "cache.db"))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+class Computation:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_concurrent_misses_compute_once():
+    cache = NormalizationCache(max_entries=10, ttl=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return RESOLVED
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute("bench", compute)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute("bench", compute))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    # Followers register as coalesced before they block on the leader's flight
+    while cache.stats()["coalesced"] < len(followers):
+        pass
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [RESOLVED] * 5
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"]) == (1, 4)
+
+
+def test_followers_get_the_leaders_error():
+    cache = NormalizationCache(max_entries=10, ttl=60)
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("llm down")
+
+    errors = []
+
+    def lookup():
+        try:
+            cache.get_or_compute("bench", compute)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=lookup)
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=lookup)
+    follower.start()
+    while cache.stats()["coalesced"] < 1:
+        pass
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert errors == ["llm down", "llm down"]
+    # Nothing was cached, so the next lookup computes again
+    compute_again = Computation(RESOLVED)
+    assert cache.get_or_compute("bench", compute_again) == RESOLVED and compute_again.calls == 1
+
+
+def test_memory_entries_expire_after_the_ttl(clock):
+    cache = NormalizationCache(max_entries=10, ttl=60)
+    compute = Computation(RESOLVED)
+    cache.get_or_compute("bench", compute)
+    clock[0] += 59
+    cache.get_or_compute("bench", compute)
+    assert compute.calls == 1
+
+    clock[0] += 2
+    cache.get_or_compute("bench", compute)
+    assert compute.calls == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_expired_entries_are_reloaded_from_the_store(store, clock):
+    cache = NormalizationCache(store, max_entries=10, ttl=60)
+    compute = Computation(RESOLVED)
+    cache.get_or_compute("bench", compute)
+    clock[0] += 61
+    assert cache.get_or_compute("bench", compute) == RESOLVED
+    assert compute.calls == 1
+    assert cache.stats()["store_hits"] == 1
+
+
+def test_unresolved_results_are_not_persisted(store, clock):
+    cache = NormalizationCache(store, max_entries=10, ttl=60)
+    compute = Computation(UNRESOLVED)
+    assert cache.get_or_compute("xyzzy", compute) == UNRESOLVED
+    assert store.get("xyzzy") is None and store.count() == 0
+    # Served from memory within the TTL, retried after it
+    cache.get_or_compute("xyzzy", compute)
+    assert compute.calls == 1
+    clock[0] += 61
+    cache.get_or_compute("xyzzy", compute)
+    assert compute.calls == 2
+    # Nor does another worker sharing the store see it
+    other = NormalizationCache(store, max_entries=10, ttl=60)
+    other.get_or_compute("xyzzy", compute)
+    assert compute.calls == 3
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = NormalizationCache(max_entries=2, ttl=60)
+    compute = Computation(RESOLVED)
+    for key in ("a", "b", "a", "c"):
+        cache.get_or_compute(key, compute)
+    assert compute.calls == 3
+    cache.get_or_compute("a", compute)
+    assert compute.calls == 3
+    cache.get_or_compute("b", compute)
+    assert compute.calls == 4
+    assert cache.stats()["evictions"] == 2
@@ -0,0 +1,15 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_embed_is_sparse():
+    response = client.get("/embed", params={"text": "Bench Press"})
+    assert response.status_code == 200
+    embedding = response.json()["embedding"]
+    assert 0 < len(embedding["indices"]) == len(embedding["values"]) < 1000
+    assert all(0 <= i < embedding["dimensions"] for i in embedding["indices"])
+    # L2-normalized, like the index rows it is compared against
+    assert abs(sum(v * v for v in embedding["values"]) - 1.0) < 1e-4
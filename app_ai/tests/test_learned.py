@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+import normalizer.ai as ai
+from normalizer.cache import SQLiteStore
+
+client = TestClient(app)
+
+
+def normalize(name):
+    response = client.post("/normalize", params={"raw_input": name})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_invalidated_name_goes_back_to_the_llm():
+    name = "Zottman Curls"
+    calls = ai.NORMALIZATION_STATS["llm"]
+    first = normalize(name)["canonical_exercise"]
+    assert ai.NORMALIZATION_STATS["llm"] == calls + 1
+    # Learned: the next request is a dictionary hit
+    assert ai.EXERCISE_LOOKUP.lookup(name)[1] == "exact"
+    assert normalize(name)["canonical_exercise"] == first
+    assert ai.NORMALIZATION_STATS["llm"] == calls + 1
+
+    response = client.delete("/admin/normalize-cache", params={"raw_input": name})
+    assert response.status_code == 200
+    assert response.json()["forgotten_aliases"] == ["zottman curls"]
+    assert ai.EXERCISE_LOOKUP.lookup(name) == (None, None)
+    assert "zottman curls" not in ai.ALIAS_TO_CANONICAL
+    assert "zottman curls" not in ai.LEARNED_ALIASES
+    assert "zottman curls" not in [alias for alias, *_ in ai.NORMALIZATION_STORE.learned()]
+
+    # Neither a restart nor an index swap brings the mapping back
+    ai.reload_learned()
+    ai._install_index(ai.load_or_build_index(ai.ALL_EXERCISE_STRINGS + ["zottman curls"]))
+    assert ai.EXERCISE_LOOKUP.lookup(name) == (None, None)
+    assert all(canonical != "zottman curls" for canonical, _ in ai.retrieve_many([name], top_k=10)[0])
+
+    assert normalize(name)["canonical_exercise"] == first
+    assert ai.NORMALIZATION_STATS["llm"] == calls + 2
+
+
+def test_invalidate_unknown_name_is_404():
+    response = client.delete("/admin/normalize-cache", params={"raw_input": "never seen before"})
+    assert response.status_code == 404
+
+
+def test_dictionary_entries_are_never_forgotten():
+    assert ai.forget_alias("bench press") == []
+    assert ai.EXERCISE_LOOKUP.lookup("bench press") == ("bench press", "exact")
+
+
+def test_store_tombstones_forgotten_aliases(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    store.add_learned("rack pulls", "deadlift", "back", None, "barbell")
+    assert store.forget_learned("rack pulls")
+    assert store.learned() == []
+    assert [alias for alias, _ in store.forgotten()] == ["rack pulls"]
+    # Learning it again lifts the tombstone
+    store.add_learned("rack pulls", "deadlift", "back", None, "barbell")
+    assert store.forgotten() == []
+    assert not store.forget_learned("never learned")
+
+
+def test_other_workers_apply_tombstones(monkeypatch):
+    ai.learn_alias("pin press", "bench press", persist=False)
+    assert ai.EXERCISE_LOOKUP.lookup("pin press") == ("bench press", "exact")
+    # Another worker forgets it through the shared store
+    ai.NORMALIZATION_STORE.forget_learned("pin press")
+    monkeypatch.setattr(ai, "LEARNED_SYNC_SECONDS", 0)
+    ai.sync_forgotten()
+    assert ai.EXERCISE_LOOKUP.lookup("pin press")[1] != "exact"
+    assert "pin press" not in ai.LEARNED_ALIASES
+
+
+def test_unreachable_seed_url_is_logged(monkeypatch, caplog):
+    monkeypatch.setattr(ai, "EXERCISE_SEED_URL", "sqlite:////nonexistent/dir/backend.db")
+    with caplog.at_level("WARNING", logger="normalizer.ai"):
+        ai._load_learned()
+    assert "Could not seed learned exercises" in caplog.text
@@ -0,0 +1,137 @@
+import json
+import time
+
+import pytest
+
+import normalizer.ai as ai
+from normalizer import llm
+from normalizer.llm import CircuitBreaker, LLMClient, LLMUnavailable, StubBackend
+
+
+class APIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class FlakyBackend(StubBackend):
+    """The stub backend, failing its first failures calls with error."""
+
+    def __init__(self, failures, error=None):
+        super().__init__(latency=0)
+        self.failures = failures
+        self.error = error or APIError(503)
+        self.calls = 0
+
+    async def chat(self, prompt, max_tokens):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return await super().chat(prompt, max_tokens)
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """The upper bounds of the jittered backoff sleeps, slept as zero."""
+    bounds = []
+
+    def uniform(low, high):
+        bounds.append(high)
+        return 0.0
+
+    monkeypatch.setattr(llm.random, "uniform", uniform)
+    return bounds
+
+
+RANKING = "Given the original exercise 'bench', rank the following candidate names by relevance: [\"a\", \"b\"]. "
+
+
+def test_transient_failures_are_retried_with_exponential_backoff(delays):
+    backend = FlakyBackend(failures=2)
+    client = LLMClient(backend, max_retries=2, backoff=0.5, breaker=CircuitBreaker(threshold=5))
+    assert json.loads(client.complete(RANKING)) == [0, 1]
+    assert backend.calls == 3
+    assert delays == [0.5, 1.0]
+    stats = client.stats()
+    assert (stats["attempts"], stats["retries"], stats["failures"], stats["breaker"]) == (3, 2, 0, "closed")
+
+
+def test_gives_up_after_the_last_retry(delays):
+    backend = FlakyBackend(failures=10)
+    client = LLMClient(backend, max_retries=2, backoff=0.5, breaker=CircuitBreaker(threshold=5))
+    with pytest.raises(LLMUnavailable):
+        client.complete(RANKING)
+    assert backend.calls == 3
+    assert client.stats()["failures"] == 1
+
+
+@pytest.mark.parametrize("status, calls", [(400, 1), (429, 3), (500, 3)])
+def test_only_transient_errors_are_retried(delays, status, calls):
+    backend = FlakyBackend(failures=10, error=APIError(status))
+    client = LLMClient(backend, max_retries=2, breaker=CircuitBreaker(threshold=5))
+    with pytest.raises(LLMUnavailable):
+        client.complete(RANKING)
+    assert backend.calls == calls
+
+
+def test_past_deadline_fails_without_calling(delays):
+    backend = FlakyBackend(failures=0)
+    client = LLMClient(backend, breaker=CircuitBreaker(threshold=5))
+    with pytest.raises(LLMUnavailable, match="deadline"):
+        client.complete(RANKING, deadline=time.monotonic() - 1)
+    assert backend.calls == 0
+
+
+def test_breaker_opens_then_lets_one_trial_through(delays):
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    backend = FlakyBackend(failures=2)
+    client = LLMClient(backend, max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(LLMUnavailable):
+            client.complete(RANKING)
+    assert breaker.state == "open"
+
+    # Open: rejected without reaching the backend
+    with pytest.raises(LLMUnavailable, match="circuit breaker"):
+        client.complete(RANKING)
+    assert backend.calls == 2 and client.stats()["rejected"] == 1
+
+    # After the cooldown a single trial goes through, and its success closes the breaker
+    breaker.opened_at -= 61
+    assert breaker.state == "half-open"
+    assert breaker.allow() and not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.failures == 0
+    assert json.loads(client.complete(RANKING)) == [0, 1]
+
+
+def test_failed_trial_reopens_the_breaker(delays):
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    client = LLMClient(FlakyBackend(failures=10), max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(LLMUnavailable):
+            client.complete(RANKING)
+    breaker.opened_at -= 61
+    with pytest.raises(LLMUnavailable, match="LLM call failed"):
+        client.complete(RANKING)
+    assert breaker.state == "open"
+
+
+def test_normalization_falls_back_when_the_llm_is_unavailable(monkeypatch, delays):
+    down = LLMClient(FlakyBackend(failures=10), max_retries=0, breaker=CircuitBreaker(threshold=1, cooldown=60))
+    monkeypatch.setattr(ai, "LLM_CLIENT", down)
+    raw = "barbel benchh pres wide grip"
+    assert ai.EXERCISE_LOOKUP.lookup(raw)[0] is None
+    fallbacks = ai.NORMALIZATION_STATS["fallback"]
+
+    result = ai.hybrid_normalize_exercise(raw)
+    # The top retrieval candidate, uncached so it is resolved properly once the LLM is back
+    assert result["canonical_exercise"] == ai.embedding_retriever(raw)[0].lower()
+    assert ai.NORMALIZATION_STATS["fallback"] == fallbacks + 1
+    assert ai.NORMALIZATION_STORE.get(ai.clean_exercise_name(raw)) is None
+
+    # With the breaker open the next lookup falls back without calling the LLM
+    calls = down.backend.calls
+    ai.hybrid_normalize_exercise(raw)
+    assert down.backend.calls == calls
+    assert ai.NORMALIZATION_STATS["fallback"] == fallbacks + 2
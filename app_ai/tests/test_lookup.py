@@ -0,0 +1,37 @@
+import pytest
+
+from normalizer.ai import EXERCISE_LOOKUP
+from normalizer.lookup import token_local
+
+
+@pytest.mark.parametrize("raw", [
+    "rack pull",
+    "rack pulls",
+    "jump squat",
+    "french press",
+    "svend press",
+    "lu raise",
+    "straight arm pulldown",
+])
+def test_word_substitutions_are_not_fuzzy_matches(raw):
+    assert EXERCISE_LOOKUP.lookup(raw)[1] != "fuzzy"
+
+
+@pytest.mark.parametrize("raw, canonical", [
+    ("bench pres", "bench press"),
+    ("deadlfit", "deadlift"),
+    ("latteral raise", "lateral raise"),
+    ("tricep pushdwn", "tricep pushdown"),
+    ("bnch prss", "bench press"),
+    ("incline bnch pres", "incline bench press"),
+])
+def test_typos_are_fuzzy_matches(raw, canonical):
+    assert EXERCISE_LOOKUP.lookup(raw) == (canonical, "fuzzy")
+
+
+def test_token_local():
+    assert token_local("bnch prss", "bench press")
+    assert token_local("shoulder pre", "shoulder press")
+    assert not token_local("rack pull", "face pull")
+    assert not token_local("leg extension", "1 leg extension")
+    assert not token_local("dl row", "db row")
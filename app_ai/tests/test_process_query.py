@@ -0,0 +1,30 @@
+import datetime
+import time
+
+import normalizer.ai as ai
+from normalizer.schemas import WorkoutExercise
+
+LATENCY = 0.2
+
+
+def workout(names):
+    return [WorkoutExercise(name=name, sets=[{"weight": 100, "reps": 5}, {"weight": 110, "reps": 3}]) for name in names]
+
+
+def timed(names):
+    started = time.perf_counter()
+    result = ai.process_query(workout(names), datetime.datetime(2024, 1, 1))
+    return result, time.perf_counter() - started
+
+
+def test_unknown_names_are_normalized_concurrently(monkeypatch):
+    monkeypatch.setattr(ai.LLM_CLIENT.backend, "latency", LATENCY)
+    calls = ai.NORMALIZATION_STATS["llm"]
+    _, one = timed(["kettlebell windmill"])
+    names = ["landmine twist", "zercher carry", "sandbag shouldering", "atlas stone load", "yoke walk", "log clean"]
+    result, many = timed(names)
+    assert ai.NORMALIZATION_STATS["llm"] == calls + 1 + len(names)
+    assert one >= LATENCY
+    # About one LLM round trip for all of them, not one per name
+    assert many < 2 * one
+    assert [ex["total_volume"] for ex in result] == [100 * 5 + 110 * 3] * len(names)
@@ -0,0 +1,48 @@
+import pytest
+
+from normalizer.ai import embedding_retriever
+from normalizer.retrieval import SparseIndex
+
+# Misspellings and their canonical exercise
+MISSPELLINGS = [
+    ("benchh pres", "bench press"),
+    ("dedlift", "deadlift"),
+    ("lat pulldwn", "lat pulldown"),
+    ("bicep curll", "bicep curl"),
+    ("romainian deadlift", "romanian deadlift"),
+    ("dumbell row", "dumbbell row"),
+    ("tricep extenson", "tricep extension"),
+    ("calf raize", "calf raise"),
+    ("hip thurst", "hip thrust"),
+    ("seated cabel row", "seated cable row"),
+    ("face pul", "face pull"),
+    ("pullups", "pull up"),
+]
+
+# Harder ones, where the right exercise only has to be among the candidates the LLM sees
+NEAR_MISSES = [
+    ("leg extention", "single leg extension"),
+    ("goblet sqaut", "squat"),
+    ("inclne dumbell press", "incline bench press"),
+    ("barbel squatt", "squat"),
+]
+
+
+@pytest.mark.parametrize("raw, canonical", MISSPELLINGS)
+def test_misspellings_retrieve_their_exercise_first(raw, canonical):
+    assert embedding_retriever(raw)[0] == canonical
+
+
+def test_recall_at_5():
+    cases = MISSPELLINGS + NEAR_MISSES
+    found = sum(canonical in embedding_retriever(raw, top_k=5) for raw, canonical in cases)
+    assert found == len(cases)
+
+
+def test_added_and_removed_labels():
+    index = SparseIndex(["bench press", "deadlift", "squat"])
+    assert index.search(["spoto pres"], top_k=1)[0][0][0] == 0
+    position = index.add("spoto press")
+    assert index.search(["spoto pres"], top_k=1)[0][0][0] == position
+    assert index.remove("spoto press") == 1
+    assert position not in [hit for hit, _ in index.search(["spoto pres"], top_k=4)[0]]
@@ -0,0 +1,25 @@
+"""Add data_versions table
+
+Revision ID: 'add_data_versions'
+Revises: 'add_hot_path_indexes'
+Create Date: 2025-09-28
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_data_versions'
+down_revision = 'add_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    table = op.create_table('data_versions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(table, [{'name': 'workouts', 'value': 0}])
+
+def downgrade():
+    op.drop_table('data_versions')
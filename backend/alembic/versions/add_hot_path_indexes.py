@@ -0,0 +1,33 @@
+"""Add indexes for the hot read paths
+
+Revision ID: 'add_hot_path_indexes'
+Revises: 'add_personal_records'
+Create Date: 2025-09-28
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_path_indexes'
+down_revision = 'add_personal_records'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Loading a session's sets and the per-exercise joins
+    op.create_index('ix_sets_session_id_exercise_id', 'sets', ['session_id', 'exercise_id'])
+    # Heaviest set per exercise
+    op.create_index('ix_sets_exercise_id_weight', 'sets', ['exercise_id', sa.text('weight DESC')])
+    # Top set by volume per exercise (get_top_set_for_exercise)
+    op.create_index('ix_sets_exercise_id_volume', 'sets', ['exercise_id', sa.text('(weight * reps) DESC')])
+    # Keyset pagination of /sessions orders by (date DESC, id DESC)
+    op.create_index('ix_workout_sessions_date_id', 'workout_sessions', [sa.text('date DESC'), sa.text('id DESC')])
+    # Case-insensitive muscle group lookups
+    op.create_index('ix_exercises_lower_primary_muscle', 'exercises', [sa.text('lower(primary_muscle)')])
+
+def downgrade():
+    op.drop_index('ix_exercises_lower_primary_muscle', table_name='exercises')
+    op.drop_index('ix_workout_sessions_date_id', table_name='workout_sessions')
+    op.drop_index('ix_sets_exercise_id_volume', table_name='sets')
+    op.drop_index('ix_sets_exercise_id_weight', table_name='sets')
+    op.drop_index('ix_sets_session_id_exercise_id', table_name='sets')
@@ -0,0 +1,36 @@
+"""Add ingest_jobs table for the asynchronous /submit queue
+
+Revision ID: 'add_ingest_jobs'
+Revises: 'add_rollups'
+Create Date: 2025-10-02
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ingest_jobs'
+down_revision = 'add_rollups'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('ingest_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('idempotency_key', sa.String(), nullable=True),
+    sa.Column('payload_hash', sa.String(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('session_ids', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index('ix_ingest_jobs_status_id', 'ingest_jobs', ['status', 'id'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_ingest_jobs_status_id', table_name='ingest_jobs')
+    op.drop_table('ingest_jobs')
@@ -0,0 +1,48 @@
+"""Add muscle_last_workout summary table
+
+Revision ID: 'add_muscle_last_workout'
+Revises: 'rename_category_to_equipment'
+Create Date: 2025-09-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_muscle_last_workout'
+down_revision = 'rename_category_to_equipment'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('muscle_last_workout',
+    sa.Column('muscle', sa.String(), nullable=False),
+    sa.Column('session_id', sa.Integer(), nullable=True),
+    sa.Column('set_id', sa.Integer(), nullable=True),
+    sa.Column('session_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['workout_sessions.id'], ),
+    sa.ForeignKeyConstraint(['set_id'], ['sets.id'], ),
+    sa.PrimaryKeyConstraint('muscle')
+    )
+    # Backfill from existing history: latest dated session per muscle and its heaviest set
+    op.execute("""
+        INSERT INTO muscle_last_workout (muscle, session_id, set_id, session_date)
+        SELECT muscle,
+               CASE WHEN session_date IS NULL THEN NULL ELSE session_id END,
+               CASE WHEN session_date IS NULL THEN NULL ELSE set_id END,
+               session_date
+        FROM (
+            SELECT lower(e.primary_muscle) AS muscle, ws.id AS session_id, s.id AS set_id, ws.date AS session_date,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY lower(e.primary_muscle)
+                       ORDER BY ws.date IS NULL, ws.date DESC, ws.id DESC, s.weight DESC, s.id DESC
+                   ) AS rn
+            FROM exercises e
+            LEFT JOIN sets s ON s.exercise_id = e.id
+            LEFT JOIN workout_sessions ws ON ws.id = s.session_id
+            WHERE e.primary_muscle IS NOT NULL AND e.primary_muscle <> ''
+        ) ranked
+        WHERE rn = 1
+    """)
+
+def downgrade():
+    op.drop_table('muscle_last_workout')
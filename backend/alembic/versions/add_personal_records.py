@@ -0,0 +1,66 @@
+"""Add personal_records table
+
+Revision ID: 'add_personal_records'
+Revises: 'unique_exercise_name'
+Create Date: 2025-09-27
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_personal_records'
+down_revision = 'unique_exercise_name'
+branch_labels = None
+depends_on = None
+
+# Backfill from existing history, as app.services.records.rebuild_personal_records computes
+# it: the best set per (exercise, metric, rep count), the earlier set (by date, undated last,
+# then id) on ties
+BACKFILL = """
+    INSERT INTO personal_records (exercise_id, metric, rep_count, value, set_id, session_id, achieved_at)
+    SELECT exercise_id, metric, rep_count, value, set_id, session_id, achieved_at
+    FROM (
+        SELECT candidates.*,
+               ROW_NUMBER() OVER (
+                   PARTITION BY exercise_id, metric, rep_count
+                   ORDER BY value DESC, achieved_at IS NULL, achieved_at, set_id
+               ) AS rn
+        FROM (
+            SELECT s.exercise_id, 'weight' AS metric, s.reps AS rep_count, COALESCE(s.weight, 0) AS value,
+                   s.id AS set_id, s.session_id, ws.date AS achieved_at
+            FROM sets s JOIN workout_sessions ws ON ws.id = s.session_id
+            WHERE s.reps > 0
+            UNION ALL
+            SELECT s.exercise_id, 'volume', 0, COALESCE(s.weight, 0) * s.reps, s.id, s.session_id, ws.date
+            FROM sets s JOIN workout_sessions ws ON ws.id = s.session_id
+            WHERE s.reps > 0
+            UNION ALL
+            SELECT s.exercise_id, 'e1rm', 0,
+                   CASE WHEN s.reps = 1 THEN COALESCE(s.weight, 0)
+                        ELSE COALESCE(s.weight, 0) * (1 + s.reps / CAST(30 AS DOUBLE PRECISION)) END,
+                   s.id, s.session_id, ws.date
+            FROM sets s JOIN workout_sessions ws ON ws.id = s.session_id
+            WHERE s.reps > 0
+        ) candidates
+    ) ranked
+    WHERE rn = 1
+"""
+
+def upgrade():
+    op.create_table('personal_records',
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('metric', sa.String(), nullable=False),
+    sa.Column('rep_count', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=True),
+    sa.Column('set_id', sa.Integer(), nullable=True),
+    sa.Column('session_id', sa.Integer(), nullable=True),
+    sa.Column('achieved_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ),
+    sa.ForeignKeyConstraint(['set_id'], ['sets.id'], ),
+    sa.ForeignKeyConstraint(['session_id'], ['workout_sessions.id'], ),
+    sa.PrimaryKeyConstraint('exercise_id', 'metric', 'rep_count')
+    )
+    op.execute(BACKFILL)
+
+def downgrade():
+    op.drop_table('personal_records')
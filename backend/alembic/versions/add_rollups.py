@@ -0,0 +1,42 @@
+"""Add exercise_daily_rollups and muscle_weekly_rollups tables
+
+Revision ID: 'add_rollups'
+Revises: 'add_data_versions'
+Create Date: 2025-09-29
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_rollups'
+down_revision = 'add_data_versions'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Populate with `python -m app.cli rebuild-rollups` after upgrading
+    op.create_table('exercise_daily_rollups',
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('sets', sa.Integer(), nullable=False),
+    sa.Column('reps', sa.Integer(), nullable=False),
+    sa.Column('volume', sa.Float(), nullable=False),
+    sa.Column('top_weight', sa.Float(), nullable=False),
+    sa.Column('best_e1rm', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ),
+    sa.PrimaryKeyConstraint('exercise_id', 'day')
+    )
+    op.create_table('muscle_weekly_rollups',
+    sa.Column('muscle', sa.String(), nullable=False),
+    sa.Column('week', sa.Date(), nullable=False),
+    sa.Column('sets', sa.Integer(), nullable=False),
+    sa.Column('reps', sa.Integer(), nullable=False),
+    sa.Column('volume', sa.Float(), nullable=False),
+    sa.Column('top_weight', sa.Float(), nullable=False),
+    sa.Column('best_e1rm', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('muscle', 'week')
+    )
+
+def downgrade():
+    op.drop_table('muscle_weekly_rollups')
+    op.drop_table('exercise_daily_rollups')
@@ -0,0 +1,27 @@
+"""Order undated sessions last in the /sessions keyset index
+
+Revision ID: 'sessions_nulls_last'
+Revises: 'add_ingest_jobs'
+Create Date: 2025-10-03
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'sessions_nulls_last'
+down_revision = 'add_ingest_jobs'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # /sessions orders by (date DESC NULLS LAST, id DESC); a plain DESC index puts NULLs first on Postgres
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_workout_sessions_date_id', table_name='workout_sessions')
+    op.create_index('ix_workout_sessions_date_id', 'workout_sessions', [sa.text('date DESC NULLS LAST'), sa.text('id DESC')])
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_workout_sessions_date_id', table_name='workout_sessions')
+    op.create_index('ix_workout_sessions_date_id', 'workout_sessions', [sa.text('date DESC'), sa.text('id DESC')])
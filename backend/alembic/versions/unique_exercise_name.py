@@ -0,0 +1,37 @@
+"""Make exercises.name unique so new exercises can be upserted
+
+Revision ID: 'unique_exercise_name'
+Revises: 'add_muscle_last_workout'
+Create Date: 2025-09-21
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'unique_exercise_name'
+down_revision = 'add_muscle_last_workout'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Merge duplicate exercises into the oldest row with the same name before adding the constraint
+    op.execute("""
+        UPDATE sets SET exercise_id = (
+            SELECT MIN(e2.id) FROM exercises e1 JOIN exercises e2 ON e2.name = e1.name
+            WHERE e1.id = sets.exercise_id
+        )
+        WHERE exercise_id IN (
+            SELECT e.id FROM exercises e
+            WHERE e.id <> (SELECT MIN(d.id) FROM exercises d WHERE d.name = e.name)
+        )
+    """)
+    op.execute("""
+        DELETE FROM exercises
+        WHERE name IS NOT NULL AND id NOT IN (SELECT MIN(id) FROM exercises GROUP BY name)
+    """)
+    op.drop_index(op.f('ix_exercises_name'), table_name='exercises')
+    op.create_index(op.f('ix_exercises_name'), 'exercises', ['name'], unique=True)
+
+def downgrade():
+    op.drop_index(op.f('ix_exercises_name'), table_name='exercises')
+    op.create_index(op.f('ix_exercises_name'), 'exercises', ['name'], unique=False)
@@ -0,0 +1,49 @@
+# Async variants of the dashboard read endpoints, mounted ahead of the sync router when USE_ASYNC_DB is set
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_async_db
+from app.services import history, records, versions
+from app.api.caching import cached_response_async
+
+router = APIRouter()
+
+# The service functions are written against a sync Session; run_sync runs them on the
+# async connection without a worker thread, so a slow page only holds a coroutine.
+
+@router.get("/sessions")
+async def get_sessions(
+    request: Request,
+    before: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    format: Literal["rows", "columnar"] = "rows",
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Async variant of GET /sessions."""
+    try:
+        version = await db.run_sync(versions.get_data_version)
+        columnar = format == "columnar"
+        return await cached_response_async(
+            request,
+            version,
+            lambda: db.run_sync(lambda session: history.get_sessions(session, before=before, limit=limit, columnar=columnar)),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/workouts/last-workout-by-muscle")
+async def get_last_workout_by_muscle(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Async variant of GET /workouts/last-workout-by-muscle."""
+    version = await db.run_sync(versions.get_data_version)
+
+    async def build():
+        return {"last_workout_by_muscle": await db.run_sync(history.get_last_workout_by_muscle)}
+
+    return await cached_response_async(request, version, build)
+
+
+@router.get("/records")
+async def get_records(exercise_id: Optional[int] = None, db: AsyncSession = Depends(get_async_db)):
+    """Async variant of GET /records."""
+    return {"records": await db.run_sync(lambda session: records.get_records(session, exercise_id=exercise_id))}
@@ -0,0 +1,141 @@
+# Conditional GET support: strong ETags derived from data versions and a bounded response cache
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+import orjson
+from fastapi import Request, Response
+from app.metrics import span
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+
+class ResponseCache:
+    """
+    In-process LRU of serialized response bodies keyed by (request key, data version).
+    Entries for old versions are never hit again and age out, so nothing has to be
+    invalidated explicitly. Swap RESPONSE_CACHE for any object with get/put to share
+    the cache between workers.
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+def negotiate_media_type(request: Request):
+    """MessagePack if the client asks for it in Accept, JSON otherwise."""
+    accept = request.headers.get("accept", "")
+    return MSGPACK if any(t in accept for t in MSGPACK_TYPES) else JSON
+
+
+def request_key(request: Request, media_type=JSON):
+    """Path plus sorted query string, so parameter order does not split the cache, plus the media type."""
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    return f"{request.url.path}?{query}|{media_type}"
+
+
+def make_etag(key, version):
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return f'"v{version}-{digest}"'
+
+
+def matches_if_none_match(request: Request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 specifies for If-None-Match
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def _msgpack_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+def serialize(result, media_type=JSON):
+    """
+    Encode a result of plain dicts, lists, scalars and datetimes. orjson and msgpack are
+    several times faster than FastAPI's jsonable_encoder + json.dumps on large payloads.
+    """
+    if media_type == MSGPACK:
+        import msgpack
+        return msgpack.packb(result, default=_msgpack_default)
+    return orjson.dumps(result)
+
+
+def versioned_headers(etag):
+    # no-cache: browsers may store the response but must revalidate it with If-None-Match
+    return {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+
+
+def not_modified(etag):
+    return Response(status_code=304, headers=versioned_headers(etag))
+
+
+def encoded_response(body, etag, media_type=JSON):
+    return Response(content=body, media_type=media_type, headers=versioned_headers(etag))
+
+
+def cached_response(request: Request, version, build):
+    """
+    304 if the client already has this version, otherwise the cached or freshly built
+    body for it, as JSON or MessagePack depending on Accept.
+    build: callable returning the serializable result.
+    """
+    media_type = negotiate_media_type(request)
+    key = request_key(request, media_type)
+    etag = make_etag(key, version)
+    if matches_if_none_match(request, etag):
+        return not_modified(etag)
+    body = RESPONSE_CACHE.get((key, version))
+    if body is None:
+        with span("build"):
+            result = build()
+        with span("serialize"):
+            body = serialize(result, media_type)
+        RESPONSE_CACHE.put((key, version), body)
+    return encoded_response(body, etag, media_type)
+
+
+async def cached_response_async(request: Request, version, build):
+    """cached_response for async endpoints. build: coroutine function returning the result."""
+    media_type = negotiate_media_type(request)
+    key = request_key(request, media_type)
+    etag = make_etag(key, version)
+    if matches_if_none_match(request, etag):
+        return not_modified(etag)
+    body = RESPONSE_CACHE.get((key, version))
+    if body is None:
+        with span("build"):
+            result = await build()
+        with span("serialize"):
+            body = serialize(result, media_type)
+        RESPONSE_CACHE.put((key, version), body)
+    return encoded_response(body, etag, media_type)
@@ -1,10 +1,16 @@
 # API endpoints for lifting analytics app
-from fastapi import APIRouter
+from datetime import date, datetime
+from typing import List, Literal, Optional
+import codecs
+import json
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.db import SessionLocal
-from app.models import Exercise, Set, WorkoutSession
-from sqlalchemy import desc
-from app.services.ingestion import ingest_workout
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.services.ingestion import IMPORT_BATCH_SIZE, InvalidWorkout, ingest_workouts, iter_import_batches, validate_workout
+from app.services import analytics, history, jobs, normalization, records, rollups, versions
+from app.api.caching import cached_response
 
 router = APIRouter()
 
@@ -16,105 +22,210 @@ class SubmitRequest(BaseModel):
 class SubmitResponse(BaseModel):
     success: bool
     detail: str = None
+    job_id: int = None
+    status: str = None
+
+class BulkSubmitRequest(BaseModel):
+    sessions: List[list]
+
+class IngestRequest(BaseModel):
+    query: list  # raw exercises as sent to the AI service's /query: name and sets of weight, reps, note
+    date: datetime
+    location: str = None
 
 @router.get("/sessions")
-def get_sessions():
+def get_sessions(
+    request: Request,
+    before: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    format: Literal["rows", "columnar"] = "rows",
+    db: Session = Depends(get_db),
+):
+    """
+    Get workout sessions with their exercises and sets, newest first.
+    Pass limit to page through history, then next_cursor from the response as before.
+    format=columnar sends each exercise once and sets as parallel arrays referencing it,
+    and Accept: application/msgpack returns MessagePack instead of JSON.
+    Supports If-None-Match: the ETag changes only when workouts are ingested.
+    """
+    try:
+        version = versions.get_data_version(db)
+        columnar = format == "columnar"
+        return cached_response(request, version, lambda: history.get_sessions(db, before=before, limit=limit, columnar=columnar))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/submit", response_model=SubmitResponse, status_code=202)
+def submit_endpoint(
+    request: SubmitRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db),
+):
+    """
+    Queue a workout for ingestion and return its job id right away; poll /jobs/{job_id}.
+    Retrying with the same Idempotency-Key header returns the original job (200) instead
+    of queueing the workout twice. A malformed workout is rejected (422) without queueing.
+    """
+    try:
+        validate_workout(request.exercises)
+    except InvalidWorkout as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        job, created = jobs.enqueue_ingest(db, [request.exercises], idempotency_key=idempotency_key)
+    except jobs.IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if created:
+        jobs.notify_workers()
+    else:
+        response.status_code = 200
+    return SubmitResponse(success=True, detail="Workout queued for ingestion.", job_id=job.id, status=job.status)
+
+@router.post("/workouts/ingest")
+def ingest_raw_workout(request: IngestRequest, db: Session = Depends(get_db)):
     """
-    Get all workout sessions with their exercises and sets
-    TODO: move DB logic to a ingestion service
+    Normalize a raw workout with the embedded normalizer and store it, in one request and
+    one transaction: the single-hop version of the AI service's /query followed by /submit.
+    Returns the normalized exercises as /query does, and the new session id. Nothing is
+    stored if any exercise name cannot be resolved (422, listing them).
     """
-    db = SessionLocal()
-    sessions_out = []
-    sessions = db.query(WorkoutSession).order_by(desc(WorkoutSession.date)).all()
-
-    for session in sessions:
-        sets = db.query(Set).filter(Set.session_id == session.id).all()
-        sets_out = []
-        for s in sets:
-            exercise = db.query(Exercise).filter(Exercise.id == s.exercise_id).first()
-            sets_out.append({
-                "exercise": exercise.name if exercise else None,
-                "equipment": exercise.equipment if exercise else None,
-                "primaryMuscle": exercise.primary_muscle if exercise else None,
-                "secondaryMuscle": exercise.secondary_muscle if exercise else None,
-                "weight": s.weight,
-                "reps": s.reps,
-                "rpe": getattr(s, "rpe", None),
-                "timestamp": s.timestamp.isoformat() if getattr(s, "timestamp", None) else None
-            })
-        sessions_out.append({
-            "id": session.id,
-            "date": session.date.isoformat() if session.date else None,
-            "location": session.location,
-            "sets": sets_out
-        })
-    db.close()
-    return {"sessions": sessions_out}
-
-
-@router.post("/submit", response_model=SubmitResponse)
-def submit_endpoint(request: SubmitRequest):
     try:
-        ingest_workout(request.exercises)
-        return SubmitResponse(success=True, detail="Workout submitted successfully.")
+        exercises = normalization.normalize_workout(request.query, request.date, location=request.location or "Unknown")
+    except normalization.NormalizerUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except normalization.UnresolvedExercises as e:
+        raise HTTPException(status_code=422, detail={"message": str(e), "unresolved": e.names})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    session_id = ingest_workouts([exercises], db=db)[0]
+    db.commit()
+    return {"session_id": session_id, "result": exercises}
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Status of a queued /submit: queued, running, done (with session_ids) or failed (with error)."""
+    job = jobs.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/submit/bulk", response_model=SubmitResponse)
+def submit_bulk_endpoint(request: BulkSubmitRequest, db: Session = Depends(get_db)):
+    """Submit many workouts at once (e.g. history backfills) in a single transaction."""
+    try:
+        session_ids = ingest_workouts(request.sessions, db=db)
+        db.commit()
+        return SubmitResponse(success=True, detail=f"{len(session_ids)} workouts submitted successfully.")
     except Exception as e:
         return SubmitResponse(success=False, detail=str(e))
 
+@router.post("/import")
+def import_endpoint(file: UploadFile = File(...), batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=10000)):
+    """
+    Import a CSV or JSON Lines workout log export.
+    Streams newline-delimited JSON progress (rows, sessions, rows_per_sec) after every batch,
+    then a final line with done set to true.
+    """
+    fmt = "csv" if (file.filename or "").lower().endswith(".csv") else "json"
+
+    def events():
+        stats = {}
+        lines = codecs.iterdecode(file.file, "utf-8-sig")
+        try:
+            for stats in iter_import_batches(lines, fmt, batch_size=batch_size):
+                yield json.dumps(stats) + "\n"
+        except Exception as e:
+            yield json.dumps({**stats, "done": True, "success": False, "detail": str(e)}) + "\n"
+            return
+        yield json.dumps({**stats, "done": True, "success": True}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 @router.get("/workouts/last-workout-by-muscle")
-def get_last_workout_by_muscle():
+def get_last_workout_by_muscle(request: Request, db: Session = Depends(get_db)):
     """
     Get the most recent workout session for each muscle group and return the details
-    TODO: move DB logic to a ingestion service
+    Supports If-None-Match: the ETag changes only when workouts are ingested.
     """
-    db = SessionLocal()
-    # Get all muscle groups from exercises
-    muscle_groups = db.query(Exercise.primary_muscle).distinct().all()
-    # Normalize muscle group names to lowercase
-    muscle_groups = [mg[0].lower() for mg in muscle_groups if mg[0]]
-    result = {}
-    for muscle in muscle_groups:
-        # Get the most recent session that has sets for this muscle group
-        session = (
-            db.query(WorkoutSession)
-            .join(Set, WorkoutSession.id == Set.session_id)
-            .join(Exercise, Set.exercise_id == Exercise.id)
-            .filter(Exercise.primary_muscle.ilike(muscle), WorkoutSession.date.isnot(None))
-            .order_by(WorkoutSession.date.desc())
-            .first()
-        )
+    version = versions.get_data_version(db)
+    return cached_response(
+        request, version, lambda: {"last_workout_by_muscle": history.get_last_workout_by_muscle(db)}
+    )
+
+
+@router.get("/records")
+def get_records(exercise_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Stored personal records (top weight per rep count, top volume, e1RM), optionally for one exercise."""
+    return {"records": records.get_records(db, exercise_id=exercise_id)}
+
+
+@router.get("/analytics/prs")
+def get_prs(exercise_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Rep maxes (1RM-10RM), best e1RM and PR events per exercise."""
+    cols = analytics.load_set_columns(db, exercise_id=exercise_id)
+    return {"prs": analytics.to_python(analytics.detect_prs(cols))}
+
+
+@router.get("/analytics/volume")
+def get_volume(exercise_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Total, per-session and per-week training volume."""
+    cols = analytics.load_set_columns(db, exercise_id=exercise_id)
+    return analytics.to_python(analytics.calculate_volume(cols))
+
+
+@router.get("/analytics/trends")
+def get_trends(
+    exercise_id: Optional[int] = None,
+    window: int = Query(4, ge=1, le=52),
+    plateau_sessions: int = Query(6, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Per-session best e1RM with moving average, trend slope and plateau detection."""
+    cols = analytics.load_set_columns(db, exercise_id=exercise_id)
+    return {"trends": analytics.to_python(analytics.compute_trends(cols, window=window, plateau_sessions=plateau_sessions))}
 
-        # If a session is found, get the the sets for this muscle group in that session
-        # return the set with the highest weight
-        if session:
-            top_set = (
-                db.query(Set)
-                .join(Exercise, Set.exercise_id == Exercise.id)
-                .filter(Set.session_id == session.id, Exercise.primary_muscle.ilike(muscle))
-                .order_by(desc(Set.weight))
-                .first()
-            )
-            if not top_set:
-                continue
-
-            result[muscle] = {
-                "session_date": session.date if session.date else None,
-                "location": session.location,
-                "exercise": top_set.exercise.name,
-                "equipment": top_set.exercise.equipment,
-                "primary_muscle": top_set.exercise.primary_muscle,
-                "secondary_muscle": top_set.exercise.secondary_muscle,
-                "top_set": {"weight": top_set.weight, "reps": top_set.reps, "rpe": top_set.rpe}
-            }
-        else:
-            result[muscle] = {
-                "session_date": None,
-                "location": None,
-                "exercise": None,
-                "equipment": None,
-                "primary_muscle": None,
-                "secondary_muscle": None,
-                "top_set": None
-            }
-
-    db.close()
-    return {"last_workout_by_muscle": result}
\ No newline at end of file
+
+@router.get("/analytics/progression")
+def get_progression(
+    request: Request,
+    exercise: str,
+    formula: Literal["epley", "brzycki"] = "epley",
+    points: int = Query(500, ge=3, le=10000),
+    db: Session = Depends(get_db),
+):
+    """
+    Per-session best e1RM of one exercise, downsampled with LTTB to at most points points
+    (the all-time best is always kept). pr flags the sessions that set a new best.
+    """
+    version = versions.get_data_version(db)
+
+    def build():
+        exercise_id = analytics.exercise_id_by_name(db, exercise)
+        cols = analytics.load_set_columns(db, exercise_id=exercise_id) if exercise_id else analytics.empty_columns()
+        return {"exercise": exercise.lower(), **analytics.to_python(analytics.progression(cols, formula, max_points=points))}
+
+    return cached_response(request, version, build)
+
+@router.get("/analytics/series")
+def get_series(
+    request: Request,
+    exercise: Optional[str] = None,
+    muscle: Optional[str] = None,
+    bucket: Literal["day", "week", "month"] = "week",
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+):
+    """
+    Chart series for one exercise (day, week or month buckets) or one primary muscle (week
+    buckets): sets, reps, volume, top weight and best e1RM per bucket, from the rollup tables.
+    """
+    try:
+        version = versions.get_data_version(db)
+        return cached_response(
+            request, version,
+            lambda: rollups.get_series(db, exercise=exercise, muscle=muscle, bucket=bucket, start=start, end=end),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
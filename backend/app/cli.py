@@ -0,0 +1,89 @@
+# Command line entry points: python -m app.cli <command>
+import argparse
+import sys
+
+
+def import_log(args):
+    from app.services.ingestion import import_workout_log
+
+    def report(stats):
+        print(
+            f"{stats['rows']} rows, {stats['sessions']} sessions, "
+            f"{stats['rows_per_sec']:.0f} rows/sec",
+            file=sys.stderr,
+        )
+
+    stats = import_workout_log(args.path, batch_size=args.batch_size, progress=report)
+    print(f"Imported {stats['rows']} rows into {stats['sessions']} sessions in {stats['seconds']:.1f}s")
+
+
+def rebuild_records(args):
+    from app.db import SessionLocal
+    from app.services.records import rebuild_personal_records
+    db = SessionLocal()
+    try:
+        count = rebuild_personal_records(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {count} personal records")
+
+
+def rebuild_rollups(args):
+    from app.db import SessionLocal
+    from app.services.rollups import rebuild_rollups as rebuild
+    db = SessionLocal()
+    try:
+        daily, weekly = rebuild(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {daily} daily exercise rollups and {weekly} weekly muscle rollups")
+
+
+def worker(args):
+    import signal
+    import threading
+    from app.db import SessionLocal, engine
+    from app.services.catalog import start_version_listener, stop_version_listener
+    from app.services.jobs import IngestWorkerPool
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    start_version_listener(engine)
+    pool = IngestWorkerPool(SessionLocal, workers=args.threads, batch_size=args.batch_size).start()
+    print(f"Ingest worker {pool.name} running {args.threads} threads", file=sys.stderr)
+    try:
+        stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+        stop_version_listener()
+
+
+def main(argv=None):
+    from app.services.ingestion import IMPORT_BATCH_SIZE
+    from app.services.jobs import INGEST_BATCH_SIZE
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Lifting analytics backend commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="Import a CSV or JSON Lines workout log export")
+    importer.add_argument("path")
+    importer.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Sessions per transaction")
+    importer.set_defaults(func=import_log)
+
+    records = commands.add_parser("rebuild-records", help="Recompute the personal_records table from all sets")
+    records.set_defaults(func=rebuild_records)
+
+    rollups = commands.add_parser("rebuild-rollups", help="Recompute the chart rollup tables from all sets")
+    rollups.set_defaults(func=rebuild_rollups)
+
+    workers = commands.add_parser("worker", help="Drain the /submit ingestion queue (run with INGEST_WORKERS=0 on the web app)")
+    workers.add_argument("--threads", type=int, default=1, help="Worker threads in this process")
+    workers.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Jobs ingested per transaction")
+    workers.set_defaults(func=worker)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
 load_dotenv()
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -10,11 +11,77 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 # DATABASE_URL must be set in your environment (e.g., Railway dashboard)
 DATABASE_URL = os.environ["DATABASE_URL"]  # Raises KeyError if not set
 
-# If deploying to Railway, add connect_args for SSL if needed
-connect_args = {}
-if DATABASE_URL.startswith("postgresql://") and "railway" in DATABASE_URL:
-	connect_args = {"sslmode": "require"}
+# Connection pool and statement timeout, overridable per deployment
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds before a connection is replaced
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 disables it (Postgres only)
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "").lower() in ("1", "true", "yes")
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+def _engine_kwargs(url, async_driver=False):
+	"""Pool and connection settings for create_engine/create_async_engine from the DB_* env vars."""
+	raw_url, url = str(url), make_url(url)
+	kwargs = {"pool_pre_ping": True}
+	connect_args = {}
+	if url.get_backend_name() == "postgresql":
+		# If deploying to Railway, add connect_args for SSL if needed
+		if "railway" in raw_url:
+			connect_args["ssl" if async_driver else "sslmode"] = "require"
+		if DB_STATEMENT_TIMEOUT_MS:
+			if async_driver:
+				connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+			else:
+				connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+	# In-memory SQLite uses a single shared connection, not a sized pool
+	if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+		kwargs.update(
+			pool_size=DB_POOL_SIZE,
+			max_overflow=DB_MAX_OVERFLOW,
+			pool_timeout=DB_POOL_TIMEOUT,
+			pool_recycle=DB_POOL_RECYCLE,
+		)
+	kwargs["connect_args"] = connect_args
+	return kwargs
+
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+def get_db():
+	"""FastAPI dependency yielding one session per request, closed (and rolled back if uncommitted) afterwards."""
+	db = SessionLocal()
+	try:
+		yield db
+	finally:
+		db.close()
+
+def async_database_url(url):
+	"""The async driver equivalent of a sync DATABASE_URL (asyncpg for Postgres, aiosqlite for SQLite)."""
+	url = make_url(url)
+	driver = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}.get(url.get_backend_name())
+	if driver is None:
+		raise NotImplementedError(f"No async driver configured for {url.get_backend_name()}")
+	return url.set(drivername=driver)
+
+async_engine = None
+AsyncSessionLocal = None
+if USE_ASYNC_DB:
+	from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+	async_engine = create_async_engine(async_database_url(DATABASE_URL), **_engine_kwargs(DATABASE_URL, async_driver=True))
+	AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+	"""Async counterpart of get_db, available when USE_ASYNC_DB is set."""
+	async with AsyncSessionLocal() as db:
+		yield db
+
+def dialect_insert(bind, table):
+	"""Return an insert() for the bound dialect that supports on_conflict_do_nothing/do_update."""
+	if bind.dialect.name == "postgresql":
+		from sqlalchemy.dialects.postgresql import insert
+	elif bind.dialect.name == "sqlite":
+		from sqlalchemy.dialects.sqlite import insert
+	else:
+		raise NotImplementedError(f"Upserts are not supported on {bind.dialect.name}")
+	return insert(table)
@@ -1,8 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app import metrics
 from app.api import endpoints
+from app.db import USE_ASYNC_DB, SessionLocal, async_engine, engine
+from app.services import catalog, jobs
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Drain queued /submit jobs in this process unless INGEST_WORKERS=0 (separate `python -m app.cli worker` processes)
+    if jobs.INGEST_WORKERS > 0:
+        jobs.start_worker_pool(SessionLocal)
+    # Postgres: invalidate the exercise catalogue cache on NOTIFY instead of polling its version
+    catalog.start_version_listener(engine)
+    try:
+        yield
+    finally:
+        catalog.stop_version_listener()
+        jobs.stop_worker_pool()
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow requests from localhost:3000 (React dev server)
 app.add_middleware(
@@ -20,8 +37,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if USE_ASYNC_DB:
+    from app.api import async_endpoints
+    # Registered first so its routes take precedence over the sync ones with the same paths
+    app.include_router(async_endpoints.router)
 app.include_router(endpoints.router)
 
+# Route latency, per-request SQL counts and GET /metrics
+metrics.install(app, [engine] + ([async_engine.sync_engine] if async_engine is not None else []))
+
 @app.get("/")
 def read_root():
     return {"message": "Lifting Analytics API is running."}
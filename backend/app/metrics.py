@@ -0,0 +1,158 @@
+# Request instrumentation: route latency histograms, per-request SQL statement counts and timing spans, exported at /metrics
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+# Log a warning when one request runs more statements than this (a likely N+1 regression)
+SQL_WARN_STATEMENTS = int(os.getenv("SQL_WARN_STATEMENTS", "25"))
+# Add an X-Debug-Timing header (total, SQL and span timings) to every response
+DEBUG_TIMING = os.getenv("DEBUG_TIMING", "").lower() in ("1", "true", "yes")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ["method", "route", "status"]
+)
+SQL_STATEMENTS = Histogram(
+    "sql_statements_per_request", "SQL statements executed per request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100, 250, 1000),
+)
+SQL_SECONDS = Histogram("sql_seconds_per_request", "Time spent in SQL per request", ["route"])
+SQL_THRESHOLD_EXCEEDED = Counter(
+    "sql_statement_threshold_exceeded_total", "Requests that ran more than SQL_WARN_STATEMENTS statements", ["route"]
+)
+SPAN_SECONDS = Histogram("span_duration_seconds", "Duration of instrumented code spans", ["span"])
+
+
+class RequestStats:
+    """Counters for the request being served, shared by its worker threads through a context variable."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add_sql(self, seconds):
+        with self._lock:
+            self.statements += 1
+            self.sql_seconds += seconds
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def timing_header(self):
+        total = time.perf_counter() - self.started
+        parts = [f"total={total * 1000:.1f}ms", f"sql={self.statements}", f"sql_time={self.sql_seconds * 1000:.1f}ms"]
+        parts += [f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.spans.items()]
+        return "; ".join(parts)
+
+
+_request_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_stats():
+    """The RequestStats of the request being served, or None outside a request."""
+    return _request_stats.get()
+
+
+@contextmanager
+def span(name):
+    """Time a block into span_duration_seconds and, inside a request, its X-Debug-Timing header."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_SECONDS.labels(name).observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.add_span(name, elapsed)
+
+
+def instrument_engine(engine):
+    """Count statements and SQL time per request on engine (pass async_engine.sync_engine for async engines)."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.add_sql(time.perf_counter() - started)
+
+
+def _route_label(scope):
+    # The route template, not the raw path, so ids in paths do not explode the label set
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, SQL statistics and the optional X-Debug-Timing header per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if DEBUG_TIMING:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-debug-timing", stats.timing_header().encode("latin-1"))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            route = _route_label(scope)
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(time.perf_counter() - stats.started)
+            SQL_STATEMENTS.labels(route).observe(stats.statements)
+            SQL_SECONDS.labels(route).observe(stats.sql_seconds)
+            if stats.statements > SQL_WARN_STATEMENTS:
+                SQL_THRESHOLD_EXCEEDED.labels(route).inc()
+                logger.warning(
+                    "%s %s ran %d SQL statements (%.1f ms), more than SQL_WARN_STATEMENTS=%d",
+                    scope["method"], route, stats.statements, stats.sql_seconds * 1000, SQL_WARN_STATEMENTS,
+                )
+
+
+def metrics_endpoint(request: Request):
+    """Prometheus text exposition. With PROMETHEUS_MULTIPROC_DIR set, aggregates all worker processes."""
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def install(app, engines=()):
+    """Add the metrics middleware and GET /metrics to app, and count SQL on each engine."""
+    for engine in engines:
+        instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, desc
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, Text, desc, func
 from sqlalchemy.orm import relationship
 from .db import Base
 
@@ -13,7 +13,7 @@ class WorkoutSession(Base):
 class Exercise(Base):
     __tablename__ = "exercises"
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
+    name = Column(String, index=True, unique=True)
     equipment = Column(String)
     primary_muscle = Column(String)
     secondary_muscle = Column(String)
@@ -30,11 +30,105 @@ class Set(Base):
     exercise = relationship("Exercise", back_populates="sets")
     session = relationship("WorkoutSession", back_populates="sets")
 
+class PersonalRecord(Base):
+    """
+    Best set per exercise and metric, maintained incrementally on ingest.
+    metric is "weight" (heaviest set per exact rep_count), "volume" (highest weight * reps)
+    or "e1rm" (highest estimated 1RM); rep_count is 0 for the rep-independent metrics.
+    """
+    __tablename__ = "personal_records"
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), primary_key=True)
+    metric = Column(String, primary_key=True)
+    rep_count = Column(Integer, primary_key=True, default=0)
+    value = Column(Float)
+    set_id = Column(Integer, ForeignKey("sets.id"))
+    session_id = Column(Integer, ForeignKey("workout_sessions.id"))
+    achieved_at = Column(DateTime)
+    exercise = relationship("Exercise")
+    set = relationship("Set")
+
 def get_top_set_for_exercise(db, exercise_id):
     """Return the set with the highest weight * reps for a given exercise."""
+    top_set = (
+        db.query(Set)
+        .join(PersonalRecord, PersonalRecord.set_id == Set.id)
+        .filter(
+            PersonalRecord.exercise_id == exercise_id,
+            PersonalRecord.metric == "volume",
+            PersonalRecord.rep_count == 0,
+        )
+        .first()
+    )
+    if top_set is not None:
+        return top_set
+    # No record yet (e.g. sets written outside ingestion before rebuild-records), fall back to scanning the sets
     return (
         db.query(Set)
         .filter(Set.exercise_id == exercise_id)
         .order_by(desc(Set.weight * Set.reps))
         .first()
     )
+
+# Hot path indexes, see alembic/versions/add_hot_path_indexes.py
+HOT_PATH_INDEXES = (
+    Index("ix_sets_session_id_exercise_id", Set.session_id, Set.exercise_id),
+    Index("ix_sets_exercise_id_weight", Set.exercise_id, Set.weight.desc()),
+    Index("ix_sets_exercise_id_volume", Set.exercise_id, (Set.weight * Set.reps).self_group().desc()),
+    # NULLS LAST on Postgres (alembic/versions/sessions_nulls_last.py); SQLite already sorts NULLs last when descending
+    Index("ix_workout_sessions_date_id", WorkoutSession.date.desc(), WorkoutSession.id.desc()),
+    Index("ix_exercises_lower_primary_muscle", func.lower(Exercise.primary_muscle)),
+)
+
+class MuscleLastWorkout(Base):
+    """Summary of the latest session and its top set per lowercased primary muscle, maintained on ingest."""
+    __tablename__ = "muscle_last_workout"
+    muscle = Column(String, primary_key=True)
+    session_id = Column(Integer, ForeignKey("workout_sessions.id"), nullable=True)
+    set_id = Column(Integer, ForeignKey("sets.id"), nullable=True)
+    session_date = Column(DateTime, nullable=True)
+    session = relationship("WorkoutSession")
+    top_set = relationship("Set")
+
+class DataVersion(Base):
+    """Monotonic counters bumped whenever the data behind a group of read endpoints changes."""
+    __tablename__ = "data_versions"
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+class ExerciseDailyRollup(Base):
+    """Set totals per exercise and calendar day, maintained on ingest for charting (see services/rollups.py)."""
+    __tablename__ = "exercise_daily_rollups"
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    sets = Column(Integer, nullable=False, default=0)
+    reps = Column(Integer, nullable=False, default=0)
+    volume = Column(Float, nullable=False, default=0.0)
+    top_weight = Column(Float, nullable=False, default=0.0)
+    best_e1rm = Column(Float, nullable=False, default=0.0)
+
+class MuscleWeeklyRollup(Base):
+    """Set totals per lowercased primary muscle and ISO week (keyed by its Monday), maintained on ingest."""
+    __tablename__ = "muscle_weekly_rollups"
+    muscle = Column(String, primary_key=True)
+    week = Column(Date, primary_key=True)
+    sets = Column(Integer, nullable=False, default=0)
+    reps = Column(Integer, nullable=False, default=0)
+    volume = Column(Float, nullable=False, default=0.0)
+    top_weight = Column(Float, nullable=False, default=0.0)
+    best_e1rm = Column(Float, nullable=False, default=0.0)
+
+class IngestJob(Base):
+    """A submitted workout waiting for (or processed by) the ingestion workers, see services/jobs.py."""
+    __tablename__ = "ingest_jobs"
+    id = Column(Integer, primary_key=True)
+    idempotency_key = Column(String, unique=True, nullable=True)
+    payload_hash = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON list of workouts, each a list of exercises
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    session_ids = Column(Text, nullable=True)  # JSON list, set when done
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    __table_args__ = (Index("ix_ingest_jobs_status_id", "status", "id"),)
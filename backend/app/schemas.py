@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class SetBase(BaseModel):
     exercise_id: int
@@ -44,3 +44,17 @@ class WorkoutSession(WorkoutSessionBase):
     id: int
     class Config:
         orm_mode = True
+
+class SubmittedSet(BaseModel):
+    # The keys ingestion reads must be present; null is allowed (e.g. a bodyweight set has no weight)
+    model_config = ConfigDict(strict=True)
+    reps: Optional[int]
+    weight: Optional[float]
+    rpe: Optional[float] = None
+
+class SubmittedExercise(BaseModel):
+    """A normalized exercise as returned by the AI service's /query and sent to /submit."""
+    model_config = ConfigDict(strict=True)
+    name: str = Field(min_length=1)
+    sets: List[SubmittedSet]
+    location: Optional[str] = None
@@ -1,16 +1,412 @@
-# Analytics service: PRs, volume, trends
+# Analytics service: PRs, volume, trends, e1RM progression
+# Sets are pulled once into columnar NumPy arrays and every metric is computed with
+# grouped array operations rather than per-set Python loops. Results keep their series
+# as arrays (dates as datetime64[D]); to_python converts them for JSON responses.
+from datetime import date
+import numpy as np
+
+EPOCH = date(1970, 1, 1)
+
+# Rep maxes reported by detect_prs (1RM through 10RM)
+MAX_REP_MAX = 10
+
+
+def load_set_columns(db, exercise_id=None):
+    """
+    Load every dated set (optionally for one exercise) into columnar arrays with one query.
+    Returns a dict of arrays: weight, reps, rpe, day (days since 1970-01-01), session_id,
+    exercise_id, ordered by session date then session.
+    """
+    from sqlalchemy import select
+    from app.models import Set, WorkoutSession
+    stmt = (
+        select(Set.weight, Set.reps, Set.rpe, WorkoutSession.date, Set.session_id, Set.exercise_id)
+        .join(WorkoutSession, WorkoutSession.id == Set.session_id)
+        .where(WorkoutSession.date.isnot(None))
+        .order_by(WorkoutSession.date, Set.session_id, Set.id)
+    )
+    if exercise_id is not None:
+        stmt = stmt.where(Set.exercise_id == exercise_id)
+    rows = db.execute(stmt).all()
+    return columns_from_rows(rows)
+
+
+def exercise_id_by_name(db, name):
+    """Id of the exercise with this (case-insensitive) name, or None."""
+    from sqlalchemy import select
+    from app.models import Exercise
+    return db.execute(select(Exercise.id).where(Exercise.name == name.lower())).scalar()
+
+
+def columns_from_rows(rows):
+    """Build set columns from (weight, reps, rpe, date, session_id, exercise_id) tuples."""
+    if not rows:
+        return empty_columns()
+    weight, reps, rpe, dates, session_id, exercise_id = zip(*rows)
+    days = np.array([d.toordinal() for d in dates], dtype=np.int64) - EPOCH.toordinal()
+    return {
+        "weight": np.nan_to_num(np.array(weight, dtype=np.float64)),
+        "reps": np.nan_to_num(np.array(reps, dtype=np.float64)).astype(np.int64),
+        "rpe": np.array(rpe, dtype=np.float64),
+        "day": days,
+        "session_id": np.array(session_id, dtype=np.int64),
+        "exercise_id": np.array(exercise_id, dtype=np.int64),
+    }
+
+
+def empty_columns():
+    return {
+        "weight": np.zeros(0, dtype=np.float64),
+        "reps": np.zeros(0, dtype=np.int64),
+        "rpe": np.zeros(0, dtype=np.float64),
+        "day": np.zeros(0, dtype=np.int64),
+        "session_id": np.zeros(0, dtype=np.int64),
+        "exercise_id": np.zeros(0, dtype=np.int64),
+    }
+
+
+def _as_columns(sets):
+    """Accept set columns or a list of Set rows (with their session loaded)."""
+    if isinstance(sets, dict):
+        return sets
+    dated = [s for s in sets if s.session is not None and s.session.date is not None]
+    dated.sort(key=lambda s: (s.session.date, s.session_id, s.id))
+    return columns_from_rows([
+        (s.weight, s.reps, s.rpe, s.session.date, s.session_id, s.exercise_id) for s in dated
+    ])
+
+
+def estimate_1rm(weight, reps, formula="epley"):
+    """Estimated one rep max for arrays of weight and reps (Epley or Brzycki)."""
+    weight = np.asarray(weight, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.float64)
+    if formula == "epley":
+        e1rm = weight * (1 + reps / 30.0)
+    elif formula == "brzycki":
+        # Brzycki diverges at 37 reps, cap the divisor so high-rep sets stay finite
+        e1rm = weight * 36.0 / np.maximum(37.0 - reps, 1.0)
+    else:
+        raise ValueError(f"Unknown 1RM formula: {formula}")
+    # A single is its own 1RM and sets without reps estimate nothing
+    e1rm = np.where(reps == 1, weight, e1rm)
+    return np.where(reps > 0, e1rm, 0.0)
+
+
+def _as_dates(days):
+    return np.asarray(days).astype("datetime64[D]")
+
+
+def _group_starts(keys):
+    """Start offsets of each run of equal values in a sorted key array."""
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+
+
+def _group_ends(starts, n):
+    return np.append(starts[1:], n).astype(np.int64)
+
+
+def _grouped_running_max(values, starts):
+    """
+    Running max of values that restarts at every group, for values sorted by group with
+    groups beginning at starts. Values are replaced by their integer ranks and each group
+    is lifted above all earlier ones by a constant offset, so a single maximum.accumulate
+    never carries a max across a group boundary. Working on ranks keeps the result exact:
+    float offsets would round, and ties would then look like improvements.
+    """
+    if len(values) == 0:
+        return values
+    distinct, rank = np.unique(values, return_inverse=True)
+    group = np.zeros(len(values), dtype=np.int64)
+    group[starts[1:]] = 1
+    offset = np.cumsum(group) * len(distinct)
+    return distinct[np.maximum.accumulate(rank.reshape(-1) + offset) - offset]
+
+
+def _grouped_rolling_mean(values, starts, window):
+    """Trailing mean over up to window values, restarting at every group start."""
+    n = len(values)
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    idx = np.arange(1, n + 1)
+    group_start = np.repeat(starts, _group_ends(starts, n) - starts)
+    lo = np.maximum(idx - window, group_start)
+    return (csum[idx] - csum[lo]) / (idx - lo)
+
+
+def _exercise_order(exercise_id):
+    """Stable order grouping sets by exercise while keeping them chronological."""
+    # Small integer keys let NumPy use a linear-time radix sort
+    if len(exercise_id) and exercise_id.min() >= 0 and exercise_id.max() < 2 ** 16:
+        exercise_id = exercise_id.astype(np.uint16)
+    return np.argsort(exercise_id, kind="stable")
+
+
+def detect_prs(sets, max_reps=MAX_REP_MAX):
+    """
+    Detect personal records from sets.
+    Returns a dict keyed by exercise id with rep maxes (best weight lifted for at least
+    N reps, N = 1..max_reps), the best estimated 1RM and the chronological PR events
+    (sets that raised the exercise's best e1RM) as parallel arrays.
+    """
+    cols = _as_columns(sets)
+    if len(cols["weight"]) == 0:
+        return {}
+    # Stable sort by exercise keeps each exercise's sets in chronological order
+    order = _exercise_order(cols["exercise_id"])
+    ex = cols["exercise_id"][order]
+    weight, reps = cols["weight"][order], cols["reps"][order]
+    e1rm = estimate_1rm(weight, reps)
+    starts = _group_starts(ex)
+    ends = _group_ends(starts, len(ex))
+
+    # Best weight per (exercise, rep count), with rep counts above max_reps folded into
+    # max_reps, then a reverse running max turns "exactly N reps" into "at least N reps"
+    group = np.repeat(np.arange(len(starts)), ends - starts)
+    best_by_reps = np.full((len(starts), max_reps + 1), -np.inf)
+    np.maximum.at(best_by_reps.reshape(-1), group * (max_reps + 1) + np.clip(reps, 0, max_reps), weight)
+    rep_maxes = np.maximum.accumulate(best_by_reps[:, :0:-1], axis=1)[:, ::-1]
+    best_e1rm = np.maximum.reduceat(e1rm, starts)
+
+    # A set is a PR event when it beats every earlier set of the same exercise
+    running = _grouped_running_max(e1rm, starts)
+    previous = np.concatenate(([-np.inf], running[:-1]))
+    previous[starts] = -np.inf
+    pr = np.flatnonzero((e1rm > previous) & (e1rm > 0))
+    pr_bounds = np.searchsorted(pr, np.append(starts, len(ex)))
+    pr_dates = _as_dates(cols["day"][order[pr]])
+    pr_sessions = cols["session_id"][order[pr]]
+
+    result = {}
+    for g, exercise_id in enumerate(ex[starts].tolist()):
+        lo, hi = pr_bounds[g], pr_bounds[g + 1]
+        events = pr[lo:hi]
+        result[exercise_id] = {
+            "rep_maxes": {n + 1: float(w) for n, w in enumerate(rep_maxes[g]) if np.isfinite(w)},
+            "e1rm": float(best_e1rm[g]),
+            "pr_events": {
+                "date": pr_dates[lo:hi],
+                "session_id": pr_sessions[lo:hi],
+                "weight": weight[events],
+                "reps": reps[events],
+                "e1rm": e1rm[events],
+            },
+        }
+    return result
 
-def detect_prs(sets):
-    """Detect personal records from sets."""
-    # TODO: Implement PR detection logic
-    pass
 
 def calculate_volume(sets):
-    """Calculate total volume from sets."""
-    # TODO: Implement volume calculation
-    pass
-
-def compute_trends(sets):
-    """Compute moving averages, plateaus, etc."""
-    # TODO: Implement trend analysis
-    pass
+    """
+    Calculate total volume (weight * reps) from sets, also broken down per session and
+    per ISO week (weeks start on Monday) as parallel arrays.
+    """
+    cols = _as_columns(sets)
+    volume = cols["weight"] * cols["reps"]
+    reps = cols["reps"]
+
+    # Sets arrive ordered by (date, session) so sessions and weeks are contiguous runs
+    session_starts = _group_starts(cols["session_id"])
+    # 1970-01-01 was a Thursday, shift by 3 days so weeks start on Monday
+    week = (cols["day"] + 3) // 7
+    week_starts = _group_starts(week)
+
+    def grouped(starts):
+        if len(starts) == 0:
+            return np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return (
+            np.add.reduceat(volume, starts),
+            _group_ends(starts, len(volume)) - starts,
+            np.add.reduceat(reps, starts),
+        )
+
+    session_volume, session_sets, session_reps = grouped(session_starts)
+    week_volume, week_sets, week_reps = grouped(week_starts)
+    return {
+        "total_volume": float(volume.sum()),
+        "sessions": {
+            "session_id": cols["session_id"][session_starts],
+            "date": _as_dates(cols["day"][session_starts]),
+            "volume": session_volume,
+            "sets": session_sets,
+            "reps": session_reps,
+        },
+        "weeks": {
+            "week_start": _as_dates(week[week_starts] * 7 - 3),
+            "volume": week_volume,
+            "sets": week_sets,
+            "reps": week_reps,
+        },
+    }
+
+
+def session_best_e1rm(cols, formula="epley"):
+    """Best estimated 1RM per session for sets sorted by (date, session). Returns (days, session_ids, e1rm)."""
+    e1rm = estimate_1rm(cols["weight"], cols["reps"], formula)
+    starts = _group_starts(cols["session_id"])
+    if len(starts) == 0:
+        return cols["day"][:0], cols["session_id"][:0], e1rm[:0]
+    return cols["day"][starts], cols["session_id"][starts], np.maximum.reduceat(e1rm, starts)
+
+
+def _grouped_tail_slope(x, y, starts, ends, window):
+    """Least-squares slope of y over x for the last window points of every group."""
+    counts = np.minimum(ends - starts, window)
+    idx = ends[:, None] - window + np.arange(window)[None, :]
+    valid = idx >= (ends - counts)[:, None]
+    idx = np.where(valid, idx, ends[:, None] - 1)
+    # Center x on each group's last point to keep the sums well conditioned
+    xs = np.where(valid, x[idx] - x[ends - 1][:, None], 0.0)
+    ys = np.where(valid, y[idx], 0.0)
+    sx, sy = xs.sum(axis=1), ys.sum(axis=1)
+    denom = counts * (xs * xs).sum(axis=1) - sx * sx
+    numer = counts * (xs * ys).sum(axis=1) - sx * sy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denom > 0, numer / denom, 0.0)
+
+
+def compute_trends(sets, window=4, plateau_sessions=6):
+    """
+    Compute moving averages, plateaus, etc. of the per-session best e1RM of each exercise.
+    An exercise is plateaued when its best e1RM has not improved for plateau_sessions sessions.
+    """
+    cols = _as_columns(sets)
+    if len(cols["weight"]) == 0:
+        return {}
+    order = _exercise_order(cols["exercise_id"])
+    ex = cols["exercise_id"][order]
+    session = cols["session_id"][order]
+    e1rm = estimate_1rm(cols["weight"], cols["reps"])[order]
+
+    # One point per (exercise, session): the session's best e1RM for that exercise
+    point_starts = np.concatenate(([0], np.flatnonzero((ex[1:] != ex[:-1]) | (session[1:] != session[:-1])) + 1))
+    best = np.maximum.reduceat(e1rm, point_starts)
+    point_ex = ex[point_starts]
+    point_day = cols["day"][order[point_starts]]
+    point_session = session[point_starts]
+
+    starts = _group_starts(point_ex)
+    ends = _group_ends(starts, len(best))
+    running_best = _grouped_running_max(best, starts)
+    moving_average = _grouped_rolling_mean(best, starts, window)
+    slope_per_week = _grouped_tail_slope(point_day.astype(np.float64), best, starts, ends, window) * 7
+
+    # Index of the last point that raised each exercise's best
+    improved = np.ones(len(best), dtype=bool)
+    improved[1:] = running_best[1:] > running_best[:-1]
+    improved[starts] = True
+    last_pr = np.maximum.accumulate(np.where(improved, np.arange(len(best)), 0))[ends - 1]
+    sessions_since_pr = ends - 1 - last_pr
+
+    point_dates = _as_dates(point_day)
+    result = {}
+    for g, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        result[int(point_ex[start])] = {
+            "dates": point_dates[start:end],
+            "session_ids": point_session[start:end],
+            "e1rm": best[start:end],
+            "moving_average": moving_average[start:end],
+            "best_e1rm": float(running_best[end - 1]),
+            "sessions_since_pr": int(sessions_since_pr[g]),
+            "plateau": bool(sessions_since_pr[g] >= plateau_sessions),
+            "slope_per_week": float(slope_per_week[g]),
+        }
+    return result
+
+
+def _lttb_edges(n, threshold):
+    """Bucket boundaries for LTTB: threshold - 2 buckets over the points between the first and the last."""
+    every = (n - 2) / (threshold - 2)
+    return np.append(np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1, n)
+
+
+def lttb(x, y, threshold):
+    """
+    Indices of the threshold points Largest-Triangle-Three-Buckets keeps from the series
+    (x ascending). The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previous kept point and the mean of the
+    next bucket, which preserves the visual shape including peaks.
+    """
+    n = len(x)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError("LTTB needs a threshold of at least 3 points")
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = _lttb_edges(n, threshold)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(x, y, threshold):
+    """
+    lttb indices, additionally guaranteeing that the highest y (the all-time best) is kept
+    by letting it replace the choice of its bucket.
+    """
+    selected = lttb(x, y, threshold)
+    if len(selected) == len(y):
+        return selected
+    peak = int(np.argmax(y))
+    if peak not in selected:
+        bucket = int(np.searchsorted(_lttb_edges(len(y), threshold), peak, side="right")) - 1
+        selected[bucket + 1] = peak
+    return selected
+
+
+def progression(sets, formula="epley", max_points=None):
+    """
+    Per-session best estimated 1RM of one exercise's sets, oldest first, downsampled with
+    LTTB to at most max_points. pr marks sessions that raised the running best.
+    """
+    cols = _as_columns(sets)
+    days, session_ids, e1rm = session_best_e1rm(cols, formula)
+    pr = np.ones(len(e1rm), dtype=bool)
+    if len(e1rm) > 1:
+        pr[1:] = e1rm[1:] > np.maximum.accumulate(e1rm)[:-1]
+    keep = np.arange(len(e1rm)) if max_points is None else downsample(days, e1rm, max_points)
+    return {
+        "formula": formula,
+        "sessions": int(len(e1rm)),
+        "best_e1rm": float(e1rm.max()) if len(e1rm) else None,
+        "dates": _as_dates(days[keep]),
+        "session_ids": session_ids[keep],
+        "e1rm": e1rm[keep],
+        "pr": pr[keep],
+    }
+
+
+def _iso_dates(dates):
+    """Format a datetime64[D] array as a list of ISO date strings."""
+    if len(dates) == 0:
+        return []
+    days = dates.astype(np.int64)
+    first, last = days.min(), days.max()
+    if last - first + 1 >= len(days):
+        return dates.astype(str).tolist()
+    # Long series repeat the same days many times, format each calendar day only once
+    table = np.arange(first, last + 1).astype("datetime64[D]").astype(str).astype(object)
+    return table[days - first].tolist()
+
+
+def to_python(result):
+    """Convert analytics results (nested dicts of NumPy arrays) into JSON-serializable values."""
+    if isinstance(result, dict):
+        return {k: to_python(v) for k, v in result.items()}
+    if isinstance(result, (list, tuple)):
+        return [to_python(v) for v in result]
+    if isinstance(result, np.ndarray):
+        if np.issubdtype(result.dtype, np.datetime64):
+            return _iso_dates(result)
+        return result.tolist()
+    if isinstance(result, np.generic):
+        return result.item()
+    return result
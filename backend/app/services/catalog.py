@@ -0,0 +1,165 @@
+# Catalogue service: the exercises table cached per process, so ingestion resolves known names without querying
+import logging
+import os
+import select as selectors
+import threading
+import time
+import weakref
+from prometheus_client import Counter
+from sqlalchemy import select
+from app.models import Exercise
+from app.services.versions import EXERCISES, NOTIFY_CHANNEL, get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the exercises data version when no LISTEN/NOTIFY listener is running
+EXERCISE_CACHE_POLL_SECONDS = float(os.getenv("EXERCISE_CACHE_POLL_SECONDS", "5"))
+
+CACHE_LOOKUPS = Counter("exercise_cache_lookups_total", "Exercise names resolved through the catalogue cache", ["result"])
+CACHE_RELOADS = Counter("exercise_cache_reloads_total", "Full reloads of the exercise catalogue cache")
+
+CATALOG_COLUMNS = (Exercise.id, Exercise.name, Exercise.equipment, Exercise.primary_muscle, Exercise.secondary_muscle)
+
+
+class ExerciseCatalog:
+    """
+    The exercises table in memory, keyed by name. It is small, so it is reloaded whole when
+    the exercises data version changes. The version is read at most every poll_seconds, or,
+    while a Postgres listener is running, only after a NOTIFY for it.
+    Serving a slightly stale catalogue is safe for ingestion: ids of existing exercises never
+    change, and names missing from it fall through to the database.
+    """
+
+    def __init__(self, poll_seconds=EXERCISE_CACHE_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.listening = False
+        self._rows = None
+        self._version = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Re-check the version on the next lookup."""
+        self._stale = True
+
+    def _needs_check(self):
+        if self._rows is None or self._stale:
+            return True
+        return not self.listening and time.monotonic() - self._checked_at >= self.poll_seconds
+
+    def _refresh(self, db):
+        with self._lock:
+            if not self._needs_check():
+                return
+            # Cleared before reading, so an invalidation arriving meanwhile triggers another check
+            self._stale = False
+            version = get_data_version(db, EXERCISES)
+            if self._rows is None or version != self._version:
+                self._rows = {r.name: r for r in db.execute(select(*CATALOG_COLUMNS))}
+                self._version = version
+                CACHE_RELOADS.inc()
+            self._checked_at = time.monotonic()
+
+    def lookup(self, db, names):
+        """Rows (id, name, equipment, primary_muscle, secondary_muscle) of the cached names among names."""
+        if self._needs_check():
+            self._refresh(db)
+        rows = self._rows
+        found = {name: rows[name] for name in names if name in rows}
+        if found:
+            CACHE_LOOKUPS.labels("hit").inc(len(found))
+        if len(found) < len(names):
+            CACHE_LOOKUPS.labels("miss").inc(len(names) - len(found))
+        return found
+
+
+# One catalogue per engine, since a process may talk to several databases (e.g. the benchmarks)
+_catalogs = weakref.WeakKeyDictionary()
+_catalogs_lock = threading.Lock()
+
+
+def catalog_for(bind):
+    """The ExerciseCatalog of bind's engine (a Session's get_bind(): an Engine or a Connection)."""
+    engine = bind.engine
+    catalog = _catalogs.get(engine)
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.get(engine)
+            if catalog is None:
+                catalog = _catalogs[engine] = ExerciseCatalog()
+    return catalog
+
+
+class VersionListener:
+    """
+    LISTEN on the data versions channel over a dedicated psycopg2 connection, invalidating
+    the engine's exercise catalogue on each exercises bump. Reconnects after errors; while
+    disconnected the catalogue falls back to polling.
+    """
+
+    def __init__(self, engine, reconnect_seconds=5.0):
+        self.engine = engine
+        self.catalog = catalog_for(engine)
+        self.reconnect_seconds = reconnect_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="data-version-listener", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Data version listener failed, polling until it reconnects")
+            self.catalog.listening = False
+            self._stop.wait(self.reconnect_seconds)
+
+    def _listen(self):
+        conn = self.engine.raw_connection()
+        try:
+            dbapi_conn = conn.driver_connection
+            dbapi_conn.autocommit = True
+            with dbapi_conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            # Bumps committed before LISTEN took effect were not notified
+            self.catalog.invalidate()
+            self.catalog.listening = True
+            while not self._stop.is_set():
+                if not selectors.select([dbapi_conn], [], [], 1.0)[0]:
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    if dbapi_conn.notifies.pop(0).payload == EXERCISES:
+                        self.catalog.invalidate()
+        finally:
+            # Not returned to the pool: it is in autocommit mode and still listening
+            conn.invalidate()
+
+
+_listener = None
+
+
+def start_version_listener(engine):
+    """Start the LISTEN/NOTIFY invalidation thread on Postgres (psycopg2); no-op elsewhere."""
+    global _listener
+    if engine.dialect.driver != "psycopg2" or _listener is not None:
+        return None
+    _listener = VersionListener(engine).start()
+    return _listener
+
+
+def stop_version_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,314 @@
+# History service: read-side queries for workout sessions
+import os
+from datetime import datetime
+from sqlalchemy import and_, delete, desc, func, or_, select
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import Exercise, MuscleLastWorkout, Set, WorkoutSession
+from app.services.versions import bump_data_version
+
+# Serve /workouts/last-workout-by-muscle from the muscle_last_workout summary table
+USE_MUSCLE_SUMMARY = os.getenv("USE_MUSCLE_SUMMARY", "false").lower() in ("1", "true", "yes")
+
+
+def parse_cursor(cursor: str):
+    """Parse a keyset cursor of the form '<iso date or null>,<session id>'."""
+    try:
+        date_str, session_id = cursor.rsplit(",", 1)
+        return (None if date_str == "null" else datetime.fromisoformat(date_str)), int(session_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def make_cursor(session):
+    """Build the keyset cursor pointing just past the given session."""
+    date_str = session.date.isoformat() if session.date is not None else "null"
+    return f"{date_str},{session.id}"
+
+
+def sessions_query(before=None, limit=None):
+    """
+    Build the select for sessions ordered by (date, id) descending, undated sessions
+    last, with their sets and exercises eager loaded so the whole page costs a constant
+    number of statements regardless of history length.
+    before: optional (date, id) tuple, only sessions after it in that order are returned;
+    date is None for a cursor inside the undated sessions
+    """
+    stmt = (
+        select(WorkoutSession)
+        .options(selectinload(WorkoutSession.sets).selectinload(Set.exercise))
+        # Explicit, since Postgres sorts NULLs first in descending order and SQLite last
+        .order_by(desc(WorkoutSession.date).nulls_last(), desc(WorkoutSession.id))
+    )
+    if before is not None:
+        before_date, before_id = before
+        if before_date is None:
+            stmt = stmt.where(WorkoutSession.date.is_(None), WorkoutSession.id < before_id)
+        else:
+            stmt = stmt.where(
+                or_(
+                    WorkoutSession.date < before_date,
+                    and_(WorkoutSession.date == before_date, WorkoutSession.id < before_id),
+                    WorkoutSession.date.is_(None),
+                )
+            )
+    if limit is not None:
+        # Fetch one extra row to know whether another page exists
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def serialize_set(s):
+    exercise = s.exercise
+    return {
+        "exercise": exercise.name if exercise else None,
+        "equipment": exercise.equipment if exercise else None,
+        "primaryMuscle": exercise.primary_muscle if exercise else None,
+        "secondaryMuscle": exercise.secondary_muscle if exercise else None,
+        "weight": s.weight,
+        "reps": s.reps,
+        "rpe": getattr(s, "rpe", None),
+        "timestamp": s.timestamp.isoformat() if getattr(s, "timestamp", None) else None
+    }
+
+
+def serialize_session(session):
+    return {
+        "id": session.id,
+        "date": session.date.isoformat() if session.date else None,
+        "location": session.location,
+        "sets": [serialize_set(s) for s in sorted(session.sets, key=lambda s: s.id)]
+    }
+
+
+def serialize_sessions_columnar(sessions):
+    """
+    Dictionary-encoded form of a page of sessions: each distinct exercise is sent once,
+    sessions and sets as parallel arrays. The sets of session j are the indexes
+    setOffsets[j] to setOffsets[j + 1], and sets.exercise holds an index into exercises
+    (None for sets without an exercise). Sets carry no timestamp, so it is omitted.
+    """
+    exercise_index = {}
+    exercises = {"name": [], "equipment": [], "primaryMuscle": [], "secondaryMuscle": []}
+    columns = {"id": [], "date": [], "location": [], "setOffsets": [0]}
+    sets = {"exercise": [], "weight": [], "reps": [], "rpe": []}
+    for session in sessions:
+        columns["id"].append(session.id)
+        columns["date"].append(session.date.isoformat() if session.date else None)
+        columns["location"].append(session.location)
+        for s in sorted(session.sets, key=lambda s: s.id):
+            exercise = s.exercise
+            index = None
+            if exercise is not None:
+                index = exercise_index.get(exercise.id)
+                if index is None:
+                    index = exercise_index[exercise.id] = len(exercise_index)
+                    exercises["name"].append(exercise.name)
+                    exercises["equipment"].append(exercise.equipment)
+                    exercises["primaryMuscle"].append(exercise.primary_muscle)
+                    exercises["secondaryMuscle"].append(exercise.secondary_muscle)
+            sets["exercise"].append(index)
+            sets["weight"].append(s.weight)
+            sets["reps"].append(s.reps)
+            sets["rpe"].append(s.rpe)
+        columns["setOffsets"].append(len(sets["exercise"]))
+    return {"exercises": exercises, "sessions": columns, "sets": sets}
+
+
+def build_sessions_page(sessions, limit=None, columnar=False):
+    """
+    Serialize a page of sessions and compute the cursor for the next page.
+    columnar: use the dictionary-encoded layout of serialize_sessions_columnar
+    """
+    next_cursor = None
+    if limit is not None and len(sessions) > limit:
+        sessions = sessions[:limit]
+        next_cursor = make_cursor(sessions[-1])
+    if columnar:
+        return {"format": "columnar", **serialize_sessions_columnar(sessions), "next_cursor": next_cursor}
+    return {
+        "sessions": [serialize_session(s) for s in sessions],
+        "next_cursor": next_cursor
+    }
+
+
+def get_sessions(db, before=None, limit=None, columnar=False):
+    """
+    Get workout sessions with their exercises and sets, newest first.
+    before: optional keyset cursor string returned as next_cursor by a previous page
+    limit: optional page size, all sessions are returned when omitted
+    columnar: return the dictionary-encoded layout instead of one object per set
+    """
+    cursor = parse_cursor(before) if before else None
+    sessions = db.execute(sessions_query(cursor, limit)).scalars().all()
+    return build_sessions_page(sessions, limit, columnar)
+
+
+EMPTY_MUSCLE_ENTRY = {
+    "session_date": None,
+    "location": None,
+    "exercise": None,
+    "equipment": None,
+    "primary_muscle": None,
+    "secondary_muscle": None,
+    "top_set": None
+}
+
+
+def _muscle_entry(session_date, location, exercise, top_set):
+    """Build one last-workout-by-muscle entry from an exercise and set, each ORM object or row."""
+    if session_date is None or exercise is None or top_set is None:
+        return dict(EMPTY_MUSCLE_ENTRY)
+    return {
+        "session_date": session_date,
+        "location": location,
+        "exercise": exercise.name,
+        "equipment": exercise.equipment,
+        "primary_muscle": exercise.primary_muscle,
+        "secondary_muscle": exercise.secondary_muscle,
+        "top_set": {"weight": top_set.weight, "reps": top_set.reps, "rpe": top_set.rpe}
+    }
+
+
+def latest_set_per_muscle_query():
+    """
+    Rank every set per lowercased primary muscle so that row 1 is the heaviest set of
+    the most recent dated session. Exercises without dated sets still get a row 1
+    (with a NULL date) so every known muscle group is reported.
+    """
+    rn = func.row_number().over(
+        partition_by=func.lower(Exercise.primary_muscle),
+        order_by=(
+            WorkoutSession.date.is_(None),
+            WorkoutSession.date.desc(),
+            WorkoutSession.id.desc(),
+            Set.weight.desc(),
+            Set.id.desc(),
+        ),
+    ).label("rn")
+    ranked = (
+        select(
+            func.lower(Exercise.primary_muscle).label("muscle"),
+            Exercise.name,
+            Exercise.equipment,
+            Exercise.primary_muscle,
+            Exercise.secondary_muscle,
+            WorkoutSession.id.label("session_id"),
+            WorkoutSession.date.label("session_date"),
+            WorkoutSession.location,
+            Set.id.label("set_id"),
+            Set.weight,
+            Set.reps,
+            Set.rpe,
+            rn,
+        )
+        .select_from(Exercise)
+        .outerjoin(Set, Set.exercise_id == Exercise.id)
+        .outerjoin(WorkoutSession, WorkoutSession.id == Set.session_id)
+        .where(Exercise.primary_muscle.isnot(None), Exercise.primary_muscle != "")
+        .subquery()
+    )
+    return select(ranked).where(ranked.c.rn == 1)
+
+
+def _last_workout_from_window(db):
+    result = {}
+    for r in db.execute(latest_set_per_muscle_query()).all():
+        result[r.muscle] = _muscle_entry(r.session_date, r.location, r, r if r.set_id is not None else None)
+    return result
+
+
+def _last_workout_from_summary(db):
+    rows = db.execute(
+        select(MuscleLastWorkout).options(
+            joinedload(MuscleLastWorkout.session),
+            joinedload(MuscleLastWorkout.top_set).joinedload(Set.exercise),
+        )
+    ).scalars()
+    result = {}
+    for row in rows:
+        top_set = row.top_set
+        result[row.muscle] = _muscle_entry(
+            row.session_date,
+            row.session.location if row.session else None,
+            top_set.exercise if top_set else None,
+            top_set,
+        )
+    return result
+
+
+def get_last_workout_by_muscle(db, use_summary=None):
+    """
+    Get the most recent workout session for each muscle group and its top set by weight.
+    use_summary: read the maintained muscle_last_workout table instead of ranking all sets,
+    defaults to the USE_MUSCLE_SUMMARY setting
+    """
+    if use_summary is None:
+        use_summary = USE_MUSCLE_SUMMARY
+    if use_summary:
+        return _last_workout_from_summary(db)
+    return _last_workout_from_window(db)
+
+
+def update_muscle_last_workout(db, session_ids):
+    """
+    Fold newly ingested sessions into the muscle_last_workout summary. Must be called after
+    their sets are inserted and before the ingest transaction commits.
+    """
+    if not session_ids:
+        return
+    new_sets = db.execute(
+        select(Set.id, Set.session_id, Set.weight, WorkoutSession.date, Exercise.primary_muscle)
+        .join(WorkoutSession, WorkoutSession.id == Set.session_id)
+        .join(Exercise, Exercise.id == Set.exercise_id)
+        .where(Set.session_id.in_(session_ids))
+    ).all()
+
+    # Per muscle keep the heaviest set of the latest (date, session id), matching the window query
+    def rank(s):
+        dated = s.date is not None
+        return (dated, s.date if dated else datetime.min, s.session_id, s.weight or 0, s.id)
+
+    best_by_muscle = {}
+    for s in new_sets:
+        if not s.primary_muscle:
+            continue
+        muscle = s.primary_muscle.lower()
+        current = best_by_muscle.get(muscle)
+        if current is None or rank(s) > rank(current):
+            best_by_muscle[muscle] = s
+    if not best_by_muscle:
+        return
+
+    existing = {
+        row.muscle: row for row in db.execute(
+            select(MuscleLastWorkout).where(MuscleLastWorkout.muscle.in_(list(best_by_muscle)))
+        ).scalars()
+    }
+    for muscle, best in best_by_muscle.items():
+        row = existing.get(muscle)
+        if row is None:
+            row = MuscleLastWorkout(muscle=muscle)
+            db.add(row)
+        if best.date is None:
+            # Undated sessions never become the latest workout, the muscle is just registered
+            continue
+        if row.session_date is not None and (row.session_date, row.session_id) > (best.date, best.session_id):
+            continue
+        row.session_id = best.session_id
+        row.set_id = best.id
+        row.session_date = best.date
+
+
+def rebuild_muscle_last_workout(db):
+    """Recompute the muscle_last_workout summary from the full set history."""
+    db.execute(delete(MuscleLastWorkout))
+    for r in db.execute(latest_set_per_muscle_query()).all():
+        dated = r.session_date is not None
+        db.add(MuscleLastWorkout(
+            muscle=r.muscle,
+            session_id=r.session_id if dated else None,
+            set_id=r.set_id if dated else None,
+            session_date=r.session_date,
+        ))
+    bump_data_version(db)
+    db.commit()
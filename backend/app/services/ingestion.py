@@ -1,59 +1,350 @@
 # Ingestion service: CSV/JSON parsing, exercise normalization
+from datetime import datetime, timezone
+
+# Column names used by common exports (Strong, Hevy and plain logs), matched case-insensitively
+LOG_COLUMNS = {
+    "date": ("date", "start_time", "session_date"),
+    "workout": ("workout name", "title", "workout"),
+    "location": ("location", "gym"),
+    "exercise": ("exercise name", "exercise_title", "exercise", "name"),
+    "weight": ("weight", "weight_kg", "weight_lbs"),
+    "reps": ("reps",),
+    "rpe": ("rpe",),
+}
+
+LOG_DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%d %b %Y, %H:%M", "%Y-%m-%d")
+
+# Sessions per transaction when importing logs
+IMPORT_BATCH_SIZE = 500
+
+# Use COPY instead of executemany for set inserts at or above this many rows on Postgres
+COPY_THRESHOLD = 1000
+
+def _read_log_rows(lines, fmt):
+    """Yield one dict per set row from an open text stream of CSV or JSON Lines."""
+    import csv
+    import json
+    if fmt == "csv":
+        yield from csv.DictReader(lines)
+    else:
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def _log_field(row, field):
+    for column in LOG_COLUMNS[field]:
+        for key in (column, column.title(), column.upper()):
+            value = row.get(key)
+            if value not in (None, ""):
+                return value
+    return None
+
+def _parse_log_date(value):
+    try:
+        return _parse_date(value)
+    except ValueError:
+        pass
+    for fmt in LOG_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {value!r}")
+
+def parse_workout_rows(lines, fmt="csv"):
+    """
+    Stream workouts out of exported log rows.
+    A session is a run of consecutive rows with the same date and workout name, as exports
+    write them, so only the current session is held in memory. Rows of one session that
+    are not contiguous in the file are imported as separate sessions; sort such files by
+    date first. Each distinct exercise name is normalized once (see normalize_exercise_name).
+    Yields (workout, row_count) where workout is a list of exercises as accepted by ingest_workout.
+    """
+    normalized_names = {}
+    current_key = None
+    current = None
+    row_count = 0
+    for row in _read_log_rows(lines, fmt):
+        row_count += 1
+        raw_name = _log_field(row, "exercise")
+        reps = _log_field(row, "reps")
+        weight = _log_field(row, "weight")
+        if not raw_name or reps is None:
+            # Cardio, rest timers and notes rows have no reps to record
+            continue
+        date = _log_field(row, "date")
+        key = (date, _log_field(row, "workout"))
+        if key != current_key:
+            if current:
+                yield list(current.values()), row_count - 1
+                row_count = 1
+            current_key = key
+            current = {}
+        normalized = normalized_names.get(raw_name)
+        if normalized is None:
+            normalized = normalized_names[raw_name] = normalize_exercise_name(raw_name.strip())
+        exercise = current.get(normalized["name"])
+        if exercise is None:
+            exercise = current[normalized["name"]] = {
+                **normalized,
+                "date": _parse_log_date(date) if date else None,
+                "location": _log_field(row, "location"),
+                "sets": [],
+            }
+        rpe = _log_field(row, "rpe")
+        exercise["sets"].append({
+            "reps": int(float(reps)),
+            "weight": float(weight) if weight is not None else 0.0,
+            "rpe": float(rpe) if rpe is not None else None,
+        })
+    if current:
+        yield list(current.values()), row_count
 
 def parse_workout_log(file_path: str):
-    """Parse CSV/JSON workout log and return structured data."""
-    # TODO: Implement parsing logic
-    pass
+    """Parse a CSV or JSON Lines workout log, yielding one workout at a time."""
+    fmt = "csv" if file_path.lower().endswith(".csv") else "json"
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        for workout, _ in parse_workout_rows(f, fmt):
+            yield workout
+
+def iter_import_batches(lines, fmt="csv", batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import a streamed workout log, committing every batch_size sessions.
+    Yields a running stats dict (rows, sessions, seconds, rows_per_sec) after each batch.
+    """
+    import time
+    from app.db import SessionLocal
+    stats = {"rows": 0, "sessions": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+    started = time.perf_counter()
+
+    def flush(batch, batch_rows):
+        db = SessionLocal()
+        try:
+            ingest_workouts(batch, db=db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        stats["rows"] += batch_rows
+        stats["sessions"] += len(batch)
+        stats["seconds"] = time.perf_counter() - started
+        stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+        return dict(stats)
+
+    batch, batch_rows = [], 0
+    for workout, row_count in parse_workout_rows(lines, fmt):
+        batch.append(workout)
+        batch_rows += row_count
+        if len(batch) >= batch_size:
+            yield flush(batch, batch_rows)
+            batch, batch_rows = [], 0
+    if batch:
+        yield flush(batch, batch_rows)
+
+def import_workout_rows(lines, fmt="csv", batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Import a streamed workout log, see iter_import_batches.
+    progress: optional callback receiving the stats dict after each batch
+    Returns the final stats dict.
+    """
+    stats = {"rows": 0, "sessions": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+    for stats in iter_import_batches(lines, fmt, batch_size=batch_size):
+        if progress:
+            progress(stats)
+    return stats
+
+def import_workout_log(file_path: str, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Import a CSV or JSON Lines workout log file, see import_workout_rows."""
+    fmt = "csv" if file_path.lower().endswith(".csv") else "json"
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        return import_workout_rows(f, fmt, batch_size=batch_size, progress=progress)
 
 def normalize_exercise_name(name: str):
-    """Stub for LLM-powered exercise name normalization."""
-    # TODO: Integrate with AI service
-    return name
+    """
+    Map an exported exercise name ("Squat (Barbell)") to its exercise with the embedded
+    normalizer, so imports reuse existing exercises instead of creating spelling variants.
+    Returns a dict of name, primary_muscle, secondary_muscle and equipment.
+    """
+    from app.services.normalization import normalize_exercise
+    return normalize_exercise(name)
 
-def ingest_workout(exercises):
-    """Ingest a workout with date, location, and normalized exercises."""
+def _parse_date(value):
+    """Accept datetimes or ISO 8601 strings (as sent by the frontend) as naive UTC session dates."""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).upper().replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class InvalidWorkout(ValueError):
+    """A submitted workout does not have the shape ingest_workouts reads; retrying cannot fix it."""
+
+def validate_workout(exercises):
+    """
+    Check that exercises (one workout of normalized exercises) can be ingested: a name and
+    sets with reps and weight per exercise, and a parseable date on the first one.
+    Raises InvalidWorkout.
+    """
+    from pydantic import TypeAdapter, ValidationError
+    from app.schemas import SubmittedExercise
+    if not isinstance(exercises, list) or not exercises:
+        raise InvalidWorkout("A workout needs at least one exercise")
+    try:
+        TypeAdapter(list[SubmittedExercise]).validate_python(exercises)
+        _parse_date(exercises[0].get("date"))
+    except (ValidationError, ValueError) as e:
+        raise InvalidWorkout(str(e)) from e
+
+def _lower_exercise(ex):
+    """Lowercase all string fields in ex, including strings inside its sets."""
+    lowered_ex = {}
+    for k, v in ex.items():
+        if isinstance(v, str):
+            lowered_ex[k] = v.lower()
+        elif isinstance(v, list):
+            # Lowercase strings in sets
+            lowered_ex[k] = [
+                {sk: (sv.lower() if isinstance(sv, str) else sv) for sk, sv in s.items()} for s in v
+            ]
+        else:
+            lowered_ex[k] = v
+    return lowered_ex
+
+def resolve_exercises(db, exercises):
+    """
+    Map exercise names to ids, creating missing exercises with a single upsert.
+    Known names are served from the process's exercise catalogue cache without a query.
+    exercises: dict of lowercased name -> exercise dict (equipment, primary_muscle, secondary_muscle)
+    Returns a dict of name -> row with the exercise id. Does not commit.
+    """
+    from sqlalchemy import select
+    from app.db import dialect_insert
+    from app.models import Exercise
+    from app.services.catalog import catalog_for
+    from app.services.versions import EXERCISES, bump_data_version
+    names = list(exercises)
+    if not names:
+        return {}
+    columns = (Exercise.name, Exercise.id)
+    catalog = catalog_for(db.get_bind())
+    ids = catalog.lookup(db, names)
+    missing = [name for name in names if name not in ids]
+    if missing:
+        # Created since the catalogue was last loaded, or new
+        ids.update({r.name: r for r in db.execute(select(*columns).where(Exercise.name.in_(missing)))})
+        missing = [name for name in names if name not in ids]
+    if missing:
+        stmt = dialect_insert(db.get_bind(), Exercise).values([
+            {
+                "name": name,
+                "equipment": exercises[name].get("equipment"),
+                "primary_muscle": exercises[name].get("primary_muscle"),
+                "secondary_muscle": exercises[name].get("secondary_muscle"),
+            }
+            for name in missing
+        ]).on_conflict_do_nothing(index_elements=["name"])
+        if db.execute(stmt).rowcount:
+            # Other processes reload their catalogue once this transaction commits; this one on its next lookup
+            bump_data_version(db, EXERCISES)
+            catalog.invalidate()
+        # Re-read so rows created concurrently by another writer are picked up too
+        ids.update({r.name: r for r in db.execute(select(*columns).where(Exercise.name.in_(missing)))})
+    return ids
+
+def _insert_sets(db, set_rows):
+    """Insert set rows with COPY FROM STDIN on Postgres (psycopg2) or one executemany elsewhere."""
+    from sqlalchemy import insert
+    from app.models import Set
+    bind = db.get_bind()
+    if len(set_rows) < COPY_THRESHOLD or bind.dialect.driver != "psycopg2":
+        db.execute(insert(Set), set_rows)
+        return
+    import csv
+    import io
+    columns = ("exercise_id", "session_id", "reps", "weight", "rpe")
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in set_rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in columns])
+    buf.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY sets ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+    finally:
+        cursor.close()
+
+def ingest_workouts(workouts, db=None):
+    """
+    Ingest many workouts in a single transaction.
+    workouts: list of workouts, each a list of normalized exercises as accepted by ingest_workout
+    db: optional session to use; when omitted a session is opened, committed and closed here
+    Returns the ids of the created workout sessions, in input order.
+    """
     from app.db import SessionLocal
-    from app.models import WorkoutSession, Exercise, Set
-    db = SessionLocal()
-    # Extract date and location from the first exercise, fallback to None if missing
-    date = exercises[0].get("date") if exercises and "date" in exercises[0] else None
-    location = exercises[0].get("location") if exercises and "location" in exercises[0] else None
-    session = WorkoutSession(date=date, location=location)
-    db.add(session)
-    db.commit()
-    db.refresh(session)
-    for ex in exercises:
-        # Lowercase all string fields in ex
-        lowered_ex = {}
-        for k, v in ex.items():
-            if isinstance(v, str):
-                lowered_ex[k] = v.lower()
-            elif isinstance(v, list):
-                # Lowercase strings in sets
-                lowered_ex[k] = [
-                    {sk: (sv.lower() if isinstance(sv, str) else sv) for sk, sv in s.items()} for s in v
-                ]
-            else:
-                lowered_ex[k] = v
-        exercise = db.query(Exercise).filter_by(name=lowered_ex["name"]).first()
-        if not exercise:
-            exercise = Exercise(
-                name=lowered_ex["name"],
-                equipment=lowered_ex.get("equipment"),
-                primary_muscle=lowered_ex.get("primary_muscle"),
-                secondary_muscle=lowered_ex.get("secondary_muscle"),
-            )
-            db.add(exercise)
+    from app.models import WorkoutSession
+    from app.services.history import update_muscle_last_workout
+    from app.services.records import update_personal_records
+    from app.services.rollups import update_rollups
+    from app.services.versions import bump_data_version
+    owns_session = db is None
+    if owns_session:
+        db = SessionLocal()
+    try:
+        lowered_workouts = [[_lower_exercise(ex) for ex in exercises] for exercises in workouts]
+
+        # Resolve every distinct exercise name across the batch at once
+        exercise_defs = {}
+        for exercises in lowered_workouts:
+            for ex in exercises:
+                exercise_defs.setdefault(ex["name"], ex)
+        exercise_rows = resolve_exercises(db, exercise_defs)
+
+        sessions = []
+        for exercises in lowered_workouts:
+            # Extract date and location from the first exercise, fallback to None if missing
+            date = _parse_date(exercises[0].get("date")) if exercises else None
+            location = exercises[0].get("location") if exercises else None
+            sessions.append(WorkoutSession(date=date, location=location))
+        db.add_all(sessions)
+        db.flush()
+
+        session_ids = [session.id for session in sessions]
+        set_rows = []
+        for session_id, exercises in zip(session_ids, lowered_workouts):
+            for ex in exercises:
+                exercise_id = exercise_rows[ex["name"]].id
+                for s in ex["sets"]:
+                    set_rows.append({
+                        "exercise_id": exercise_id,
+                        "session_id": session_id,
+                        "reps": s["reps"],
+                        "weight": s["weight"],
+                        "rpe": s.get("rpe", None),
+                    })
+        if set_rows:
+            _insert_sets(db, set_rows)
+        # Keep the last-workout-by-muscle summary, personal records and chart rollups in the same transaction as the sets
+        update_muscle_last_workout(db, session_ids)
+        update_personal_records(db, session_ids)
+        update_rollups(db, session_ids)
+        # Invalidates cached /sessions and dashboard responses once this transaction commits
+        bump_data_version(db)
+        if owns_session:
             db.commit()
-            db.refresh(exercise)
-        for s in lowered_ex["sets"]:
-            set_obj = Set(
-                exercise_id=exercise.id,
-                session_id=session.id,
-                reps=s["reps"],
-                weight=s["weight"],
-                rpe=s.get("rpe", None),
-            )
-            db.add(set_obj)
-    db.commit()
-    db.close()
+        return session_ids
+    except Exception:
+        if owns_session:
+            db.rollback()
+        raise
+    finally:
+        if owns_session:
+            db.close()
+
+def ingest_workout(exercises):
+    """Ingest a workout with date, location, and normalized exercises."""
+    return ingest_workouts([exercises])[0]
@@ -0,0 +1,261 @@
+# Jobs service: durable ingestion queue in the ingest_jobs table, drained in batches by a worker pool
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import and_, func, or_, select, update
+from app.db import dialect_insert
+from app.models import IngestJob
+
+logger = logging.getLogger(__name__)
+
+# In-process worker threads started with the web app; 0 when workers run as `python -m app.cli worker`
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "50"))  # jobs claimed and ingested per transaction
+INGEST_POLL_INTERVAL = float(os.getenv("INGEST_POLL_INTERVAL", "1.0"))  # seconds between polls of an empty queue
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+INGEST_LEASE_SECONDS = int(os.getenv("INGEST_LEASE_SECONDS", "300"))  # running jobs older than this are retried
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+JOBS_ENQUEUED = Counter("ingest_jobs_enqueued_total", "Ingest jobs accepted", ["deduplicated"])
+JOBS_FINISHED = Counter("ingest_jobs_finished_total", "Ingest jobs processed by the workers", ["status"])
+WORKOUTS_INGESTED = Counter("ingest_workouts_total", "Workouts ingested by the workers")
+QUEUE_WAIT = Histogram("ingest_job_queue_seconds", "Time from enqueue until a worker claims the job")
+BATCH_SECONDS = Histogram("ingest_batch_seconds", "Time to ingest one claimed batch", ["outcome"])
+QUEUE_DEPTH = Gauge("ingest_jobs_queued", "Ingest jobs waiting, as of the last worker poll", multiprocess_mode="livemax")
+
+
+class IdempotencyConflict(ValueError):
+    """An Idempotency-Key was reused with a different payload."""
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _payload_hash(payload):
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def enqueue_ingest(db, workouts, idempotency_key=None):
+    """
+    Persist workouts as one queued job. With an idempotency_key already used for the same
+    payload, the existing job is returned instead (a client retry after a timeout), and
+    a different payload raises IdempotencyConflict. Commits.
+    Returns (job, created).
+    """
+    payload = json.dumps(workouts, separators=(",", ":"), sort_keys=True, default=str)
+    digest = _payload_hash(payload)
+    values = dict(idempotency_key=idempotency_key, payload_hash=digest, payload=payload, status=QUEUED, attempts=0, created_at=_now())
+    if idempotency_key is None:
+        job = IngestJob(**values)
+        db.add(job)
+        db.commit()
+        JOBS_ENQUEUED.labels("false").inc()
+        return job, True
+    # Insert-or-ignore so two concurrent retries with the same key create a single job
+    inserted = db.execute(
+        dialect_insert(db.get_bind(), IngestJob).values(**values)
+        .on_conflict_do_nothing(index_elements=["idempotency_key"])
+    ).rowcount
+    db.commit()
+    job = db.execute(select(IngestJob).where(IngestJob.idempotency_key == idempotency_key)).scalar_one()
+    if job.payload_hash != digest:
+        raise IdempotencyConflict(f"Idempotency-Key {idempotency_key!r} was already used for a different payload")
+    JOBS_ENQUEUED.labels("false" if inserted else "true").inc()
+    return job, bool(inserted)
+
+
+def get_job(db, job_id):
+    job = db.get(IngestJob, job_id)
+    if job is None:
+        return None
+    return {
+        "id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "session_ids": json.loads(job.session_ids) if job.session_ids else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def claim_jobs(db, limit=INGEST_BATCH_SIZE):
+    """
+    Atomically mark up to limit queued jobs (and running ones whose lease expired) as
+    running and return them, oldest first. On Postgres concurrent workers skip each
+    other's rows (FOR UPDATE SKIP LOCKED); SQLite serializes the update itself. Commits.
+    """
+    now = _now()
+    claimable = or_(
+        IngestJob.status == QUEUED,
+        and_(IngestJob.status == RUNNING, IngestJob.started_at < now - timedelta(seconds=INGEST_LEASE_SECONDS)),
+    )
+    candidates = select(IngestJob.id).where(claimable).order_by(IngestJob.id).limit(limit)
+    if db.get_bind().dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+    claimed_ids = db.execute(
+        update(IngestJob)
+        .where(IngestJob.id.in_(candidates.scalar_subquery()), claimable)
+        .values(status=RUNNING, started_at=now, attempts=IngestJob.attempts + 1)
+        .returning(IngestJob.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    if not claimed_ids:
+        return []
+    jobs = db.execute(select(IngestJob).where(IngestJob.id.in_(claimed_ids)).order_by(IngestJob.id)).scalars().all()
+    for job in jobs:
+        QUEUE_WAIT.observe(max((now - job.created_at).total_seconds(), 0.0))
+    return jobs
+
+
+def _ingest(db, jobs):
+    """Ingest the jobs' workouts and mark them done in one transaction."""
+    from app.services.ingestion import ingest_workouts, validate_workout
+    payloads = [json.loads(job.payload) for job in jobs]
+    for workouts in payloads:
+        for workout in workouts:
+            validate_workout(workout)
+    session_ids = ingest_workouts([w for workouts in payloads for w in workouts], db=db)
+    finished = _now()
+    offset = 0
+    for job, workouts in zip(jobs, payloads):
+        job.session_ids = json.dumps(session_ids[offset:offset + len(workouts)])
+        offset += len(workouts)
+        job.status, job.error, job.finished_at = DONE, None, finished
+    db.commit()
+    WORKOUTS_INGESTED.inc(len(session_ids))
+    JOBS_FINISHED.labels(DONE).inc(len(jobs))
+
+
+def _fail(db, job, error):
+    """Requeue job for another attempt, or fail it once out of attempts or if its payload is invalid."""
+    from app.services.ingestion import InvalidWorkout
+    job.error = str(error)
+    if isinstance(error, InvalidWorkout) or job.attempts >= INGEST_MAX_ATTEMPTS:
+        job.status, job.finished_at = FAILED, _now()
+        JOBS_FINISHED.labels(FAILED).inc()
+    else:
+        job.status = QUEUED
+    db.commit()
+
+
+def process_jobs(db, jobs):
+    """
+    Ingest claimed jobs as one batch. If the batch fails, retry the jobs one by one so a
+    single bad payload only fails (or requeues) its own job.
+    """
+    started = time.perf_counter()
+    try:
+        _ingest(db, jobs)
+        BATCH_SECONDS.labels("batch").observe(time.perf_counter() - started)
+        return
+    except Exception as e:
+        db.rollback()
+        batch_error = e
+    if len(jobs) == 1:
+        logger.error("Ingest job %s failed", jobs[0].id, exc_info=batch_error)
+        _fail(db, jobs[0], batch_error)
+    else:
+        for job in jobs:
+            try:
+                _ingest(db, [job])
+            except Exception as e:
+                db.rollback()
+                logger.exception("Ingest job %s failed", job.id)
+                _fail(db, job, e)
+    BATCH_SECONDS.labels("split").observe(time.perf_counter() - started)
+
+
+def queue_depth(db):
+    return db.execute(select(func.count()).select_from(IngestJob).where(IngestJob.status == QUEUED)).scalar()
+
+
+def drain_once(session_factory, limit=INGEST_BATCH_SIZE):
+    """Claim and process one batch. Returns the number of jobs processed."""
+    db = session_factory()
+    try:
+        jobs = claim_jobs(db, limit)
+        QUEUE_DEPTH.set(queue_depth(db))
+        if jobs:
+            process_jobs(db, jobs)
+        return len(jobs)
+    finally:
+        db.close()
+
+
+class IngestWorkerPool:
+    """
+    Threads that drain ingest_jobs until stopped. Several pools (in the web processes and
+    in `python -m app.cli worker` processes) can share one database.
+    """
+
+    def __init__(self, session_factory, workers=INGEST_WORKERS, batch_size=INGEST_BATCH_SIZE, poll_interval=INGEST_POLL_INTERVAL):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"ingest-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def notify(self):
+        """Wake idle workers now instead of at their next poll (a job was just enqueued here)."""
+        self._wake.set()
+
+    def stop(self, timeout=10.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = drain_once(self.session_factory, self.batch_size)
+            except Exception:
+                logger.exception("Ingest worker %s poll failed", self.name)
+                processed = 0
+            if not processed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+# The pool started by the web app, if any; /submit notifies it
+WORKER_POOL = None
+
+
+def start_worker_pool(session_factory, workers=INGEST_WORKERS):
+    global WORKER_POOL
+    WORKER_POOL = IngestWorkerPool(session_factory, workers).start()
+    return WORKER_POOL
+
+
+def stop_worker_pool():
+    global WORKER_POOL
+    if WORKER_POOL is not None:
+        WORKER_POOL.stop()
+        WORKER_POOL = None
+
+
+def notify_workers():
+    if WORKER_POOL is not None:
+        WORKER_POOL.notify()
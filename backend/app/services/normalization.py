@@ -0,0 +1,153 @@
+# Normalization service: the AI service's normalizer embedded in-process, for single-hop ingestion
+import importlib.util
+import logging
+import os
+import re
+import sys
+import threading
+from app.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Directory containing the normalizer package (app_ai/ in this repository)
+NORMALIZER_PATH = os.getenv(
+    "NORMALIZER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "app_ai")
+)
+
+
+class NormalizerUnavailable(RuntimeError):
+    """The normalizer package or its dependencies (numpy, scipy, openai) cannot be imported."""
+
+
+# Exports qualify exercise names with the equipment: "Squat (Barbell)", "Bicep Curl (Dumbbell)"
+NAME_QUALIFIER = re.compile(r"\s*\([^()]*\)\s*$")
+
+
+class UnresolvedExercises(ValueError):
+    """The normalizer found no exercise for some names (no retrieval candidates, or the LLM chose none)."""
+
+    def __init__(self, names):
+        self.names = names
+        super().__init__(f"Could not resolve exercises: {', '.join(names)}")
+
+
+_normalizer = None
+_normalizer_lock = threading.Lock()
+
+
+def _load_package(name, path):
+    """
+    Import the package in directory path as name. Only that package becomes importable:
+    app_ai/ is not put on sys.path, since its `app` package would merge into ours.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(path, "__init__.py"), submodule_search_locations=[path]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+def normalizer_module(name):
+    """
+    normalizer.<name> for a module without normalizer.ai's dependencies, e.g. "lookup"
+    or "instrumentation".
+    """
+    import importlib
+    _load_package("normalizer", os.path.join(os.path.abspath(NORMALIZER_PATH), "normalizer"))
+    return importlib.import_module(f"normalizer.{name}")
+
+
+def get_normalizer():
+    """
+    normalizer.ai, imported on first use since importing it loads the exercise index,
+    the normalization store and learned aliases.
+    """
+    global _normalizer
+    if _normalizer is None:
+        with _normalizer_lock:
+            if _normalizer is None:
+                try:
+                    ai = normalizer_module("ai")
+                except (ImportError, FileNotFoundError) as e:
+                    raise NormalizerUnavailable(f"Cannot import the normalizer from {NORMALIZER_PATH}: {e}") from e
+                # Also outside the web app (CLI imports, queue workers)
+                normalizer_module("instrumentation").set_span(span)
+                _normalizer = ai
+    return _normalizer
+
+
+def _clean_name(name):
+    """The normalizer's clean_exercise_name (standard library only), or lowercasing if the package is missing."""
+    try:
+        lookup = normalizer_module("lookup")
+    except (ImportError, FileNotFoundError):
+        return " ".join(name.lower().split())
+    return lookup.clean_exercise_name(name)
+
+
+def normalize_exercise(name):
+    """
+    The exercise a raw name from an imported log refers to ("Squat (Barbell)" -> squat),
+    as a dict of name, primary_muscle, secondary_muscle and equipment. Goes through the
+    normalizer's dictionary, learned aliases and, for names it does not know, retrieval
+    and the LLM; a qualifier in parentheses is dropped when the rest is a known exercise.
+    Without the normalizer's dependencies, or when normalizing this name fails (e.g. the
+    LLM answered malformed JSON), the name is only cleaned.
+    """
+    try:
+        ai = get_normalizer()
+    except NormalizerUnavailable:
+        result = None
+    else:
+        base = NAME_QUALIFIER.sub("", name)
+        if base and base != name and ai.EXERCISE_LOOKUP.lookup(base)[0]:
+            # A known exercise with a qualifier: resolve it from the dictionary instead of asking the LLM
+            name = base
+        try:
+            with span("normalize"):
+                result = ai.hybrid_normalize_exercise(name)
+        except Exception:
+            # One bad name must not fail the whole import
+            logger.warning("Could not normalize %r, importing it as written", name, exc_info=True)
+            result = None
+    if not result or not result["canonical_exercise"]:
+        return {"name": _clean_name(name), "primary_muscle": None, "secondary_muscle": None, "equipment": None}
+    return {
+        "name": result["canonical_exercise"],
+        "primary_muscle": result["primary_muscle"],
+        "secondary_muscle": result["secondary_muscle"],
+        "equipment": result["equipment"],
+    }
+
+
+def normalize_workout(exercises, session_date, location=None):
+    """
+    Normalize raw exercises (name and sets of weight, reps, note, as sent to the AI
+    service's /query) and compute their stats, in this process.
+    Returns the exercises as /query would, with plain dict sets, ready for ingest_workouts.
+    Raises ValueError for invalid input, such as a session date in the future, and
+    UnresolvedExercises if any name did not resolve to an exercise.
+    """
+    ai = get_normalizer()
+    from normalizer.schemas import WorkoutExercise
+    from pydantic import ValidationError
+    try:
+        query = [WorkoutExercise.model_validate(ex) for ex in exercises]
+    except ValidationError as e:
+        raise ValueError(str(e)) from e
+    with span("normalize"):
+        processed = ai.process_query(query, session_date, location=location)
+    unresolved = [raw.name for raw, ex in zip(query, processed) if not ex["name"]]
+    if unresolved:
+        raise UnresolvedExercises(list(dict.fromkeys(unresolved)))
+    for ex in processed:
+        ex["sets"] = [s.model_dump() for s in ex["sets"]]
+    return processed
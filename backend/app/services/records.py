@@ -0,0 +1,126 @@
+# Records service: incrementally maintained personal records per exercise
+from datetime import datetime
+from sqlalchemy import delete, select
+from app.models import Exercise, PersonalRecord, Set, WorkoutSession
+from app.services.analytics import estimate_1rm
+from app.services.versions import bump_data_version
+
+METRICS = ("weight", "volume", "e1rm")
+
+
+def _candidates(set_row):
+    """Yield the (metric, rep_count, value) records a single set could hold."""
+    weight = set_row.weight or 0.0
+    reps = set_row.reps or 0
+    if reps <= 0:
+        return
+    yield "weight", reps, weight
+    yield "volume", 0, weight * reps
+    yield "e1rm", 0, float(estimate_1rm(weight, reps))
+
+
+def _chronological(date, set_id):
+    """Sort key of a set in history order, undated sets last, as _set_rows_query orders them."""
+    return (date is None, date or datetime.min, set_id)
+
+
+def _best_of(set_rows):
+    """Best set per (exercise_id, metric, rep_count) of set rows in history order; earlier sets win ties."""
+    best = {}
+    for s in set_rows:
+        for metric, rep_count, value in _candidates(s):
+            key = (s.exercise_id, metric, rep_count)
+            current = best.get(key)
+            if current is None or value > current[0]:
+                best[key] = (value, s)
+    return best
+
+
+def _set_rows_query():
+    return (
+        select(Set.id, Set.exercise_id, Set.session_id, Set.weight, Set.reps, WorkoutSession.date)
+        .join(WorkoutSession, WorkoutSession.id == Set.session_id)
+        .order_by(WorkoutSession.date.is_(None), WorkoutSession.date, Set.id)
+    )
+
+
+def update_personal_records(db, session_ids):
+    """
+    Fold newly ingested sessions into personal_records, comparing only their sets against
+    the stored bests. Must be called after the sets are inserted and before the ingest
+    transaction commits.
+    """
+    if not session_ids:
+        return
+    new_sets = db.execute(_set_rows_query().where(Set.session_id.in_(session_ids))).all()
+    best = _best_of(new_sets)
+    if not best:
+        return
+    exercise_ids = {key[0] for key in best}
+    existing = {
+        (r.exercise_id, r.metric, r.rep_count): r for r in db.execute(
+            select(PersonalRecord).where(PersonalRecord.exercise_id.in_(exercise_ids))
+        ).scalars()
+    }
+    for key, (value, s) in best.items():
+        record = existing.get(key)
+        if record is None:
+            exercise_id, metric, rep_count = key
+            record = PersonalRecord(exercise_id=exercise_id, metric=metric, rep_count=rep_count)
+            db.add(record)
+        elif record.value is not None and (
+            record.value > value
+            # A tie goes to the earlier set: sessions may be ingested out of date order (backfills)
+            or record.value == value and _chronological(record.achieved_at, record.set_id) <= _chronological(s.date, s.id)
+        ):
+            continue
+        record.value = value
+        record.set_id = s.id
+        record.session_id = s.session_id
+        record.achieved_at = s.date
+
+
+def rebuild_personal_records(db, batch_size=10000):
+    """Recompute personal_records from the full set history, streaming the sets in batches."""
+    db.execute(delete(PersonalRecord))
+    best = {}
+    rows = db.execute(_set_rows_query().execution_options(yield_per=batch_size))
+    for partition in rows.partitions():
+        for key, (value, s) in _best_of(partition).items():
+            current = best.get(key)
+            if current is None or value > current[0]:
+                best[key] = (value, s)
+    db.add_all([
+        PersonalRecord(
+            exercise_id=exercise_id, metric=metric, rep_count=rep_count, value=value,
+            set_id=s.id, session_id=s.session_id, achieved_at=s.date,
+        )
+        for (exercise_id, metric, rep_count), (value, s) in best.items()
+    ])
+    bump_data_version(db)
+    db.commit()
+    return len(best)
+
+
+def get_records(db, exercise_id=None):
+    """Personal records, optionally for one exercise (a primary key prefix lookup)."""
+    stmt = (
+        select(PersonalRecord, Exercise.name)
+        .join(Exercise, Exercise.id == PersonalRecord.exercise_id)
+        .order_by(PersonalRecord.exercise_id, PersonalRecord.metric, PersonalRecord.rep_count)
+    )
+    if exercise_id is not None:
+        stmt = stmt.where(PersonalRecord.exercise_id == exercise_id)
+    return [
+        {
+            "exercise_id": record.exercise_id,
+            "exercise": name,
+            "metric": record.metric,
+            "rep_count": record.rep_count,
+            "value": record.value,
+            "set_id": record.set_id,
+            "session_id": record.session_id,
+            "achieved_at": record.achieved_at.isoformat() if record.achieved_at else None,
+        }
+        for record, name in db.execute(stmt).all()
+    ]
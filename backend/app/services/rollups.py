@@ -0,0 +1,168 @@
+# Rollups service: per (day, exercise) and (ISO week, muscle) set totals for charting, maintained on ingest
+# A day is the calendar day of the stored session date, as in services/analytics.py: UTC for
+# workouts submitted with a time zone (ingestion converts them), the lifter's wall clock for
+# imported logs without one. Sessions are not shifted into any other zone, so charts and
+# /analytics always put a session on the same day.
+from datetime import timedelta
+from sqlalchemy import delete, func, insert, select
+from app.db import dialect_insert
+from app.models import Exercise, ExerciseDailyRollup, MuscleWeeklyRollup, Set, WorkoutSession
+from app.services.analytics import estimate_1rm
+from app.services.versions import bump_data_version
+
+BUCKETS = ("day", "week", "month")
+TOTALS = ("sets", "reps", "volume", "top_weight", "best_e1rm")
+
+
+def week_start(day):
+    """Monday of the ISO week containing day."""
+    return day - timedelta(days=day.weekday())
+
+
+def bucket_start(day, bucket):
+    if bucket == "week":
+        return week_start(day)
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _add(totals, key, weight, reps, e1rm):
+    t = totals.get(key)
+    if t is None:
+        t = totals[key] = {"sets": 0, "reps": 0, "volume": 0.0, "top_weight": 0.0, "best_e1rm": 0.0}
+    t["sets"] += 1
+    t["reps"] += reps
+    t["volume"] += weight * reps
+    t["top_weight"] = max(t["top_weight"], weight)
+    t["best_e1rm"] = max(t["best_e1rm"], e1rm)
+
+
+def _aggregate(rows, daily, weekly):
+    """Fold set rows (exercise_id, primary_muscle, date, weight, reps) into the daily and weekly totals."""
+    for r in rows:
+        # Sets of undated sessions cannot be placed on a chart
+        if r.date is None:
+            continue
+        day = r.date.date()
+        weight = r.weight or 0.0
+        reps = r.reps or 0
+        e1rm = float(estimate_1rm(weight, reps))
+        _add(daily, (r.exercise_id, day), weight, reps, e1rm)
+        if r.primary_muscle:
+            _add(weekly, (r.primary_muscle.lower(), week_start(day)), weight, reps, e1rm)
+
+
+def _set_rows_query():
+    return (
+        select(Set.exercise_id, Exercise.primary_muscle, WorkoutSession.date, Set.weight, Set.reps)
+        .join(WorkoutSession, WorkoutSession.id == Set.session_id)
+        .join(Exercise, Exercise.id == Set.exercise_id)
+    )
+
+
+def _upsert(db, model, key_columns, totals):
+    """Add totals onto existing rollup rows in one statement, inserting missing ones."""
+    if not totals:
+        return
+    bind = db.get_bind()
+    stmt = dialect_insert(bind, model)
+    greatest = func.greatest if bind.dialect.name == "postgresql" else func.max
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={
+            "sets": model.sets + stmt.excluded.sets,
+            "reps": model.reps + stmt.excluded.reps,
+            "volume": model.volume + stmt.excluded.volume,
+            "top_weight": greatest(model.top_weight, stmt.excluded.top_weight),
+            "best_e1rm": greatest(model.best_e1rm, stmt.excluded.best_e1rm),
+        },
+    )
+    db.execute(stmt, [{**dict(zip(key_columns, key)), **t} for key, t in totals.items()])
+
+
+def update_rollups(db, session_ids):
+    """
+    Fold newly ingested sessions into the rollup tables. Must be called after their sets
+    are inserted and before the ingest transaction commits.
+    """
+    if not session_ids:
+        return
+    daily, weekly = {}, {}
+    _aggregate(db.execute(_set_rows_query().where(Set.session_id.in_(session_ids))).all(), daily, weekly)
+    _upsert(db, ExerciseDailyRollup, ("exercise_id", "day"), daily)
+    _upsert(db, MuscleWeeklyRollup, ("muscle", "week"), weekly)
+
+
+def rebuild_rollups(db, batch_size=10000):
+    """Recompute both rollup tables from the full set history, streaming the sets in batches."""
+    db.execute(delete(ExerciseDailyRollup))
+    db.execute(delete(MuscleWeeklyRollup))
+    daily, weekly = {}, {}
+    rows = db.execute(_set_rows_query().execution_options(yield_per=batch_size))
+    for partition in rows.partitions():
+        _aggregate(partition, daily, weekly)
+    if daily:
+        db.execute(insert(ExerciseDailyRollup), [{"exercise_id": e, "day": d, **t} for (e, d), t in daily.items()])
+    if weekly:
+        db.execute(insert(MuscleWeeklyRollup), [{"muscle": m, "week": w, **t} for (m, w), t in weekly.items()])
+    bump_data_version(db)
+    db.commit()
+    return len(daily), len(weekly)
+
+
+def _merge_buckets(rows, bucket):
+    points = {}
+    for row_start, t in rows:
+        start = bucket_start(row_start, bucket)
+        p = points.get(start)
+        if p is None:
+            points[start] = dict(t)
+            continue
+        p["sets"] += t["sets"]
+        p["reps"] += t["reps"]
+        p["volume"] += t["volume"]
+        p["top_weight"] = max(p["top_weight"], t["top_weight"])
+        p["best_e1rm"] = max(p["best_e1rm"], t["best_e1rm"])
+    return [{"start": start.isoformat(), **t} for start, t in points.items()]
+
+
+def get_series(db, exercise=None, muscle=None, bucket="week", start=None, end=None):
+    """
+    Chart series from the rollups, oldest first: one point per bucket with sets, reps,
+    volume, top_weight and best_e1rm. Each call is one primary key range scan, so its cost
+    depends on the requested range, not on the length of the history.
+    exercise: exercise name, served from the daily rollup in day, week or month buckets
+    muscle: primary muscle, served from the weekly rollup in week buckets
+    start, end: optional inclusive date bounds
+    """
+    if (exercise is None) == (muscle is None):
+        raise ValueError("Pass exactly one of exercise or muscle")
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket!r}, expected one of {', '.join(BUCKETS)}")
+    if exercise is not None:
+        model, key, period = ExerciseDailyRollup, ExerciseDailyRollup.day, "day"
+        stmt = select(model).where(
+            model.exercise_id == select(Exercise.id).where(Exercise.name == exercise.lower()).scalar_subquery()
+        )
+    else:
+        if bucket != "week":
+            raise ValueError("Muscle series are only available in week buckets")
+        model, key, period = MuscleWeeklyRollup, MuscleWeeklyRollup.week, "week"
+        stmt = select(model).where(model.muscle == muscle.lower())
+        if start is not None:
+            start = week_start(start)
+    if start is not None:
+        stmt = stmt.where(key >= start)
+    if end is not None:
+        stmt = stmt.where(key <= end)
+    rows = [
+        (getattr(r, period), {name: getattr(r, name) for name in TOTALS})
+        for r in db.execute(stmt.order_by(key)).scalars()
+    ]
+    return {
+        "exercise": exercise.lower() if exercise is not None else None,
+        "muscle": muscle.lower() if muscle is not None else None,
+        "bucket": bucket,
+        "points": _merge_buckets(rows, bucket),
+    }
@@ -0,0 +1,32 @@
+# Data versions: counters bumped in the same transaction as writes, used to validate cached reads
+from sqlalchemy import func, select, update
+from app.db import dialect_insert
+from app.models import DataVersion
+
+# Everything derived from sessions and sets: history, muscle dashboard, records
+WORKOUTS = "workouts"
+# The exercise catalogue (names, equipment, muscles), cached per process by services/catalog.py
+EXERCISES = "exercises"
+
+# Postgres channel notified with the counter name when a bump commits
+NOTIFY_CHANNEL = "data_versions"
+
+
+def get_data_version(db, name=WORKOUTS):
+    """Current value of a data version counter, 0 if it was never bumped."""
+    return db.execute(select(DataVersion.value).where(DataVersion.name == name)).scalar() or 0
+
+
+def bump_data_version(db, name=WORKOUTS):
+    """Increment a data version counter. Call inside the writing transaction, before it commits."""
+    updated = db.execute(
+        update(DataVersion).where(DataVersion.name == name).values(value=DataVersion.value + 1)
+    ).rowcount
+    if not updated:
+        db.execute(
+            dialect_insert(db.get_bind(), DataVersion).values(name=name, value=1)
+            .on_conflict_do_update(index_elements=["name"], set_={"value": DataVersion.value + 1})
+        )
+    if db.get_bind().dialect.name == "postgresql":
+        # Delivered to listeners only once the transaction commits
+        db.execute(select(func.pg_notify(NOTIFY_CHANNEL, name)))
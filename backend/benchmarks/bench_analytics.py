@@ -0,0 +1,43 @@
+# Benchmarks for the chart series: rollups and the downsampled e1RM progression
+import pytest
+from sqlalchemy import func, select
+from app.models import Exercise, Set
+from app.services import analytics, rollups
+
+
+def _most_logged_exercise(history_db):
+    with history_db.session() as db:
+        return db.execute(
+            select(Exercise.name).join(Set, Set.exercise_id == Exercise.id)
+            .group_by(Exercise.name).order_by(func.count().desc()).limit(1)
+        ).scalar()
+
+
+@pytest.mark.parametrize("bucket", ["day", "week", "month"])
+def bench_get_series_exercise(measure, history_db, bucket):
+    name = _most_logged_exercise(history_db)
+
+    def run():
+        with history_db.session() as db:
+            return rollups.get_series(db, exercise=name, bucket=bucket)
+
+    measure(run, max_queries=1)
+
+
+def bench_get_series_muscle(measure, history_db):
+    def run():
+        with history_db.session() as db:
+            return rollups.get_series(db, muscle="chest", bucket="week")
+
+    measure(run, max_queries=1)
+
+
+def bench_progression(measure, history_db):
+    name = _most_logged_exercise(history_db)
+
+    def run():
+        with history_db.session() as db:
+            cols = analytics.load_set_columns(db, exercise_id=analytics.exercise_id_by_name(db, name))
+            return analytics.to_python(analytics.progression(cols, max_points=500))
+
+    measure(run, max_queries=2)
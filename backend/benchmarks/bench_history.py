@@ -0,0 +1,45 @@
+# Benchmarks for the session history and muscle dashboard read paths
+import pytest
+from app.services import history
+
+PAGE_SIZE = 50
+
+
+def bench_get_sessions_first_page(measure, history_db):
+    def run():
+        with history_db.session() as db:
+            return history.get_sessions(db, limit=PAGE_SIZE)
+
+    # Sessions, then their sets and exercises via selectinload, whatever the history length
+    measure(run, max_queries=3)
+
+
+def bench_get_sessions_deep_page(measure, history_db):
+    with history_db.session() as db:
+        sessions = db.execute(history.sessions_query()).scalars().all()
+        cursor = history.make_cursor(sessions[len(sessions) // 2])
+
+    def run():
+        with history_db.session() as db:
+            return history.get_sessions(db, before=cursor, limit=PAGE_SIZE)
+
+    measure(run, max_queries=3)
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["rows", "columnar"])
+def bench_get_sessions_full_history(measure, history_db, columnar):
+    def run():
+        with history_db.session() as db:
+            return history.get_sessions(db, columnar=columnar)
+
+    # No query budget: selectinload issues one IN query per 500 parents, so it grows with history
+    measure(run, rounds=3)
+
+
+@pytest.mark.parametrize("use_summary", [True, False], ids=["summary", "window"])
+def bench_get_last_workout_by_muscle(measure, history_db, use_summary):
+    def run():
+        with history_db.session() as db:
+            return history.get_last_workout_by_muscle(db, use_summary=use_summary)
+
+    measure(run, max_queries=3)
@@ -0,0 +1,34 @@
+# Benchmarks for workout ingestion into an existing history
+from sqlalchemy import select
+from app.models import Exercise
+from app.services.ingestion import ingest_workouts
+
+
+def bench_ingest_workout(measure, history_db):
+    with history_db.session() as db:
+        exercises = db.execute(select(Exercise).order_by(Exercise.id).limit(5)).scalars().all()
+        workout = [
+            {
+                "name": e.name,
+                "equipment": e.equipment,
+                "primary_muscle": e.primary_muscle,
+                "secondary_muscle": e.secondary_muscle,
+                "date": "2031-01-01T18:00:00",
+                "location": "benchmark gym",
+                "sets": [{"reps": 5, "weight": 100.0 + i * 2.5, "rpe": 8.0} for i in range(4)],
+            }
+            for e in exercises
+        ]
+
+    def run():
+        # ingest_workout's path (ingest_workouts in one transaction), rolled back so the
+        # cached history stays unchanged between rounds and runs
+        with history_db.session() as db:
+            ingest_workouts([workout], db=db)
+            db.flush()
+            db.rollback()
+
+    # Load the exercise catalogue cache first: the budget is for the steady state, where
+    # known exercise names resolve without a query
+    run()
+    measure(run, max_queries=12)
@@ -0,0 +1,17 @@
+# Benchmarks for personal record lookups
+from sqlalchemy import func, select
+from app.models import Set, get_top_set_for_exercise
+
+
+def bench_get_top_set_for_exercise(measure, history_db):
+    with history_db.session() as db:
+        # The most logged exercise, the worst case for the fallback scan
+        exercise_id = db.execute(
+            select(Set.exercise_id).group_by(Set.exercise_id).order_by(func.count().desc()).limit(1)
+        ).scalar()
+
+    def run():
+        with history_db.session() as db:
+            return get_top_set_for_exercise(db, exercise_id)
+
+    measure(run, max_queries=1)
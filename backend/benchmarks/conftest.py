@@ -0,0 +1,146 @@
+"""
+Fixtures for the backend microbenchmarks: synthetic histories at several sizes from
+scripts/generate_history.py, query counting, and a scaling summary at the end of the run.
+
+SQLite databases are generated once into benchmarks/.data/ and reused while the
+generator is unchanged. Set BENCH_DATABASE_URL to a URL containing {size} (e.g.
+postgresql://localhost/powerai_bench_{size}, databases must exist) to run on Postgres.
+"""
+import hashlib
+import os
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "scripts"))
+# app.db builds its engine from DATABASE_URL on import; the benchmarks use their own engines
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event, func, inspect, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+import generate_history  # noqa: E402
+from app.db import Base  # noqa: E402
+from app.models import Set, WorkoutSession  # noqa: E402
+
+# size name -> (lifters, years); about 3k sets per lifter-year
+SIZES = {"small": (1, 1), "medium": (5, 2), "large": (20, 5)}
+SELECTED_SIZES = [s.strip() for s in os.getenv("BENCH_SIZES", ",".join(SIZES)).split(",") if s.strip()]
+SEED = 0
+
+DATA_DIR = os.path.join(BENCH_DIR, ".data")
+
+# benchmark -> size -> {"sets", "median", "queries"} for the scaling summary
+RESULTS = defaultdict(dict)
+
+
+@dataclass
+class HistoryDB:
+    size: str
+    engine: object
+    sessions: int
+    sets: int
+
+    def session(self):
+        return Session(self.engine)
+
+
+def _generator_fingerprint():
+    with open(generate_history.__file__, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:8]
+
+
+def _database_url(size):
+    template = os.getenv("BENCH_DATABASE_URL")
+    if template:
+        return template.format(size=size)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    lifters, years = SIZES[size]
+    return f"sqlite:///{os.path.join(DATA_DIR, f'{size}-{lifters}x{years}-seed{SEED}-{_generator_fingerprint()}.db')}"
+
+
+def _open_history(size):
+    engine = create_engine(_database_url(size))
+    with engine.connect() as conn:
+        populated = inspect(conn).has_table("sets") and conn.execute(select(func.count()).select_from(Set)).scalar()
+    if not populated:
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        lifters, years = SIZES[size]
+        generate_history.generate(engine, lifters, years, seed=SEED)
+    with engine.connect() as conn:
+        sessions = conn.execute(select(func.count()).select_from(WorkoutSession)).scalar()
+        sets = conn.execute(select(func.count()).select_from(Set)).scalar()
+    return HistoryDB(size, engine, sessions, sets)
+
+
+@pytest.fixture(scope="session", params=SELECTED_SIZES)
+def history_db(request):
+    db = _open_history(request.param)
+    yield db
+    db.engine.dispose()
+
+
+def count_queries(engine, fn):
+    """Number of SQL statements fn executes on engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+def _scaling_key(node, size):
+    """Test name with its parameters other than the history size, e.g. bench_x[window]."""
+    params = [p for p in node.callspec.id.split("-") if p != size] if hasattr(node, "callspec") else []
+    return node.originalname + (f"[{'-'.join(params)}]" if params else "")
+
+
+@pytest.fixture
+def measure(request, benchmark, history_db):
+    """
+    measure(fn, max_queries=None, rounds=None): benchmark fn against history_db, record
+    its query count, and fail if it exceeds max_queries. Pass rounds for slow calls.
+    """
+    def run(fn, max_queries=None, rounds=None):
+        queries = count_queries(history_db.engine, fn)
+        benchmark.extra_info.update(size=history_db.size, sets=history_db.sets, queries=queries)
+        if rounds:
+            result = benchmark.pedantic(fn, rounds=rounds, iterations=1)
+        else:
+            result = benchmark(fn)
+        if benchmark.stats is not None:
+            RESULTS[_scaling_key(request.node, history_db.size)][history_db.size] = {
+                "sets": history_db.sets,
+                "median": benchmark.stats.stats.median,
+                "queries": queries,
+            }
+        if max_queries is not None:
+            assert queries <= max_queries, f"{queries} queries, budget is {max_queries}"
+        return result
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    terminalreporter.section("scaling")
+    terminalreporter.write_line(f"{'benchmark':<48} {'size':<8} {'sets':>9} {'median ms':>10} {'x smallest':>11} {'queries':>8}")
+    for group, by_size in sorted(RESULTS.items()):
+        ordered = sorted(by_size.items(), key=lambda item: item[1]["sets"])
+        smallest = ordered[0][1]["median"]
+        for size, r in ordered:
+            terminalreporter.write_line(
+                f"{group:<48} {size:<8} {r['sets']:>9} {r['median'] * 1000:>10.3f} "
+                f"{r['median'] / smallest:>11.1f} {r['queries']:>8}"
+            )
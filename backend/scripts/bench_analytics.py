@@ -0,0 +1,72 @@
+"""
+Benchmark the NumPy analytics engine on synthetic set columns.
+
+    python scripts/bench_analytics.py [--sets 500000] [--budget-ms 100]
+
+Exits non-zero if any of detect_prs, calculate_volume or compute_trends takes longer
+than the budget (best of several runs). The database is not involved: this measures the
+compute on already loaded columns. Converting the array results to Python lists for JSON
+(to_python) is reported separately and not held to the budget.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services import analytics  # noqa: E402
+
+
+def synthetic_columns(n_sets, n_exercises=80, sets_per_session=20, seed=0):
+    rng = np.random.default_rng(seed)
+    n_sessions = n_sets // sets_per_session
+    session_id = np.repeat(np.arange(1, n_sessions + 1), sets_per_session)[:n_sets]
+    # Roughly four sessions a week, in chronological order
+    session_day = 18000 + np.cumsum(rng.integers(1, 4, n_sessions))
+    reps = rng.integers(1, 13, n_sets)
+    return {
+        "weight": np.round(rng.normal(100, 30, n_sets).clip(5, 300) / 2.5) * 2.5,
+        "reps": reps,
+        "rpe": rng.uniform(6, 10, n_sets),
+        "day": session_day[session_id - 1],
+        "session_id": session_id,
+        "exercise_id": rng.integers(1, n_exercises + 1, n_sets),
+    }
+
+
+def best_of(fn, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sets", type=int, default=500_000)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    cols = synthetic_columns(args.sets)
+    engines = {
+        "detect_prs": analytics.detect_prs,
+        "calculate_volume": analytics.calculate_volume,
+        "compute_trends": analytics.compute_trends,
+    }
+    over_budget = False
+    for name, fn in engines.items():
+        ms = best_of(lambda: fn(cols), args.runs)
+        result = fn(cols)
+        convert_ms = best_of(lambda: analytics.to_python(result), args.runs)
+        flag = "" if ms <= args.budget_ms else "  OVER BUDGET"
+        over_budget = over_budget or bool(flag)
+        print(f"{name:<18} {ms:8.1f} ms  (+{convert_ms:.1f} ms to_python, {args.sets} sets){flag}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare /sessions payload size and serialize time across response formats.
+
+    python scripts/bench_payload.py [--sets 50000] [--runs 5]
+
+Sessions are synthetic in-memory objects shaped like the ORM rows, so only building
+the response dict and encoding it are measured, not the query. "fastapi" is the
+default path the endpoint used before (jsonable_encoder + json.dumps); the others are
+what cached_response sends now. gzip shows what goes over the wire behind compression.
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import msgpack
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# Importing the services needs a database URL, but nothing is queried
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+from app.services.history import build_sessions_page  # noqa: E402
+
+MUSCLES = ["chest", "back", "quads", "hamstrings", "shoulders", "biceps", "triceps", "glutes"]
+EQUIPMENT = ["barbell", "dumbbell", "cable", "machine", "bodyweight"]
+
+
+def synthetic_sessions(n_sets, n_exercises=80, sets_per_session=20, seed=0):
+    rnd = random.Random(seed)
+    exercises = [
+        SimpleNamespace(
+            id=i,
+            name=f"exercise {i}",
+            equipment=rnd.choice(EQUIPMENT),
+            primary_muscle=rnd.choice(MUSCLES),
+            secondary_muscle=rnd.choice(MUSCLES + [None]),
+        )
+        for i in range(1, n_exercises + 1)
+    ]
+    sessions = []
+    day = datetime(2020, 1, 1)
+    set_id = 0
+    for session_id in range(1, n_sets // sets_per_session + 1):
+        day += timedelta(days=rnd.randint(1, 3))
+        sets = []
+        for _ in range(sets_per_session):
+            set_id += 1
+            sets.append(SimpleNamespace(
+                id=set_id,
+                exercise=rnd.choice(exercises),
+                weight=round(rnd.uniform(20, 200) / 2.5) * 2.5,
+                reps=rnd.randint(1, 12),
+                rpe=rnd.choice([None, 7.0, 8.0, 8.5, 9.0]),
+            ))
+        sessions.append(SimpleNamespace(id=session_id, date=day, location="gym", sets=sets))
+    sessions.reverse()
+    return sessions
+
+
+FORMATS = {
+    "fastapi": (False, lambda r: json.dumps(jsonable_encoder(r)).encode("utf-8")),
+    "orjson": (False, orjson.dumps),
+    "columnar+orjson": (True, orjson.dumps),
+    "columnar+msgpack": (True, msgpack.packb),
+}
+
+
+def best_of(fn, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sets", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    sessions = synthetic_sessions(args.sets)
+    print(f"{len(sessions)} sessions, {args.sets} sets, best of {args.runs}")
+    print(f"{'format':<18} {'size MB':>8} {'gzip MB':>8} {'build ms':>9} {'encode ms':>10} {'total ms':>9}")
+    for name, (columnar, encode) in FORMATS.items():
+        result, build = best_of(lambda: build_sessions_page(sessions, columnar=columnar), args.runs)
+        body, encoded = best_of(lambda: encode(result), args.runs)
+        compressed = len(gzip.compress(body, 6))
+        print(
+            f"{name:<18} {len(body) / 1e6:>8.2f} {compressed / 1e6:>8.2f} "
+            f"{build * 1000:>9.1f} {encoded * 1000:>10.1f} {(build + encoded) * 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Show query plans and timings for the hot read paths with and without the indexes from
+alembic/versions/add_hot_path_indexes.py, over a synthetic history.
+
+    python scripts/explain_indexes.py [--url sqlite:///explain.db] [--sets 1000000] [--reset]
+
+The target database gets its own tables created from the models; pass --reset to drop
+existing ones first. Never point this at a database with real data.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# app.db builds its engine from DATABASE_URL on import; this script uses its own engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+from sqlalchemy import create_engine, func, insert, inspect, select, text  # noqa: E402
+from app.db import Base  # noqa: E402
+from app.models import HOT_PATH_INDEXES, Exercise, Set, WorkoutSession  # noqa: E402
+from app.services.history import latest_set_per_muscle_query, sessions_query  # noqa: E402
+
+MUSCLES = ["chest", "back", "quads", "hamstrings", "glutes", "front deltoids", "side deltoids", "biceps", "triceps", "calves", "core"]
+
+
+def generate(engine, n_sets, n_exercises=120, sets_per_session=20, seed=0):
+    rnd = random.Random(seed)
+    n_sessions = max(n_sets // sets_per_session, 1)
+    start = datetime(2015, 1, 1, 7)
+    with engine.begin() as conn:
+        conn.execute(insert(Exercise), [
+            {"id": i, "name": f"exercise {i}", "equipment": "barbell", "primary_muscle": rnd.choice(MUSCLES).title()}
+            for i in range(1, n_exercises + 1)
+        ])
+        conn.execute(insert(WorkoutSession), [
+            {"id": i, "date": start + timedelta(hours=12 * i + rnd.randint(0, 3)), "location": "gym"}
+            for i in range(1, n_sessions + 1)
+        ])
+    batch = []
+    with engine.begin() as conn:
+        for i in range(n_sets):
+            batch.append({
+                "exercise_id": rnd.randint(1, n_exercises),
+                "session_id": i // sets_per_session + 1,
+                "reps": rnd.randint(1, 12),
+                "weight": rnd.randint(4, 120) * 2.5,
+                "rpe": None,
+            })
+            if len(batch) == 50_000:
+                conn.execute(insert(Set), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Set), batch)
+
+
+def hot_queries(engine):
+    with engine.connect() as conn:
+        cursor_date, cursor_id = conn.execute(
+            select(WorkoutSession.date, WorkoutSession.id).order_by(WorkoutSession.date.desc()).offset(500).limit(1)
+        ).one()
+        page_ids = conn.execute(select(WorkoutSession.id).order_by(WorkoutSession.id.desc()).limit(50)).scalars().all()
+    return {
+        "sessions page (keyset)": sessions_query((cursor_date, cursor_id), 50),
+        "sets for a page of sessions": select(Set).where(Set.session_id.in_(page_ids)),
+        "heaviest set for exercise": select(Set).where(Set.exercise_id == 7).order_by(Set.weight.desc()).limit(1),
+        "top volume set for exercise": select(Set).where(Set.exercise_id == 7).order_by((Set.weight * Set.reps).desc()).limit(1),
+        "exercises for a muscle": select(Exercise.id).where(func.lower(Exercise.primary_muscle) == "chest"),
+        "last workout by muscle": latest_set_per_muscle_query(),
+    }
+
+
+def explain(conn, stmt):
+    compiled = stmt.compile(conn, compile_kwargs={"literal_binds": True})
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {compiled}")).all()
+        return "\n".join(r[0] for r in rows)
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(r[-1] for r in rows)
+
+
+def run(engine, label, runs):
+    print(f"\n=== {label} ===")
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        for name, stmt in hot_queries(engine).items():
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                conn.execute(stmt).all()
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"\n-- {name}: median {statistics.median(timings):.2f} ms over {runs} runs")
+            print(explain(conn, stmt))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///explain_indexes.db")
+    parser.add_argument("--sets", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--reset", action="store_true", help="Drop existing tables in the target database first")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if inspect(engine).has_table("sets"):
+        if not args.reset:
+            sys.exit("Target database already has tables, pass --reset to drop them")
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    for index in HOT_PATH_INDEXES:
+        index.drop(engine)
+
+    started = time.perf_counter()
+    generate(engine, args.sets)
+    print(f"Generated {args.sets} sets in {time.perf_counter() - started:.1f}s")
+
+    run(engine, "before: primary keys and exercises.name only", args.runs)
+    for index in HOT_PATH_INDEXES:
+        index.create(engine)
+    run(engine, "after: hot path indexes", args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Generate realistic synthetic training histories into SQLite or Postgres.
+
+    python scripts/generate_history.py --url sqlite:///history.db [--lifters 5] [--years 2] [--reset]
+
+Exercises come from the EXERCISE_DICT vocabulary of the AI service (app_ai/normalizer/ai.py).
+Each lifter trains a push/pull/legs split a few times a week with progressive overload,
+warm-up ramps, deloads and the odd skipped week. The schema has no users, so lifters
+are told apart by location. Personal records, the muscle summary and the chart rollups
+are rebuilt at the end, so every read path sees the same state as after real ingestion.
+The same seed always produces the same history. Never point this at a database with
+real data.
+"""
+import argparse
+import ast
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# app.db builds its engine from DATABASE_URL on import; this script uses its own engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+from sqlalchemy import create_engine, func, insert, inspect, select, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from app.db import Base  # noqa: E402
+from app.models import Exercise, Set, WorkoutSession  # noqa: E402
+
+AI_MODULE = os.path.join(os.path.dirname(__file__), "..", "..", "app_ai", "normalizer", "ai.py")
+
+SPLIT = {
+    "push": ("chest", "front deltoids", "side deltoids", "triceps"),
+    "pull": ("back", "rear deltoids", "biceps", "forearms"),
+    "legs": ("quads", "hamstrings", "glutes", "calves", "core"),
+}
+
+# Rough starting working weights (kg) by equipment, scaled per lifter
+BASE_WEIGHT = {"barbell": 80.0, "dumbbell": 25.0, "cable": 40.0, "machine": 60.0, "smith machine": 70.0, "bodyweight": 0.0}
+
+
+def load_vocabulary(path=AI_MODULE):
+    """EXERCISE_DICT from the AI service, read without importing it (it is a separate app package)."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "EXERCISE_DICT" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"EXERCISE_DICT not found in {path}")
+
+
+def exercise_rows(vocabulary):
+    """Exercise rows as ingestion stores them (all strings lowercased)."""
+    return [
+        {
+            "id": i,
+            "name": name.lower(),
+            "equipment": equipment.lower() if equipment else None,
+            "primary_muscle": primary.lower() if primary else None,
+            "secondary_muscle": secondary.lower() if secondary else None,
+        }
+        for i, (name, (primary, secondary, equipment, _aliases)) in enumerate(sorted(vocabulary.items()), start=1)
+    ]
+
+
+def _program(rnd, exercises, per_day):
+    """A lifter's fixed exercise selection for each day of the split."""
+    program = {}
+    for day, muscles in SPLIT.items():
+        pool = [e for e in exercises if e["primary_muscle"] in muscles] or exercises
+        program[day] = rnd.sample(pool, min(per_day, len(pool)))
+    return program
+
+
+def _working_weight(start, weeks, rnd):
+    # Fast gains early, slower later, every fourth week a deload
+    progress = 1 + 0.25 * (1 - 0.985 ** weeks)
+    deload = 0.85 if weeks % 4 == 3 else 1.0
+    return max(round(start * progress * deload * rnd.uniform(0.97, 1.03) / 2.5) * 2.5, 0.0)
+
+
+def iter_history(lifters, years, sessions_per_week=4, exercises_per_session=5, seed=0, vocabulary=None):
+    """
+    Yield (session, sets) pairs in date order. session is a dict for workout_sessions,
+    sets a list of dicts for sets (without session_id). Exercise ids index exercise_rows.
+    """
+    rnd = random.Random(seed)
+    exercises = exercise_rows(vocabulary or load_vocabulary())
+    start = datetime(2020, 1, 6)
+    days = int(years * 365)
+    plans = []
+    for lifter in range(lifters):
+        plans.append({
+            "location": f"lifter {lifter + 1} gym",
+            "strength": rnd.uniform(0.6, 1.6),
+            "program": _program(rnd, exercises, exercises_per_session),
+            "hour": rnd.choice((6, 7, 12, 17, 18, 19)),
+            "starts": {e["id"]: rnd.uniform(0.7, 1.3) for e in exercises},
+        })
+    split = list(SPLIT)
+    for day in range(days):
+        for lifter, plan in enumerate(plans):
+            weeks = day // 7
+            # Lifters skip about one week in ten entirely
+            if random.Random(seed * 7919 + lifter * 104729 + weeks).random() < 0.1:
+                continue
+            if rnd.random() > sessions_per_week / 7:
+                continue
+            plan_day = split[plan.setdefault("next", 0) % len(split)]
+            plan["next"] += 1
+            date = start + timedelta(days=day, hours=plan["hour"], minutes=rnd.randint(0, 59))
+            sets = []
+            for exercise in plan["program"][plan_day]:
+                base = BASE_WEIGHT.get(exercise["equipment"], 40.0) * plan["strength"] * plan["starts"][exercise["id"]]
+                working = _working_weight(base, weeks, rnd)
+                if working and exercise["equipment"] == "barbell":
+                    sets.append({"exercise_id": exercise["id"], "reps": 8, "weight": round(working * 0.5 / 2.5) * 2.5, "rpe": None})
+                reps = rnd.choice((3, 5, 6, 8, 10, 12))
+                for n in range(rnd.randint(2, 4)):
+                    sets.append({
+                        "exercise_id": exercise["id"],
+                        "reps": max(reps - n // 2 - rnd.randint(0, 1), 1),
+                        "weight": working,
+                        "rpe": round(min(7 + n * 0.5 + rnd.choice((0, 0, 0.5, 1)), 10), 1),
+                    })
+            yield {"date": date, "location": plan["location"]}, sets
+
+
+def generate(engine, lifters, years, sessions_per_week=4, exercises_per_session=5, seed=0, batch_size=50_000):
+    """Insert a synthetic history into engine's (empty) tables. Returns (sessions, sets) counts."""
+    from app.services.history import rebuild_muscle_last_workout
+    from app.services.records import rebuild_personal_records
+    from app.services.rollups import rebuild_rollups
+    from app.services.versions import EXERCISES, bump_data_version
+    vocabulary = load_vocabulary()
+    n_sessions = n_sets = 0
+    with engine.begin() as conn:
+        conn.execute(insert(Exercise), exercise_rows(vocabulary))
+        session_batch, set_batch = [], []
+        for session, sets in iter_history(lifters, years, sessions_per_week, exercises_per_session, seed, vocabulary):
+            n_sessions += 1
+            session_batch.append({"id": n_sessions, **session})
+            for s in sets:
+                n_sets += 1
+                set_batch.append({"id": n_sets, "session_id": n_sessions, **s})
+            if len(set_batch) >= batch_size:
+                conn.execute(insert(WorkoutSession), session_batch)
+                conn.execute(insert(Set), set_batch)
+                session_batch, set_batch = [], []
+        if session_batch:
+            conn.execute(insert(WorkoutSession), session_batch)
+        if set_batch:
+            conn.execute(insert(Set), set_batch)
+        if conn.dialect.name == "postgresql":
+            # Ids were inserted explicitly, move the sequences past them for later inserts
+            for table in ("exercises", "workout_sessions", "sets"):
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"))
+    with Session(engine) as db:
+        rebuild_personal_records(db)
+        rebuild_muscle_last_workout(db)
+        rebuild_rollups(db)
+        # Processes caching the previous catalogue of this database reload it
+        bump_data_version(db, EXERCISES)
+        db.commit()
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return n_sessions, n_sets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///history.db")
+    parser.add_argument("--lifters", type=int, default=5)
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--sessions-per-week", type=float, default=4)
+    parser.add_argument("--exercises-per-session", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="Drop existing tables in the target database first")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if inspect(engine).has_table("sets"):
+        if not args.reset:
+            sys.exit("Target database already has tables, pass --reset to drop them")
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    n_sessions, n_sets = generate(
+        engine, args.lifters, args.years, args.sessions_per_week, args.exercises_per_session, args.seed
+    )
+    with engine.connect() as conn:
+        n_exercises = conn.execute(select(func.count()).select_from(Exercise)).scalar()
+    print(f"Generated {n_sessions} sessions, {n_sets} sets over {n_exercises} exercises in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Fixtures for the backend tests: a throwaway SQLite database behind app.db, recreated
+for every test, a TestClient on the app, and SQL statement counting.
+
+    cd backend && pip install -r tests/requirements.txt && pytest tests
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, ".."))
+# app.db builds its engine from DATABASE_URL on import
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="powerai-tests-"), "test.db")
+# Jobs are drained explicitly by the tests that need it
+os.environ["INGEST_WORKERS"] = "0"
+# The embedded normalizer (/workouts/ingest): stub LLM, no persistent cache or artifacts
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("LLM_STUB_LATENCY", "0")
+os.environ.setdefault("NORMALIZE_CACHE_URL", "memory")
+os.environ.setdefault("ARTIFACT_DIR", os.path.join(tempfile.mkdtemp(prefix="powerai-artifacts-"), "artifacts"))
+
+from sqlalchemy import event  # noqa: E402
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.services.catalog import catalog_for  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def schema(monkeypatch):
+    """Empty tables and response cache for every test (data versions restart with the tables)."""
+    from app.api import caching
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    catalog_for(engine).invalidate()
+    monkeypatch.setattr(caching, "RESPONSE_CACHE", caching.ResponseCache())
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+
+def count_queries(fn, bind=engine):
+    """Number of SQL statements fn executes on bind."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
@@ -0,0 +1,222 @@
+"""
+The vectorized analytics against naive per-exercise loops over the same sets.
+"""
+import random
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services import analytics
+
+
+def epley(weight, reps):
+    if reps <= 0:
+        return 0.0
+    return weight if reps == 1 else weight * (1 + reps / 30.0)
+
+
+def random_rows(seed, sessions=40, exercises=(1, 2, 3)):
+    """(weight, reps, rpe, date, session_id, exercise_id) rows ordered like load_set_columns."""
+    rng = random.Random(seed)
+    rows = []
+    day = datetime(2024, 1, 1, 18)
+    for session_id in range(1, sessions + 1):
+        # Several sessions a day sometimes, and gaps spanning weeks
+        day += timedelta(days=rng.choice((0, 1, 2, 3, 9)))
+        for exercise_id in rng.sample(exercises, rng.randint(1, len(exercises))):
+            for _ in range(rng.randint(1, 4)):
+                # Few distinct weights and reps, so ties are common
+                rows.append((rng.choice((60.0, 80.0, 100.0)), rng.randint(0, 12), None, day, session_id, exercise_id))
+    rows.sort(key=lambda r: (r[3], r[4]))
+    return rows
+
+
+def by_exercise(rows):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row[5]].append(row)
+    return grouped
+
+
+def naive_prs(rows):
+    result = {}
+    for exercise_id, sets in by_exercise(rows).items():
+        rep_maxes = {}
+        for n in range(1, analytics.MAX_REP_MAX + 1):
+            weights = [w for w, r, *_ in sets if r >= n]
+            if weights:
+                rep_maxes[n] = max(weights)
+        events, best = [], 0.0
+        for w, r, _, d, session_id, _ in sets:
+            e = epley(w, r)
+            if e > best:
+                events.append((d.date().isoformat(), session_id, w, r, e))
+                best = e
+        result[exercise_id] = {"rep_maxes": rep_maxes, "e1rm": max(epley(w, r) for w, r, *_ in sets), "pr_events": events}
+    return result
+
+
+def naive_volume(rows):
+    sessions, weeks = {}, {}
+    for w, r, _, d, session_id, _ in rows:
+        for groups, key in ((sessions, (session_id, d.date())), (weeks, d.date() - timedelta(days=d.weekday()))):
+            totals = groups.setdefault(key, [0.0, 0, 0])
+            totals[0] += w * r
+            totals[1] += 1
+            totals[2] += r
+    return {
+        "total_volume": sum(w * r for w, r, *_ in rows),
+        "sessions": [(session_id, d.isoformat(), *totals) for (session_id, d), totals in sessions.items()],
+        "weeks": [(week.isoformat(), *totals) for week, totals in weeks.items()],
+    }
+
+
+def naive_trends(rows, window=4, plateau_sessions=6):
+    result = {}
+    for exercise_id, sets in by_exercise(rows).items():
+        points = {}
+        for w, r, _, d, session_id, _ in sets:
+            key = (session_id, d)
+            points[key] = max(points.get(key, 0.0), epley(w, r))
+        keys = list(points)
+        best = [points[k] for k in keys]
+        last_pr = 0
+        for i in range(1, len(best)):
+            if best[i] > max(best[:i]):
+                last_pr = i
+        tail_x = [keys[i][1].toordinal() for i in range(len(keys))][-window:]
+        tail_y = best[-window:]
+        slope = np.polyfit(tail_x, tail_y, 1)[0] * 7 if len(set(tail_x)) > 1 else 0.0
+        result[exercise_id] = {
+            "e1rm": best,
+            "moving_average": [float(np.mean(best[max(0, i - window + 1):i + 1])) for i in range(len(best))],
+            "best_e1rm": max(best),
+            "sessions_since_pr": len(best) - 1 - last_pr,
+            "plateau": len(best) - 1 - last_pr >= plateau_sessions,
+            "slope_per_week": slope,
+        }
+    return result
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_detect_prs_matches_naive(seed):
+    rows = random_rows(seed)
+    result = analytics.to_python(analytics.detect_prs(analytics.columns_from_rows(rows)))
+    expected = naive_prs(rows)
+    assert set(result) == set(expected)
+    for exercise_id, want in expected.items():
+        got = result[exercise_id]
+        assert got["rep_maxes"] == want["rep_maxes"]
+        assert got["e1rm"] == pytest.approx(want["e1rm"])
+        events = got["pr_events"]
+        assert list(zip(events["date"], events["session_id"], events["weight"], events["reps"])) == [e[:4] for e in want["pr_events"]]
+        assert events["e1rm"] == pytest.approx([e[4] for e in want["pr_events"]])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_calculate_volume_matches_naive(seed):
+    rows = random_rows(seed)
+    result = analytics.to_python(analytics.calculate_volume(analytics.columns_from_rows(rows)))
+    expected = naive_volume(rows)
+    assert result["total_volume"] == pytest.approx(expected["total_volume"])
+    sessions = result["sessions"]
+    assert list(zip(sessions["session_id"], sessions["date"], sessions["volume"], sessions["sets"], sessions["reps"])) == expected["sessions"]
+    weeks = result["weeks"]
+    assert list(zip(weeks["week_start"], weeks["volume"], weeks["sets"], weeks["reps"])) == expected["weeks"]
+    # Weeks start on Monday
+    assert all(date.fromisoformat(week).weekday() == 0 for week in weeks["week_start"])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compute_trends_matches_naive(seed):
+    rows = random_rows(seed)
+    result = analytics.to_python(analytics.compute_trends(analytics.columns_from_rows(rows), window=4, plateau_sessions=3))
+    expected = naive_trends(rows, window=4, plateau_sessions=3)
+    assert set(result) == set(expected)
+    for exercise_id, want in expected.items():
+        got = result[exercise_id]
+        assert got["e1rm"] == pytest.approx(want["e1rm"])
+        assert got["moving_average"] == pytest.approx(want["moving_average"])
+        assert got["best_e1rm"] == pytest.approx(want["best_e1rm"])
+        assert (got["sessions_since_pr"], got["plateau"]) == (want["sessions_since_pr"], want["plateau"])
+        assert got["slope_per_week"] == pytest.approx(want["slope_per_week"], abs=1e-6)
+
+
+def test_empty_input():
+    cols = analytics.empty_columns()
+    assert analytics.detect_prs(cols) == {}
+    assert analytics.compute_trends(cols) == {}
+    volume = analytics.to_python(analytics.calculate_volume(cols))
+    assert volume["total_volume"] == 0 and volume["sessions"]["session_id"] == [] and volume["weeks"]["volume"] == []
+    assert analytics.progression(cols)["best_e1rm"] is None
+
+
+def test_single_session():
+    day = datetime(2024, 5, 1)
+    rows = [(100.0, 5, None, day, 7, 1), (110.0, 3, None, day, 7, 1)]
+    cols = analytics.columns_from_rows(rows)
+    trend = analytics.compute_trends(cols)[1]
+    assert trend["sessions_since_pr"] == 0 and trend["slope_per_week"] == 0.0 and not trend["plateau"]
+    prs = analytics.to_python(analytics.detect_prs(cols))[1]
+    assert prs["rep_maxes"] == {1: 110.0, 2: 110.0, 3: 110.0, 4: 100.0, 5: 100.0}
+    assert prs["pr_events"]["session_id"] == [7, 7]
+
+
+def test_ties_are_not_new_prs():
+    days = [datetime(2024, 5, d) for d in (1, 3, 5)]
+    rows = [(100.0, 5, None, d, i, 1) for i, d in enumerate(days, 1)]
+    cols = analytics.columns_from_rows(rows)
+    assert analytics.detect_prs(cols)[1]["pr_events"]["session_id"].tolist() == [1]
+    assert analytics.compute_trends(cols)[1]["sessions_since_pr"] == 2
+    assert analytics.progression(cols)["pr"].tolist() == [True, False, False]
+
+
+def test_undated_sessions_are_left_out(db):
+    from app.services.ingestion import ingest_workouts
+    sets = [{"reps": 5, "weight": 100.0}]
+    ingest_workouts([
+        [{"name": "bench press", "date": "2024-05-01T18:00:00", "sets": sets}],
+        [{"name": "bench press", "sets": [{"reps": 1, "weight": 200.0}]}],
+        [{"name": "bench press", "date": "2024-05-03T18:00:00", "sets": sets}],
+    ], db=db)
+    db.commit()
+    cols = analytics.load_set_columns(db)
+    assert len(cols["weight"]) == 2
+    exercise_id = analytics.exercise_id_by_name(db, "Bench Press")
+    assert analytics.detect_prs(cols)[exercise_id]["e1rm"] == pytest.approx(epley(100.0, 5))
+
+
+def test_lttb_keeps_short_series_whole():
+    x = np.arange(5)
+    assert analytics.lttb(x, x * 2.0, 5).tolist() == [0, 1, 2, 3, 4]
+    assert analytics.lttb(x, x * 2.0, 50).tolist() == [0, 1, 2, 3, 4]
+    assert analytics.downsample(x[:2], np.array([1.0, 2.0]), 3).tolist() == [0, 1]
+    with pytest.raises(ValueError):
+        analytics.lttb(x, x * 2.0, 2)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_downsample_keeps_the_ends_and_the_peak(seed):
+    rng = np.random.default_rng(seed)
+    n, threshold = 500, 30
+    x = np.cumsum(rng.integers(1, 5, n))
+    y = np.cumsum(rng.normal(0, 1, n))
+    keep = analytics.downsample(x, y, threshold)
+    assert len(keep) == threshold
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert np.all(np.diff(keep) > 0)
+    assert int(np.argmax(y)) in keep.tolist()
+
+
+def test_progression_keeps_the_pr_when_downsampled():
+    start = datetime(2024, 1, 1)
+    # A single best session in the middle of a flat series that LTTB alone may drop
+    rows = [(100.0 if i != 137 else 103.0, 1, None, start + timedelta(days=i), i + 1, 1) for i in range(300)]
+    rows[10] = (101.0, 1, None, start + timedelta(days=10), 11, 1)
+    result = analytics.to_python(analytics.progression(analytics.columns_from_rows(rows), max_points=20))
+    assert len(result["e1rm"]) == 20
+    assert result["sessions"] == 300
+    assert result["best_e1rm"] == 103.0 and 103.0 in result["e1rm"]
+    assert result["session_ids"][0] == 1 and result["session_ids"][-1] == 300
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from conftest import count_queries
+from app.models import Exercise, Set, WorkoutSession
+from app.services.ingestion import ingest_workouts
+
+
+def workout(day, *names, sets=2):
+    return [
+        {"name": name, "date": datetime(2024, 3, 1, 18) + timedelta(days=day), "location": "gym",
+         "primary_muscle": "chest", "sets": [{"reps": 5 + i, "weight": 100.0 + day, "rpe": None} for i in range(sets)]}
+        for name in names
+    ]
+
+
+def count(db, model):
+    return db.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_batch_inserts_every_session_and_set(db):
+    workouts = [workout(day, "Bench Press", "squat", sets=1 + day % 3) for day in range(10)]
+    session_ids = ingest_workouts(workouts, db=db)
+    db.commit()
+    assert len(session_ids) == len(set(session_ids)) == 10
+    assert count(db, WorkoutSession) == 10
+    assert count(db, Set) == sum(2 * (1 + day % 3) for day in range(10))
+    # Each session got its own sets, in input order
+    for day, session_id in enumerate(session_ids):
+        weights = db.execute(select(Set.weight).where(Set.session_id == session_id)).scalars().all()
+        assert weights == [100.0 + day] * 2 * (1 + day % 3)
+        assert db.get(WorkoutSession, session_id).date == datetime(2024, 3, 1, 18) + timedelta(days=day)
+
+
+def test_resubmitted_exercises_are_reused(db):
+    ingest_workouts([workout(0, "bench press", "squat")], db=db)
+    db.commit()
+    first = {e.name: e.id for e in db.execute(select(Exercise)).scalars()}
+
+    # Known names, other casing, and a new one repeated across the batch
+    ingest_workouts([workout(1, "Bench Press", "deadlift"), workout(2, "SQUAT", "deadlift")], db=db)
+    db.commit()
+    exercises = {e.name: e.id for e in db.execute(select(Exercise)).scalars()}
+    assert sorted(exercises) == ["bench press", "deadlift", "squat"]
+    assert {name: exercises[name] for name in first} == first
+    assert count(db, Set) == 3 * 2 * 2
+
+
+def test_statements_do_not_grow_with_the_batch(db):
+    days = iter(range(1000))
+
+    def ingest(n):
+        # Later days and heavier sets every time, so each batch updates records and rollups alike
+        batch = [workout(next(days), "bench press", "squat") for _ in range(n)]
+
+        def run():
+            ingest_workouts(batch, db=db)
+            db.commit()
+        return count_queries(run)
+
+    # Creates the exercises and records, then reloads the catalogue, as the first import batches do
+    ingest(2)
+    ingest(2)
+    small = ingest(2)
+    # Only the session inserts grow: SQLite cannot return generated ids of a multi-row
+    # INSERT in order, so the ORM inserts sessions one by one there (Postgres batches them)
+    assert ingest(50) - small == 48
+
+
+def test_submit_bulk(db, client):
+    response = client.post("/submit/bulk", json={"sessions": [
+        [{**ex, "date": ex["date"].isoformat()} for ex in workout(day, "bench press")] for day in range(3)
+    ]})
+    assert response.json()["success"] is True
+    assert (count(db, WorkoutSession), count(db, Set), count(db, Exercise)) == (3, 6, 1)
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+from app.services.ingestion import ingest_workouts
+from conftest import count_queries
+
+
+def seed(db, days=3, start=datetime(2024, 1, 1)):
+    ingest_workouts([
+        [{"name": "bench press", "date": start + timedelta(days=i), "primary_muscle": "chest", "sets": [{"reps": 5, "weight": 100.0}]}]
+        for i in range(days)
+    ], db=db)
+    db.commit()
+
+
+def test_matching_if_none_match_is_304(db, client):
+    seed(db)
+    for path in ("/sessions", "/workouts/last-workout-by-muscle"):
+        response = client.get(path)
+        etag = response.headers["etag"]
+        assert response.status_code == 200 and response.headers["cache-control"] == "no-cache"
+        revalidated = client.get(path, headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304 and revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+        assert client.get(path, headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+        assert client.get(path, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_a_write_changes_the_etag(db, client):
+    seed(db)
+    etag = client.get("/sessions").headers["etag"]
+    seed(db, days=1, start=datetime(2024, 2, 1))
+    response = client.get("/sessions", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()["sessions"]) == 4
+
+
+def test_etag_depends_on_the_query(db, client):
+    seed(db)
+    first_page = client.get("/sessions", params={"limit": 1})
+    cursor = first_page.json()["next_cursor"]
+    etags = {
+        first_page.headers["etag"],
+        client.get("/sessions").headers["etag"],
+        client.get("/sessions", params={"limit": 1, "before": cursor}).headers["etag"],
+        client.get("/sessions", params={"limit": 1, "format": "columnar"}).headers["etag"],
+        client.get("/sessions", params={"limit": 1}, headers={"Accept": "application/msgpack"}).headers["etag"],
+    }
+    assert len(etags) == 5
+    # Parameter order does not matter
+    assert client.get("/sessions?format=rows&limit=1").headers["etag"] == client.get("/sessions?limit=1&format=rows").headers["etag"]
+    # Another page's ETag does not revalidate this one
+    assert client.get("/sessions", params={"limit": 1, "before": cursor}, headers={"If-None-Match": first_page.headers["etag"]}).status_code == 200
+
+
+def test_unchanged_data_is_served_from_the_response_cache(db, client):
+    seed(db)
+    first = client.get("/sessions")
+    # Only the data version is read
+    assert count_queries(lambda: client.get("/sessions")) == 1
+    assert client.get("/sessions").content == first.content
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from conftest import count_queries
+from app.db import engine
+from app.models import Exercise
+from app.services import catalog as catalog_module
+from app.services.catalog import ExerciseCatalog, catalog_for
+from app.services.ingestion import ingest_workouts
+
+
+def ingest(db, *names):
+    ingest_workouts([[{"name": name, "date": "2024-03-01T18:00:00", "sets": [{"reps": 5, "weight": 100.0}]} for name in names]], db=db)
+    db.commit()
+    return sorted(db.execute(select(Exercise.name)).scalars())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(catalog_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_polling_picks_up_another_process_write(db, clock):
+    # This process's catalogue, on an engine without a LISTEN/NOTIFY listener
+    catalog = ExerciseCatalog(poll_seconds=5)
+    assert catalog.lookup(db, ["Squat"]) == {}
+
+    # Another process adds exercises: its commit bumps the exercises version
+    names = ingest(db, "squat", "bench press")
+    assert count_queries(lambda: catalog.lookup(db, names)) == 0
+    assert catalog.lookup(db, names) == {}
+
+    # Stale until the next poll, then reloaded once
+    clock[0] += 5
+    reloads = catalog_module.CACHE_RELOADS._value.get()
+    assert count_queries(lambda: catalog.lookup(db, names)) == 2
+    assert sorted(catalog.lookup(db, names)) == sorted(names)
+    assert catalog_module.CACHE_RELOADS._value.get() == reloads + 1
+
+    # Unchanged since: the poll reads only the version
+    clock[0] += 5
+    assert count_queries(lambda: catalog.lookup(db, names)) == 1
+    assert catalog_module.CACHE_RELOADS._value.get() == reloads + 1
+
+
+def test_own_writes_are_visible_without_waiting(db, clock, monkeypatch):
+    catalog = catalog_for(engine)
+    monkeypatch.setattr(catalog, "poll_seconds", 60)
+    assert catalog.lookup(db, ["Squat"]) == {}
+    names = ingest(db, "squat")
+    # The writer invalidated its own catalogue, so no poll interval has to pass
+    assert sorted(catalog.lookup(db, names)) == names
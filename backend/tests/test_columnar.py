@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import msgpack
+import pytest
+
+from app.models import WorkoutSession
+from app.services.ingestion import ingest_workouts
+
+EXERCISES = (("bench press", "chest", "barbell"), ("squat", "quads", "barbell"), ("dumbbell row", "back", None))
+
+
+@pytest.fixture(autouse=True)
+def history(db):
+    start = datetime(2024, 1, 1)
+    ingest_workouts([
+        [
+            {"name": name, "date": start + timedelta(days=day), "primary_muscle": muscle, "equipment": equipment,
+             "sets": [{"reps": 5 + i, "weight": 50.0 + 10 * day + i, "rpe": 8.0 if i else None} for i in range(1 + (day + j) % 3)]}
+            for j, (name, muscle, equipment) in enumerate(EXERCISES[day % 2:])
+        ]
+        for day in range(6)
+    ], db=db)
+    # A session without sets
+    db.add(WorkoutSession(date=start + timedelta(days=10), location="home"))
+    db.commit()
+
+
+def decode(page):
+    """The rows layout rebuilt from a columnar page, timestamps aside."""
+    exercises, sessions, sets = page["exercises"], page["sessions"], page["sets"]
+    offsets = sessions["setOffsets"]
+    assert len(offsets) == len(sessions["id"]) + 1 and offsets[0] == 0 and offsets[-1] == len(sets["weight"])
+    rows = []
+    for j, session_id in enumerate(sessions["id"]):
+        rows.append({
+            "id": session_id,
+            "date": sessions["date"][j],
+            "location": sessions["location"][j],
+            "sets": [
+                {
+                    "exercise": exercises["name"][sets["exercise"][i]],
+                    "equipment": exercises["equipment"][sets["exercise"][i]],
+                    "primaryMuscle": exercises["primaryMuscle"][sets["exercise"][i]],
+                    "secondaryMuscle": exercises["secondaryMuscle"][sets["exercise"][i]],
+                    "weight": sets["weight"][i],
+                    "reps": sets["reps"][i],
+                    "rpe": sets["rpe"][i],
+                }
+                for i in range(offsets[j], offsets[j + 1])
+            ],
+        })
+    return rows
+
+
+def without_timestamps(sessions):
+    return [{**s, "sets": [{k: v for k, v in st.items() if k != "timestamp"} for st in s["sets"]]} for s in sessions]
+
+
+@pytest.mark.parametrize("limit", [None, 1, 4])
+def test_columnar_round_trips_to_rows(client, limit):
+    params = {} if limit is None else {"limit": limit}
+    rows = client.get("/sessions", params=params).json()
+    columnar = client.get("/sessions", params={**params, "format": "columnar"}).json()
+    assert columnar["format"] == "columnar"
+    assert decode(columnar) == without_timestamps(rows["sessions"])
+    assert columnar["next_cursor"] == rows["next_cursor"]
+
+
+def test_each_exercise_is_sent_once(client):
+    page = client.get("/sessions", params={"format": "columnar"}).json()
+    assert sorted(page["exercises"]["name"]) == sorted(name for name, *_ in EXERCISES)
+    assert set(page["sets"]["exercise"]) == set(range(len(EXERCISES)))
+    # The session without sets has an empty range
+    empty = page["sessions"]["location"].index("home")
+    assert page["sessions"]["setOffsets"][empty] == page["sessions"]["setOffsets"][empty + 1]
+
+
+@pytest.mark.parametrize("accept", ["application/msgpack", "application/x-msgpack"])
+@pytest.mark.parametrize("format", ["rows", "columnar"])
+def test_msgpack_matches_json(client, accept, format):
+    response = client.get("/sessions", params={"format": format}, headers={"Accept": accept})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert "Accept" in response.headers["vary"].split(", ")
+    assert msgpack.unpackb(response.content) == client.get("/sessions", params={"format": format}).json()
+
+
+def test_json_by_default(client):
+    response = client.get("/sessions", headers={"Accept": "text/html, */*"})
+    assert response.headers["content-type"] == "application/json"
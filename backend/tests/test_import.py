@@ -0,0 +1,73 @@
+import io
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Exercise, WorkoutSession
+from app.services import normalization
+from app.services.ingestion import import_workout_rows, parse_workout_rows
+
+STRONG_CSV = """Date,Workout Name,Exercise Name,Weight,Reps
+2024-03-01 18:00:00,Legs,Squat (Barbell),100,5
+2024-03-01 18:00:00,Legs,Squat (Barbell),110,3
+2024-03-01 18:00:00,Legs,Leg Press,200,10
+2024-03-03 18:00:00,Push,Bench Press (Barbell),80,5
+2024-03-03 18:00:00,Push,bench press,85,3
+2024-03-05 18:00:00,Legs,squat,120,1
+"""
+
+
+@pytest.fixture
+def normalizer():
+    try:
+        return normalization.get_normalizer()
+    except normalization.NormalizerUnavailable as e:
+        pytest.skip(str(e))
+
+
+def test_import_reuses_exercises_across_spellings(db, normalizer):
+    stats = import_workout_rows(io.StringIO(STRONG_CSV))
+    assert stats["sessions"] == 3
+    exercises = {e.name: e for e in db.execute(select(Exercise)).scalars()}
+    assert sorted(exercises) == ["bench press", "leg press", "squat"]
+    assert exercises["squat"].primary_muscle == "quads"
+    assert len(exercises["squat"].sets) == 3
+    assert len(exercises["bench press"].sets) == 2
+
+
+def test_without_normalizer_names_are_cleaned(monkeypatch):
+    def unavailable():
+        raise normalization.NormalizerUnavailable("not installed")
+
+    monkeypatch.setattr(normalization, "get_normalizer", unavailable)
+    assert normalization.normalize_exercise("Bench Presses ")["name"] == "bench press"
+    assert normalization.normalize_exercise("DB Row")["name"] == "dumbbell row"
+
+
+def test_sessions_are_runs_of_rows(monkeypatch):
+    monkeypatch.setattr(normalization, "normalize_exercise", lambda name: {"name": name.lower()})
+    rows = """Date,Workout Name,Exercise Name,Weight,Reps
+2024-03-01,Legs,squat,100,5
+2024-03-01,Arms,curl,20,10
+2024-03-01,Legs,squat,100,5
+"""
+    workouts = [workout for workout, _ in parse_workout_rows(io.StringIO(rows))]
+    # Same date, different workout: two sessions. Legs is not contiguous, so it is split.
+    assert [[ex["name"] for ex in workout] for workout in workouts] == [["squat"], ["curl"], ["squat"]]
+
+
+def test_a_failing_name_is_imported_cleaned(db, normalizer, monkeypatch):
+    resolve = normalizer.hybrid_normalize_exercise
+
+    def malformed(raw_input):
+        if raw_input == "Leg Press":
+            raise RuntimeError("LLM selection failed: Expecting value: line 1 column 1 (char 0)")
+        return resolve(raw_input)
+
+    monkeypatch.setattr(normalizer, "hybrid_normalize_exercise", malformed)
+    stats = import_workout_rows(io.StringIO(STRONG_CSV))
+    assert stats["sessions"] == 3
+    exercises = {e.name: e for e in db.execute(select(Exercise)).scalars()}
+    assert sorted(exercises) == ["bench press", "leg press", "squat"]
+    assert exercises["leg press"].primary_muscle is None
+    assert len(exercises["squat"].sets) == 3
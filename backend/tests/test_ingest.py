@@ -0,0 +1,73 @@
+import sys
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import Exercise, WorkoutSession
+from app.services import normalization
+
+WORKOUT = {
+    "date": "2024-03-01T18:00:00Z",
+    "location": "gym",
+    "query": [
+        {"name": "Bench Press", "sets": [{"weight": 100, "reps": 5}, {"weight": 105, "reps": 3}]},
+        {"name": "db row", "sets": [{"weight": 40, "reps": 10}]},
+    ],
+}
+
+
+def session_count(db):
+    return db.execute(select(func.count()).select_from(WorkoutSession)).scalar()
+
+
+@pytest.fixture
+def normalizer():
+    try:
+        return normalization.get_normalizer()
+    except normalization.NormalizerUnavailable as e:
+        pytest.skip(str(e))
+
+
+def test_ingest_normalizes_and_stores(db, client, normalizer):
+    response = client.post("/workouts/ingest", json=WORKOUT)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [ex["name"] for ex in body["result"]] == ["bench press", "dumbbell row"]
+    assert body["result"][0]["total_volume"] == 100 * 5 + 105 * 3
+    session = db.get(WorkoutSession, body["session_id"])
+    assert session.date == datetime(2024, 3, 1, 18)
+    assert sorted(e.name for e in db.execute(select(Exercise)).scalars()) == ["bench press", "dumbbell row"]
+
+
+def test_unresolved_names_are_422_and_store_nothing(db, client, normalizer, monkeypatch):
+    resolve = normalizer.hybrid_normalize_exercise
+
+    def no_match(raw_input):
+        if raw_input == "db row":
+            return {"canonical_exercise": None, "primary_muscle": None, "secondary_muscle": None, "equipment": None}
+        return resolve(raw_input)
+
+    monkeypatch.setattr(normalizer, "hybrid_normalize_exercise", no_match)
+    # Not a dictionary hit, so it goes through hybrid_normalize_exercise
+    monkeypatch.setattr(normalizer.EXERCISE_LOOKUP, "lookup", lambda raw: (None, None))
+    response = client.post("/workouts/ingest", json=WORKOUT)
+    assert response.status_code == 422
+    assert response.json()["detail"]["unresolved"] == ["db row"]
+    assert session_count(db) == 0
+
+
+def test_invalid_workout_is_400(client, normalizer):
+    future = {**WORKOUT, "date": "2999-01-01T00:00:00Z"}
+    assert client.post("/workouts/ingest", json=future).status_code == 400
+    no_sets = {**WORKOUT, "query": [{"name": "bench press"}]}
+    assert client.post("/workouts/ingest", json=no_sets).status_code == 400
+
+
+def test_missing_normalizer_is_503(db, client, tmp_path, monkeypatch):
+    monkeypatch.setattr(normalization, "NORMALIZER_PATH", str(tmp_path))
+    monkeypatch.setattr(normalization, "_normalizer", None)
+    monkeypatch.delitem(sys.modules, "normalizer", raising=False)
+    response = client.post("/workouts/ingest", json=WORKOUT)
+    assert response.status_code == 503
+    assert session_count(db) == 0
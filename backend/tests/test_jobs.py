@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.db import SessionLocal
+from app.models import IngestJob, WorkoutSession
+from app.services import jobs
+
+WORKOUT = [
+    {"name": "bench press", "date": "2024-03-01T18:00:00Z", "location": "gym", "primary_muscle": "chest",
+     "sets": [{"weight": 100.0, "reps": 5, "note": ""}, {"weight": 105.0, "reps": 3, "note": ""}]},
+    {"name": "squat", "primary_muscle": "quads", "sets": [{"weight": 140.0, "reps": 5}]},
+]
+
+
+def count(db, model):
+    return db.execute(select(func.count()).select_from(model)).scalar()
+
+
+def job_status(client, job_id):
+    return client.get(f"/jobs/{job_id}").json()
+
+
+def test_submit_queues_and_a_worker_stores_it(db, client):
+    response = client.post("/submit", json={"exercises": WORKOUT})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert job_status(client, job_id)["status"] == "queued"
+
+    assert jobs.drain_once(SessionLocal) == 1
+    job = job_status(client, job_id)
+    assert job["status"] == "done" and job["attempts"] == 1
+    assert [session.id for session in db.execute(select(WorkoutSession)).scalars()] == job["session_ids"]
+
+
+def test_idempotent_replay_returns_the_original_job(db, client):
+    headers = {"Idempotency-Key": "workout-1"}
+    first = client.post("/submit", json={"exercises": WORKOUT}, headers=headers)
+    replay = client.post("/submit", json={"exercises": WORKOUT}, headers=headers)
+    assert (first.status_code, replay.status_code) == (202, 200)
+    assert replay.json()["job_id"] == first.json()["job_id"]
+    assert count(db, IngestJob) == 1
+
+
+def test_reused_key_with_another_payload_is_422(db, client):
+    headers = {"Idempotency-Key": "workout-1"}
+    assert client.post("/submit", json={"exercises": WORKOUT}, headers=headers).status_code == 202
+    other = [{**WORKOUT[0], "sets": [{"weight": 60.0, "reps": 10}]}]
+    assert client.post("/submit", json={"exercises": other}, headers=headers).status_code == 422
+    assert count(db, IngestJob) == 1
+
+
+@pytest.mark.parametrize("exercises", [
+    [],
+    [{"sets": [{"weight": 100.0, "reps": 5}]}],
+    [{"name": "bench press", "sets": [{"weight": 100.0}]}],
+    [{"name": "bench press", "sets": [{"weight": "heavy", "reps": 5}]}],
+    [{"name": "bench press", "date": "yesterday", "sets": [{"weight": 100.0, "reps": 5}]}],
+])
+def test_malformed_workouts_are_422_and_not_queued(db, client, exercises):
+    assert client.post("/submit", json={"exercises": exercises}).status_code == 422
+    assert count(db, IngestJob) == 0
+
+
+def test_invalid_payload_fails_without_retrying(db):
+    # Queued before validation existed, or by another writer
+    job, _ = jobs.enqueue_ingest(db, [[{"sets": [{"weight": 100.0, "reps": 5}]}]])
+    assert jobs.drain_once(SessionLocal) == 1
+    db.refresh(job)
+    assert (job.status, job.attempts) == (jobs.FAILED, 1)
+    assert jobs.drain_once(SessionLocal) == 0
+
+
+def test_transient_failure_is_retried(db, monkeypatch):
+    job, _ = jobs.enqueue_ingest(db, [WORKOUT])
+    ingest = jobs._ingest
+
+    def fail_once(session, claimed):
+        monkeypatch.setattr(jobs, "_ingest", ingest)
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(jobs, "_ingest", fail_once)
+    jobs.drain_once(SessionLocal)
+    db.refresh(job)
+    assert (job.status, job.attempts, job.error) == (jobs.QUEUED, 1, "database went away")
+    jobs.drain_once(SessionLocal)
+    db.refresh(job)
+    assert (job.status, job.attempts) == (jobs.DONE, 2)
+
+
+def test_claims_are_exclusive_until_the_lease_expires(db):
+    job, _ = jobs.enqueue_ingest(db, [WORKOUT])
+    assert [claimed.id for claimed in jobs.claim_jobs(db)] == [job.id]
+    assert jobs.claim_jobs(db) == []
+    # The worker died: once the lease is over another worker takes the job again
+    expired = jobs._now() - timedelta(seconds=jobs.INGEST_LEASE_SECONDS + 1)
+    db.execute(update(IngestJob).values(started_at=expired))
+    db.commit()
+    reclaimed = jobs.claim_jobs(db)
+    assert [claimed.id for claimed in reclaimed] == [job.id]
+    assert reclaimed[0].attempts == 2
+
+
+def test_a_bad_job_does_not_fail_its_batch(db):
+    good, _ = jobs.enqueue_ingest(db, [WORKOUT])
+    bad, _ = jobs.enqueue_ingest(db, [[{"name": "squat", "sets": [{"reps": 5}]}]])
+    also_good, _ = jobs.enqueue_ingest(db, [WORKOUT[1:]])
+    assert jobs.drain_once(SessionLocal) == 3
+    for job in (good, bad, also_good):
+        db.refresh(job)
+    assert [good.status, bad.status, also_good.status] == [jobs.DONE, jobs.FAILED, jobs.DONE]
+    assert count(db, WorkoutSession) == 2
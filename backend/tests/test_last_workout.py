@@ -0,0 +1,101 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import desc
+
+from app.models import Exercise, Set, WorkoutSession
+from app.services import history
+from app.services.ingestion import ingest_workouts
+
+EXERCISES = [
+    ("bench press", "Chest"),
+    ("incline press", "chest"),
+    ("chest dip", "CHEST"),
+    ("squat", "Quads"),
+    ("leg press", "quads"),
+    ("bicep curl", "Biceps"),  # only ever logged in undated sessions
+    ("plank", None),
+]
+DAYS = [datetime(2024, 1, 1) + timedelta(days=d) for d in range(4)]
+
+
+def old_last_workout_by_muscle(db):
+    """
+    The per-muscle queries /workouts/last-workout-by-muscle ran before the window query,
+    with the tie-breakers it left to the database made explicit: the later session id
+    among sessions on the same date, then the later set id among equally heavy sets.
+    """
+    muscles = {m.lower() for (m,) in db.query(Exercise.primary_muscle).distinct() if m}
+    result = {}
+    for muscle in muscles:
+        session = (
+            db.query(WorkoutSession)
+            .join(Set, WorkoutSession.id == Set.session_id)
+            .join(Exercise, Set.exercise_id == Exercise.id)
+            .filter(Exercise.primary_muscle.ilike(muscle), WorkoutSession.date.isnot(None))
+            .order_by(WorkoutSession.date.desc(), WorkoutSession.id.desc())
+            .first()
+        )
+        if session is None:
+            result[muscle] = dict(history.EMPTY_MUSCLE_ENTRY)
+            continue
+        top_set = (
+            db.query(Set)
+            .join(Exercise, Set.exercise_id == Exercise.id)
+            .filter(Set.session_id == session.id, Exercise.primary_muscle.ilike(muscle))
+            .order_by(desc(Set.weight), desc(Set.id))
+            .first()
+        )
+        result[muscle] = history._muscle_entry(session.date, session.location, top_set.exercise, top_set)
+    return result
+
+
+def seed(db, rng, sessions=40):
+    """Sessions in random order, with shared dates, undated sessions, equal weights and mixed-case muscles."""
+    exercises = [Exercise(name=name, primary_muscle=muscle) for name, muscle in EXERCISES]
+    db.add_all(exercises)
+    db.flush()
+    for _ in range(sessions):
+        session = WorkoutSession(date=rng.choice(DAYS + [None]), location=rng.choice(["home", "gym"]))
+        db.add(session)
+        db.flush()
+        picked = rng.sample([e for e in exercises if e.name != "bicep curl"], 3)
+        if session.date is None:
+            picked.append(exercises[5])
+        db.add_all(
+            Set(session_id=session.id, exercise_id=e.id, reps=5, weight=rng.choice([60.0, 80.0, 80.0]))
+            for e in picked for _ in range(rng.randint(1, 3))
+        )
+        db.flush()
+        # Incremental maintenance, as ingest_workouts does
+        history.update_muscle_last_workout(db, [session.id])
+    db.commit()
+
+
+@pytest.mark.parametrize("seed_value", range(5))
+def test_last_workout_paths_agree(db, seed_value):
+    seed(db, random.Random(seed_value))
+    expected = old_last_workout_by_muscle(db)
+    assert set(expected) == {"chest", "quads", "biceps"}
+    assert expected["biceps"] == history.EMPTY_MUSCLE_ENTRY
+
+    assert history._last_workout_from_window(db) == expected
+    assert history._last_workout_from_summary(db) == expected
+    history.rebuild_muscle_last_workout(db)
+    assert history._last_workout_from_summary(db) == expected
+
+
+def test_ingested_sessions_agree(db):
+    """Through ingest_workouts, which lowercases names and muscles, including an older session arriving last."""
+    def workout(date, weight, muscle="Back"):
+        return [{"name": "barbell row", "date": date, "primary_muscle": muscle, "sets": [{"reps": 5, "weight": weight}]}]
+
+    ingest_workouts([workout(DAYS[2], 100.0), workout(None, 200.0)], db=db)
+    ingest_workouts([workout(DAYS[2], 100.0), workout(DAYS[1], 150.0)], db=db)
+    db.commit()
+    expected = old_last_workout_by_muscle(db)
+    # The later of the two sessions on the latest date
+    assert expected["back"]["top_set"]["weight"] == 100.0
+    assert history.get_last_workout_by_muscle(db, use_summary=False) == expected
+    assert history.get_last_workout_by_muscle(db, use_summary=True) == expected
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def test_app_starts_without_the_normalizer(tmp_path):
+    env = {**os.environ, "NORMALIZER_PATH": str(tmp_path / "missing")}
+    script = (
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "print(TestClient(app).post('/workouts/ingest', json={'date': '2024-01-01T00:00:00Z', 'query': []}).status_code)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split()[-1] == "503"
+
+
+def test_metrics_count_sql_per_route(client):
+    assert client.get("/sessions").status_code == 200
+    body = client.get("/metrics").text
+    assert 'sql_statements_per_request_count{route="/sessions"}' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/sessions",status="200"}' in body
@@ -0,0 +1,100 @@
+"""
+Many parallel requests against the read endpoints, through the sync and the async
+(USE_ASYNC_DB) routers, checking that none fails waiting for a connection and that
+every connection goes back to the pool.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import DATABASE_URL, _engine_kwargs, async_database_url, engine, get_async_db, get_db
+from app.services.ingestion import ingest_workouts
+
+PATHS = ("/sessions?limit=50", "/workouts/last-workout-by-muscle", "/records")
+REQUESTS = 200
+
+
+@pytest.fixture(autouse=True)
+def history(db):
+    start = datetime(2024, 1, 1)
+    ingest_workouts([
+        [
+            {"name": name, "date": start + timedelta(days=day), "primary_muscle": muscle, "sets": [{"reps": 5, "weight": 100.0}] * 3}
+            for name, muscle in (("bench press", "chest"), ("squat", "quads"), ("barbell row", "back"))
+        ]
+        for day in range(60)
+    ], db=db)
+    db.commit()
+
+
+def fire(app, n=REQUESTS):
+    """Send n concurrent GETs over PATHS to app in-process. Returns the failures: status codes or exceptions."""
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+            async def one(i):
+                try:
+                    response = await client.get(PATHS[i % len(PATHS)])
+                    return response.status_code
+                except Exception as e:
+                    return e
+
+            return await asyncio.gather(*(one(i) for i in range(n)))
+
+    return [result for result in asyncio.run(run()) if result != 200]
+
+
+def test_sync_router_under_load():
+    from app.main import app
+    assert fire(app) == []
+    assert engine.pool.checkedout() == 0
+
+
+def test_async_router_under_load():
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.api import async_endpoints
+    async_engine = create_async_engine(async_database_url(DATABASE_URL), **_engine_kwargs(DATABASE_URL, async_driver=True))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_test_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    # The async routes alone, as app.main mounts them ahead of the sync ones with USE_ASYNC_DB set
+    app = FastAPI()
+    app.include_router(async_endpoints.router)
+    app.dependency_overrides[get_async_db] = get_test_async_db
+    try:
+        assert fire(app) == []
+        assert async_engine.pool.checkedout() == 0
+    finally:
+        asyncio.run(async_engine.dispose())
+
+
+def test_tight_pool_fails_without_leaking_connections():
+    """One connection and no wait: concurrent requests fail on the pool, yet every connection is returned."""
+    from app.main import app
+    tight = create_engine(DATABASE_URL, pool_size=1, max_overflow=0, pool_timeout=0.001)
+    TightSession = sessionmaker(autocommit=False, autoflush=False, bind=tight)
+
+    def get_tight_db():
+        db = TightSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_tight_db
+    try:
+        assert fire(app)
+        assert tight.pool.checkedout() == 0
+        # Still serves requests once the burst is over
+        assert fire(app, n=1) == []
+    finally:
+        del app.dependency_overrides[get_db]
+        tight.dispose()
@@ -0,0 +1,74 @@
+import importlib.util
+import os
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, text
+
+from app.models import PersonalRecord
+from app.services import records
+from app.services.ingestion import ingest_workouts
+
+MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "alembic", "versions", "add_personal_records.py")
+
+
+def random_workouts(rng, count, start):
+    return [
+        [
+            {"name": name, "date": None if rng.random() < 0.1 else start + timedelta(days=rng.randint(0, 90)),
+             # Few distinct values, so records tie often
+             "sets": [{"reps": rng.choice((0, 1, 3, 5, 5, 8)), "weight": rng.choice((None, 60.0, 80.0, 100.0))} for _ in range(rng.randint(1, 4))]}
+            for name in rng.sample(["bench press", "squat", "deadlift"], rng.randint(1, 3))
+        ]
+        for _ in range(count)
+    ]
+
+
+def all_records(db):
+    return sorted(
+        (r["exercise_id"], r["metric"], r["rep_count"], pytest.approx(r["value"]), r["set_id"], r["session_id"], r["achieved_at"])
+        for r in records.get_records(db)
+    )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_records_match_a_rebuild(db, seed):
+    rng = random.Random(seed)
+    for _ in range(5):
+        ingest_workouts(random_workouts(rng, 8, datetime(2024, 1, 1)), db=db)
+        db.commit()
+    incremental = all_records(db)
+    assert incremental
+    records.rebuild_personal_records(db)
+    assert all_records(db) == incremental
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_migration_backfill_matches_a_rebuild(db, seed):
+    spec = importlib.util.spec_from_file_location("add_personal_records", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    ingest_workouts(random_workouts(random.Random(seed), 40, datetime(2024, 1, 1)), db=db)
+    db.commit()
+    records.rebuild_personal_records(db)
+    rebuilt = all_records(db)
+    db.execute(delete(PersonalRecord))
+    db.execute(text(migration.BACKFILL))
+    db.commit()
+    assert all_records(db) == rebuilt
+
+
+def test_an_equal_set_does_not_take_the_record(db, client):
+    day = datetime(2024, 1, 1)
+    first = ingest_workouts([[{"name": "squat", "date": day, "sets": [{"reps": 5, "weight": 140.0}]}]], db=db)[0]
+    ingest_workouts([[{"name": "squat", "date": day + timedelta(days=7), "sets": [{"reps": 5, "weight": 140.0}]}]], db=db)
+    db.commit()
+    body = client.get("/records").json()["records"]
+    weight = next(r for r in body if r["metric"] == "weight" and r["rep_count"] == 5)
+    assert (weight["value"], weight["session_id"], weight["achieved_at"]) == (140.0, first, day.isoformat())
+    # A heavier set takes it
+    newer = ingest_workouts([[{"name": "squat", "date": day + timedelta(days=14), "sets": [{"reps": 5, "weight": 145.0}]}]], db=db)[0]
+    db.commit()
+    weight = next(r for r in records.get_records(db) if r["metric"] == "weight" and r["rep_count"] == 5)
+    assert (weight["value"], weight["session_id"]) == (145.0, newer)
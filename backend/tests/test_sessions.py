@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import history
+from app.services.ingestion import ingest_workouts
+from conftest import count_queries
+
+
+def workout(date, name="bench press", sets=3):
+    return [{
+        "name": name,
+        "date": date,
+        "location": "gym",
+        "primary_muscle": "chest",
+        "sets": [{"reps": 5, "weight": 100.0 + i} for i in range(sets)],
+    }]
+
+
+def seed(db, dated, undated=0):
+    start = datetime(2024, 1, 1)
+    workouts = [workout(start + timedelta(days=i)) for i in range(dated)] + [workout(None) for _ in range(undated)]
+    ids = ingest_workouts(workouts, db=db)
+    db.commit()
+    return ids
+
+
+def page_through(client, limit, **params):
+    ids, cursor = [], None
+    while True:
+        query = {"limit": limit, **params, **({"before": cursor} if cursor else {})}
+        response = client.get("/sessions", params=query)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        if body.get("format") == "columnar":
+            ids += body["sessions"]["id"]
+        else:
+            ids += [s["id"] for s in body["sessions"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("fmt", ["rows", "columnar"])
+def test_pages_reach_undated_sessions(db, client, fmt):
+    seed(db, dated=3, undated=2)
+    # Newest first, then the undated sessions
+    assert page_through(client, limit=2, format=fmt) == [3, 2, 1, 5, 4]
+    assert page_through(client, limit=1, format=fmt) == [3, 2, 1, 5, 4]
+    assert page_through(client, limit=10, format=fmt) == [3, 2, 1, 5, 4]
+
+
+def test_undated_sessions_sort_last_on_postgres():
+    sql = str(history.sessions_query(limit=2).compile(dialect=postgresql.dialect()))
+    assert "date DESC NULLS LAST" in sql
+
+
+def test_cursor_round_trip(db):
+    seed(db, dated=1, undated=1)
+    dated, undated = history.get_sessions(db)["sessions"]
+    assert history.parse_cursor(f"{dated['date']},{dated['id']}") == (datetime.fromisoformat(dated["date"]), dated["id"])
+    assert history.parse_cursor(f"null,{undated['id']}") == (None, undated["id"])
+
+
+def test_invalid_cursor_is_400(client):
+    assert client.get("/sessions", params={"limit": 2, "before": "yesterday"}).status_code == 400
+
+
+@pytest.mark.parametrize("limit", [None, 20])
+def test_statement_count_does_not_grow_with_history(db, limit):
+    def statements(dated):
+        seed(db, dated=dated, undated=2)
+        return count_queries(lambda: history.get_sessions(db, limit=limit))
+
+    small = statements(10)
+    large = statements(200)  # on top of the first 12
+    # Sessions, their sets, their exercises
+    assert small == large == 3
@@ -6,6 +6,7 @@ import {
   fetchSessions as apiFetchSessions,
   queryWorkout,
   submitWorkout,
+  waitForJob,
   WorkoutQueryResult,
 } from "./services/apiService";
 
@@ -133,7 +134,9 @@ function App() {
     setLoading(true);
     setError("");
     try {
-      await submitWorkout(normalized);
+      const job = await submitWorkout(normalized);
+      // Queued: refresh once a worker has stored it
+      await waitForJob(job.job_id);
       setMuscleGroupRefresh(Date.now());
       await fetchSessions();
     } catch (e) {
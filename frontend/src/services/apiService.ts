@@ -113,6 +113,40 @@ export async function submitWorkout(normalized: any) {
   }
 }
 
+// --- /submit queues the workout; the job reports when it is stored ---
+export interface IngestJob {
+  id: number;
+  status: "queued" | "running" | "done" | "failed";
+  attempts: number;
+  error: string | null;
+  session_ids: number[] | null;
+}
+
+export async function waitForJob(
+  jobId: number,
+  intervalMs = 500,
+  timeoutMs = 30000
+): Promise<IngestJob> {
+  const deadline = Date.now() + timeoutMs;
+  while (true) {
+    const res = await fetch(`${BACKEND_CORE_URL}/jobs/${jobId}`, { method: "GET" });
+    if (!res.ok) {
+      throw new Error(`Error: ${res.status} ${res.statusText}`);
+    }
+    const job: IngestJob = await res.json();
+    if (job.status === "done") {
+      return job;
+    }
+    if (job.status === "failed") {
+      throw new Error(`Workout could not be stored: ${job.error}`);
+    }
+    if (Date.now() > deadline) {
+      throw new Error("Workout is still queued, check back later");
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 export async function fetchLastWorkoutByMuscle(): Promise<LastWorkoutResponse> {
   try {
     const res = await fetch(